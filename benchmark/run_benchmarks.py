@@ -0,0 +1,307 @@
+"""串口收发热点路径的性能测试
+
+在仓库根目录运行::
+
+    python -m benchmark.run_benchmarks                  # 全部场景
+    python -m benchmark.run_benchmarks --quick          # 小数据量快速跑一遍
+    python -m benchmark.run_benchmarks --transports pty socket --modes asyncio --json bench.json
+
+对端为本地的模拟设备（loop://、socket:// 和 Linux PTY），不需要真实硬件。
+每个场景输出 字节/s、帧/s、端到端时延百分位、CPU 占用和 RSS；接收场景另外输出平均每次读取的字节数，
+灌包时该值接近 1 说明接收路径退化成了逐字节读取（例如把 socket:// 的 in_waiting 当作字节数）。
+CPU 为进程 CPU 时间 / 墙钟时间（包含模拟设备线程），RSS 为场景结束时的常驻内存。
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from benchmark.sim_device import SimulatedDevice, parse_timestamp
+from manager.framer import create_framer
+from manager.history_manager import HistoryManager
+from manager.log_manager import LogManager
+from manager.script_engine import compile_script
+from manager.serial_manager import SerialManager
+from manager.stats import SIZE_BUCKETS
+from thread.async_receiver import AsyncIOHub, AsyncReceiver
+from thread.automation_thread import AutomationThread
+from thread.batch_automation_thread import percentile
+from thread.serial_receiver import SerialReceiver
+
+TRANSPORTS = ("loop", "socket", "pty")
+MODES = ("thread", "asyncio")
+# 接收端界面显示的前缀，计算时延前去掉
+RX_PREFIX = "[接收] "
+# 灌包场景平均每次读取少于该字节数时给出警告
+MIN_FLOOD_READ = 4
+
+
+def rss_bytes():
+    """当前常驻内存（Linux 读 /proc，其他平台退化为峰值 RSS）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Meter:
+    """测量一段代码的墙钟时间和 CPU 时间"""
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+    def result(self, **values):
+        values["elapsed_s"] = self.wall
+        values["cpu_pct"] = self.cpu / self.wall * 100 if self.wall else 0.0
+        values["rss_mb"] = rss_bytes() / 1024 / 1024
+        return values
+
+
+def latency_stats(latencies_ms):
+    values = sorted(latencies_ms)
+    return {
+        "lat_p50_ms": percentile(values, 50),
+        "lat_p95_ms": percentile(values, 95),
+        "lat_p99_ms": percentile(values, 99),
+        "lat_max_ms": values[-1] if values else None,
+    }
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="serial_bench_")
+        self.results = []
+
+    # ------------------------- 端点 -------------------------
+    def open_device(self, transport, **device_args):
+        """启动模拟设备并用 SerialManager 打开对端，失败返回 (None, None)"""
+        device = SimulatedDevice(transport, **device_args)
+        try:
+            url = device.start()
+        except (OSError, RuntimeError) as e:
+            print(f"跳过 {transport}: {e}")
+            return None, None
+        serial = SerialManager()
+        if not serial.open(url, 115200, timeout=0.1):
+            device.stop()
+            return None, None
+        if transport == "loop":
+            device.attach_loop(serial.ser)
+        if not device.wait_ready():
+            print(f"跳过 {transport}: 模拟设备未就绪")
+            serial.close()
+            device.stop()
+            return None, None
+        return device, serial
+
+    def make_receiver(self, mode, serial, log_mgr, hub):
+        framer = create_framer(None)
+        if mode == "asyncio":
+            return AsyncReceiver(hub, serial, log_mgr, self.args.flush_ms, framer=framer)
+        return SerialReceiver(serial, log_mgr, self.args.flush_ms, framer=framer)
+
+    # ------------------------- 场景 -------------------------
+    def bench_receive(self, name, transport, mode, device_mode, count, interval=0.0):
+        """模拟设备发送 count 帧，统计接收器把它们交给界面的吞吐和时延"""
+        device, serial = self.open_device(transport, mode=device_mode, count=count, size=self.args.size,
+                                          interval=interval)
+        if device is None:
+            return
+        hub = AsyncIOHub() if mode == "asyncio" else None
+        log_mgr = LogManager(os.path.join(self.workdir, f"{name}_{transport}_{mode}"))
+        receiver = self.make_receiver(mode, serial, log_mgr, hub)
+        received = [0]
+        latencies = []
+        done = threading.Event()
+
+        def on_batch(msgs):
+            now = time.perf_counter_ns()
+            for msg in msgs:
+                sent = parse_timestamp(msg[len(RX_PREFIX):])
+                if sent is not None:
+                    latencies.append((now - sent) / 1e6)
+            received[0] += len(msgs)
+            if received[0] >= count:
+                done.set()
+
+        # 直接在接收线程中统计，不经过界面事件循环
+        receiver.received_batch.connect(on_batch, Qt.DirectConnection)
+        receiver.start()
+        timeout = self.args.timeout + count * interval
+        with Meter() as meter:
+            device.begin()
+            done.wait(timeout)
+        receiver.stop()
+        serial.close()
+        device.stop()
+        log_mgr.close()
+        if hub:
+            hub.stop()
+
+        frames = received[0]
+        read_avg = serial.stats.histogram("rx_read_size", SIZE_BUCKETS).snapshot()["avg"]
+        result = meter.result(scenario=name, transport=transport, mode=mode, frames=frames,
+                              frames_per_s=frames / meter.wall,
+                              bytes_per_s=frames * self.args.size / meter.wall,
+                              lost=count - frames, read_avg=read_avg, **latency_stats(latencies))
+        self.report(result)
+        if name == "flood" and read_avg is not None and read_avg < MIN_FLOOD_READ:
+            print(f"  ⚠️ {transport}/{mode} 平均每次只读取 {read_avg:.1f} 字节，接收路径可能退化为逐字节读取")
+
+    def bench_automation(self, transport, mode):
+        """脚本逐条发送并等待回显，统计往返时延和每秒步数"""
+        steps = self.args.steps
+        device, serial = self.open_device(transport, mode="echo")
+        if device is None:
+            return
+        program = compile_script(f"timeout 2000\nloop {steps} i\n    send PING ${{i}}\n    expect \"PING\"\nend\n",
+                                 "bench")
+        log_mgr = LogManager(os.path.join(self.workdir, f"automation_{transport}"))
+        thread = AutomationThread(program, serial, log_mgr, interval_ms=0, logging_flag=True,
+                                  framer=create_framer(None))
+        with Meter() as meter:
+            thread.start()
+            thread.wait()
+        serial.close()
+        device.stop()
+        log_mgr.close()
+
+        summary = thread.runner.summary()
+        latencies = [r["latency_ms"] for r in thread.results if r["latency_ms"] is not None]
+        result = meter.result(scenario="automation", transport=transport, mode=mode, frames=summary["passed"],
+                              frames_per_s=summary["passed"] / meter.wall, bytes_per_s=None,
+                              lost=summary["failed"], **latency_stats(latencies))
+        self.report(result)
+
+    def bench_log(self):
+        """LogManager：write() 调用的吞吐和关闭时写完剩余日志的耗时"""
+        lines = self.args.lines
+        log_mgr = LogManager(os.path.join(self.workdir, "log"))
+        msg = "[接收] " + "x" * max(0, self.args.size - 10)
+        with Meter() as meter:
+            write = log_mgr.write
+            for _ in range(lines):
+                write(msg)
+            enqueued = time.perf_counter() - meter.wall
+            log_mgr.close()
+        result = meter.result(scenario="log", transport="-", mode="-", frames=lines,
+                              frames_per_s=lines / meter.wall,
+                              bytes_per_s=os.path.getsize(log_mgr.log_file) / meter.wall,
+                              lost=0, enqueue_per_s=lines / enqueued if enqueued else None)
+        self.report(result)
+
+    def bench_history(self):
+        """HistoryManager：upsert 的吞吐（含关闭时后台同步到数据库）"""
+        count = self.args.history
+        history = HistoryManager(os.path.join(self.workdir, "history.db"), max_history=1000)
+        with Meter() as meter:
+            for i in range(count):
+                # 一半为新命令，一半为重复命令（移到最新）
+                history.upsert_history(f"AT+CMD={i // 2 if i % 2 else i}", False, True)
+            history.close()
+        result = meter.result(scenario="history", transport="-", mode="-", frames=count,
+                              frames_per_s=count / meter.wall, bytes_per_s=None, lost=0)
+        self.report(result)
+
+    # ------------------------- 输出 -------------------------
+    # (列名, 字段, 宽度, 格式)；列名用 ASCII 以便终端对齐
+    COLUMNS = (("scenario", "scenario", 12, ""), ("transport", "transport", 10, ""), ("rx", "mode", 9, ""),
+               ("frames", "frames", 8, "d"), ("frames/s", "frames_per_s", 11, ".0f"), ("MB/s", "mb_per_s", 8, ".2f"),
+               ("lost", "lost", 6, "d"), ("p50 ms", "lat_p50_ms", 10, ".2f"), ("p95 ms", "lat_p95_ms", 10, ".2f"),
+               ("p99 ms", "lat_p99_ms", 10, ".2f"), ("read B", "read_avg", 8, ".0f"), ("CPU%", "cpu_pct", 7, ".1f"),
+               ("RSS MB", "rss_mb", 8, ".1f"))
+
+    def header(self):
+        return "".join(name.ljust(width) if not spec else name.rjust(width)
+                       for name, _, width, spec in self.COLUMNS)
+
+    def report(self, r):
+        self.results.append(r)
+        row = dict(r, mb_per_s=r["bytes_per_s"] / 1024 / 1024 if r["bytes_per_s"] is not None else None)
+        cells = []
+        for _, key, width, spec in self.COLUMNS:
+            value = row.get(key)
+            if not spec:
+                cells.append(str(value).ljust(width))
+            else:
+                cells.append((format(value, spec) if value is not None else "-").rjust(width))
+        print("".join(cells), flush=True)
+
+    def run(self):
+        args = self.args
+        print(f"帧长 {args.size} B，接收刷新间隔 {args.flush_ms} ms")
+        print(self.header())
+        try:
+            for transport in args.transports:
+                for mode in args.modes:
+                    if "flood" in args.scenarios:
+                        self.bench_receive("flood", transport, mode, "flood", args.frames)
+                    if "latency" in args.scenarios:
+                        self.bench_receive("latency", transport, mode, "schedule", args.paced,
+                                           interval=args.pace_ms / 1000)
+                if "automation" in args.scenarios:
+                    # 脚本直接读串口，与接收方式无关
+                    self.bench_automation(transport, "script")
+            if "log" in args.scenarios:
+                self.bench_log()
+            if "history" in args.scenarios:
+                self.bench_history()
+        finally:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(self.results, f, indent=4, ensure_ascii=False)
+            print(f"结果已保存: {args.json}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="串口收发热点路径的性能测试")
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--scenarios", nargs="+", choices=("flood", "latency", "automation", "log", "history"),
+                        default=["flood", "latency", "automation", "log", "history"])
+    parser.add_argument("--frames", type=int, default=200000, help="灌包场景的帧数")
+    parser.add_argument("--size", type=int, default=64, help="帧长（字节）")
+    parser.add_argument("--paced", type=int, default=1000, help="时延场景的帧数")
+    parser.add_argument("--pace-ms", type=float, default=1.0, help="时延场景的发送间隔（ms）")
+    parser.add_argument("--steps", type=int, default=2000, help="自动化场景的步数")
+    parser.add_argument("--lines", type=int, default=200000, help="日志场景的行数")
+    parser.add_argument("--history", type=int, default=50000, help="历史记录场景的条数")
+    parser.add_argument("--flush-ms", type=int, default=30, help="接收器合并刷新间隔（与界面默认值一致）")
+    parser.add_argument("--timeout", type=float, default=30, help="单个场景的最长等待时间（秒）")
+    parser.add_argument("--quick", action="store_true", help="使用小数据量快速运行")
+    parser.add_argument("--json", help="把结果保存为 JSON 文件")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.frames, args.paced, args.steps, args.lines, args.history = 20000, 200, 200, 20000, 5000
+    if not hasattr(os, "openpty") and "pty" in args.transports:
+        args.transports.remove("pty")
+    return args
+
+
+def main(argv=None):
+    # 接收器是 QThread，需要 Qt 应用对象；不需要事件循环
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    Bench(parse_args(argv)).run()
+    return app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""模拟设备：在 PTY、TCP 或 loop:// 上回显、灌包或按计划回复，用于性能测试
+
+帧格式为一行文本 ``T<发送时刻 perf_counter_ns> <序号> <填充>\\n``，接收端据此计算端到端时延。
+"""
+import os
+import socket
+import threading
+import time
+
+import serial
+
+
+def make_frame(seq, size):
+    """生成带发送时间戳的一帧（总长度约为 size，以换行结尾）"""
+    head = f"T{time.perf_counter_ns()} {seq} ".encode()
+    pad = max(0, size - len(head) - 1)
+    return head + b"x" * pad + b"\n"
+
+
+def parse_timestamp(line):
+    """从帧文本中取出发送时间戳（ns），格式不符时返回 None"""
+    if not line.startswith("T"):
+        return None
+    try:
+        return int(line[1:line.index(" ")])
+    except ValueError:
+        return None
+
+
+class SimulatedDevice:
+    """模拟设备，endpoint 为 "pty" / "socket" / "loop"
+
+    :param mode: "echo" 原样回显每一行；"respond" 每收到一行延时 delay 后回复 "OK <行>"；
+                 "flood" 启动后连续发送 count 帧；"schedule" 每隔 interval 秒发送一帧，共 count 帧
+    """
+
+    def __init__(self, endpoint="pty", mode="echo", count=0, size=64, interval=0.0, delay=0.0):
+        self.endpoint = endpoint
+        self.mode = mode
+        self.count = count
+        self.size = size
+        self.interval = interval
+        self.delay = delay
+        self.sent_frames = 0
+        self.sent_bytes = 0
+        self._running = True
+        self._ready = threading.Event()
+        # flood / schedule 等到 begin() 后才开始发送（pyserial 打开端口时会清空输入缓冲）
+        self._go = threading.Event()
+        self._fd = None
+        self._sock = None
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self.url = None
+
+    # ------------------------- 建立连接 -------------------------
+    def start(self):
+        """创建端点并启动设备线程，返回应用侧要打开的端口（设备路径或 URL）"""
+        if self.endpoint == "pty":
+            if not hasattr(os, "openpty"):
+                raise RuntimeError("当前平台不支持 PTY")
+            import tty
+            master, slave = os.openpty()
+            tty.setraw(slave)
+            self._fd = master
+            self._slave = slave
+            self.url = os.ttyname(slave)
+            self._ready.set()
+        elif self.endpoint == "socket":
+            self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._server.bind(("127.0.0.1", 0))
+            self._server.listen(1)
+            self.url = f"socket://127.0.0.1:{self._server.getsockname()[1]}"
+        elif self.endpoint == "loop":
+            # loop:// 没有对端，由调用方打开后通过 attach_loop() 交给设备写入
+            self.url = "loop://"
+        else:
+            raise ValueError(f"未知的端点: {self.endpoint}")
+        if self.endpoint != "loop":
+            self._thread = threading.Thread(target=self._run, name=f"SimDevice-{self.mode}", daemon=True)
+            self._thread.start()
+        return self.url
+
+    def attach_loop(self, ser):
+        """loop:// 端点：设备直接向应用已打开的串口对象写入（写入的数据会被应用读到）"""
+        self._loop = ser
+        self._ready.set()
+        self._thread = threading.Thread(target=self._run, name=f"SimDevice-{self.mode}", daemon=True)
+        self._thread.start()
+
+    def wait_ready(self, timeout=5):
+        return self._ready.wait(timeout)
+
+    def begin(self):
+        """开始主动发送（flood / schedule 模式）"""
+        self._go.set()
+
+    def stop(self):
+        self._running = False
+        self._go.set()
+        for closer in (lambda: self._sock and self._sock.close(), lambda: self._server and self._server.close()):
+            try:
+                closer()
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._fd is not None:
+            for fd in (self._fd, self._slave):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self._fd = None
+
+    # ------------------------- 读写 -------------------------
+    def _write(self, data):
+        if self._fd is not None:
+            view = memoryview(data)
+            while view:
+                n = os.write(self._fd, view)
+                view = view[n:]
+        elif self._sock is not None:
+            self._sock.sendall(data)
+        else:
+            self._loop.write(data)
+        self.sent_bytes += len(data)
+
+    def _read(self):
+        if self._fd is not None:
+            return os.read(self._fd, 65536)
+        return self._sock.recv(65536)
+
+    def _run(self):
+        try:
+            if self._server is not None:
+                self._sock, _ = self._server.accept()
+                self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._ready.set()
+            if self.mode in ("flood", "schedule"):
+                self._go.wait()
+            if self.mode == "flood":
+                self._flood()
+            elif self.mode == "schedule":
+                self._schedule()
+            else:
+                self._serve()
+        except OSError:
+            # 测试结束时关闭端点
+            pass
+
+    def _flood(self):
+        # 每次写入一批帧，减少系统调用次数；时间戳按批生成
+        batch = max(1, 4096 // max(1, self.size))
+        seq = 0
+        while self._running and seq < self.count:
+            n = min(batch, self.count - seq)
+            self._write(b"".join(make_frame(seq + i, self.size) for i in range(n)))
+            seq += n
+            self.sent_frames = seq
+
+    def _schedule(self):
+        next_at = time.perf_counter()
+        for seq in range(self.count):
+            if not self._running:
+                return
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._write(make_frame(seq, self.size))
+            self.sent_frames = seq + 1
+            next_at += self.interval
+
+    def _serve(self):
+        if self._loop is not None:
+            # loop:// 自身就是回显
+            return
+        buf = b""
+        while self._running:
+            data = self._read()
+            if not data:
+                return
+            buf += data
+            while b"\n" in buf:
+                line, buf = buf.split(b"\n", 1)
+                if self.mode == "respond":
+                    if self.delay:
+                        time.sleep(self.delay)
+                    self._write(b"OK " + line.strip() + b"\n")
+                else:
+                    self._write(line + b"\n")
+                self.sent_frames += 1
+
+
+def open_serial(url, timeout=0.1):
+    """以应用相同的方式打开端口（供不经过 SerialManager 的场景使用）"""
+    return serial.serial_for_url(url, baudrate=115200, timeout=timeout)
@@ -0,0 +1,265 @@
+import bisect
+import datetime
+import mmap
+import os
+import struct
+import time
+
+# 文件头: 魔数 + 开始时的墙上时间(秒) + 开始时的单调时钟(纳秒)
+FILE_MAGIC = b"STCAP01\n"
+FILE_HEADER = struct.Struct("<8sdQ")
+# 记录头: 单调时钟时间戳(纳秒) + 数据长度
+RECORD_HEADER = struct.Struct("<QI")
+
+
+class RawCaptureWriter:
+    """原始数据抓包：按接收到的数据块追加写入，每块带单调时钟时间戳"""
+
+    def __init__(self, capture_dir="logs", buffering=1024 * 1024):
+        self.capture_dir = capture_dir
+        os.makedirs(self.capture_dir, exist_ok=True)
+        self.capture_file = os.path.join(
+            self.capture_dir, f"capture_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.bin")
+        self._file = open(self.capture_file, "ab", buffering=buffering)
+        if self._file.tell() == 0:
+            self._file.write(FILE_HEADER.pack(FILE_MAGIC, time.time(), time.monotonic_ns()))
+        self.bytes_written = 0
+        self.records_written = 0
+
+    def write_chunk(self, data, ts_ns=None):
+        """追加一个数据块（只在接收线程中调用）"""
+        if self._file is None:
+            return
+        if ts_ns is None:
+            ts_ns = time.monotonic_ns()
+        self._file.write(RECORD_HEADER.pack(ts_ns, len(data)))
+        self._file.write(data)
+        self.bytes_written += len(data)
+        self.records_written += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def read_capture_header(f):
+    """读取文件头，返回 (开始墙上时间, 开始单调时钟纳秒)"""
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError("抓包文件不完整")
+    magic, wall_start, mono_start = FILE_HEADER.unpack(header)
+    if magic != FILE_MAGIC:
+        raise ValueError("不是有效的抓包文件")
+    return wall_start, mono_start
+
+
+def read_records(path):
+    """逐条读取抓包记录，返回 (墙上时间, 数据) 迭代器；末尾未写完的记录会被忽略"""
+    with open(path, "rb") as f:
+        wall_start, mono_start = read_capture_header(f)
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            ts_ns, length = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield wall_start + (ts_ns - mono_start) / 1e9, data
+
+
+def decode_text(path, encoding="utf-8"):
+    """文本解码器：把抓包数据按换行拆分，返回 (墙上时间, 文本行) 迭代器"""
+    buffer = bytearray()
+    ts = None
+    for ts, data in read_records(path):
+        buffer += data
+        start = 0
+        while True:
+            idx = buffer.find(b"\n", start)
+            if idx < 0:
+                break
+            yield ts, buffer[start:idx].decode(encoding, errors="replace").rstrip("\r")
+            start = idx + 1
+        if start:
+            del buffer[:start]
+    if buffer:
+        yield ts, buffer.decode(encoding, errors="replace")
+
+
+# 环形抓包文件：一页文件头 + 时间戳索引环 + 数据环，创建时按总大小预分配并内存映射
+RING_MAGIC = b"STRING01"
+# 魔数, 开始墙上时间, 开始单调时钟(纳秒), 数据区大小, 索引条数, 已写入总字节数, 已写入索引总数
+RING_HEADER = struct.Struct("<8sdQQQQQ")
+RING_HEADER_SIZE = 4096
+# 索引项: 单调时钟时间戳(纳秒) + 该时刻的数据流偏移（从开始抓包起累计的字节数）
+RING_INDEX = struct.Struct("<QQ")
+# 已写入总字节数和索引总数在文件头中的位置，每次写入后更新
+_RING_POS_OFFSET = struct.calcsize("<8sdQQQ")
+
+
+class RingCaptureWriter:
+    """高波特率无损抓包：数据块直接复制到预分配的内存映射环形文件，只在间隔 index_interval_ms 时记一条索引
+
+    不分帧、不解码，写满后覆盖最早的数据（保留最近 size_bytes 字节）。
+    接口与 RawCaptureWriter 相同，可直接作为接收器的 capture。
+    """
+
+    def __init__(self, capture_dir="logs", size_bytes=256 * 1024 * 1024, index_entries=65536, index_interval_ms=100):
+        self.capture_dir = capture_dir
+        os.makedirs(self.capture_dir, exist_ok=True)
+        self.size = max(4096, int(size_bytes))
+        self.index_entries = max(16, int(index_entries))
+        self.index_interval_ns = int(index_interval_ms * 1_000_000)
+        self._index_base = RING_HEADER_SIZE
+        self._data_base = RING_HEADER_SIZE + self.index_entries * RING_INDEX.size
+        self.bytes_written = 0
+        self.records_written = 0
+        self._index_count = 0
+        self._last_index_ns = None
+
+        self._file = self._create_file()
+        self._file.truncate(self._data_base + self.size)
+        self._mm = mmap.mmap(self._file.fileno(), self._data_base + self.size)
+        RING_HEADER.pack_into(self._mm, 0, RING_MAGIC, time.time(), time.monotonic_ns(), self.size,
+                              self.index_entries, 0, 0)
+
+    def _create_file(self):
+        """新建抓包文件；同一秒内重新打开端口时加序号，不覆盖刚写完的文件"""
+        base = os.path.join(self.capture_dir, f"capture_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        suffix = ""
+        n = 0
+        while True:
+            self.capture_file = f"{base}{suffix}.ring"
+            try:
+                return open(self.capture_file, "x+b")
+            except FileExistsError:
+                n += 1
+                suffix = f"_{n}"
+
+    def write_chunk(self, data, ts_ns=None):
+        """追加一个数据块（只在接收线程中调用）"""
+        mm = self._mm
+        if mm is None:
+            return
+        if ts_ns is None:
+            ts_ns = time.monotonic_ns()
+        n = len(data)
+        offset = self.bytes_written
+        view = memoryview(data)
+        if n > self.size:
+            # 单块超过环大小时只保留最后 size 字节
+            view = view[n - self.size:]
+            offset += n - self.size
+        if self._last_index_ns is None or ts_ns - self._last_index_ns >= self.index_interval_ns:
+            slot = self._index_base + (self._index_count % self.index_entries) * RING_INDEX.size
+            RING_INDEX.pack_into(mm, slot, ts_ns, offset)
+            self._index_count += 1
+            self._last_index_ns = ts_ns
+        pos = offset % self.size
+        first = min(len(view), self.size - pos)
+        start = self._data_base + pos
+        mm[start:start + first] = view[:first]
+        if first < len(view):
+            mm[self._data_base:self._data_base + len(view) - first] = view[first:]
+
+        self.bytes_written += n
+        self.records_written += 1
+        # 最后更新写入位置，读取方看到的总是完整的数据
+        struct.pack_into("<QQ", mm, _RING_POS_OFFSET, self.bytes_written, self._index_count)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def is_ring_capture(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(RING_MAGIC)) == RING_MAGIC
+    except OSError:
+        return False
+
+
+class RingCaptureReader:
+    """只读打开环形抓包文件（抓包进行中也可以打开），按偏移或时间读取任意片段"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.wall_start, self.mono_start, self.size, self.index_entries, _, _ = \
+                RING_HEADER.unpack_from(self._mm, 0)
+        except (ValueError, struct.error) as e:
+            self._file.close()
+            raise ValueError(f"不是有效的环形抓包文件: {e}")
+        if magic != RING_MAGIC:
+            self.close()
+            raise ValueError("不是有效的环形抓包文件")
+        self._index_base = RING_HEADER_SIZE
+        self._data_base = RING_HEADER_SIZE + self.index_entries * RING_INDEX.size
+
+    def _positions(self):
+        return struct.unpack_from("<QQ", self._mm, _RING_POS_OFFSET)
+
+    @property
+    def end_offset(self):
+        """数据流末尾偏移（已写入的总字节数）"""
+        return self._positions()[0]
+
+    @property
+    def start_offset(self):
+        """仍保存在环中的最早数据的偏移"""
+        return max(0, self.end_offset - self.size)
+
+    def read(self, offset, size):
+        """读取数据流中 [offset, offset + size) 的数据，超出保存范围的部分被截掉"""
+        end = min(self.end_offset, offset + size)
+        offset = max(offset, self.start_offset)
+        if end <= offset:
+            return b""
+        pos = offset % self.size
+        n = end - offset
+        first = min(n, self.size - pos)
+        start = self._data_base + pos
+        data = self._mm[start:start + first]
+        if first < n:
+            data += self._mm[self._data_base:self._data_base + n - first]
+        return data
+
+    def index(self):
+        """仍有效的索引，返回按时间排序的 [(墙上时间, 偏移), ...]"""
+        count = self._positions()[1]
+        start_offset = self.start_offset
+        entries = []
+        for i in range(max(0, count - self.index_entries), count):
+            slot = self._index_base + (i % self.index_entries) * RING_INDEX.size
+            ts_ns, offset = RING_INDEX.unpack_from(self._mm, slot)
+            if offset >= start_offset:
+                entries.append((self.wall_start + (ts_ns - self.mono_start) / 1e9, offset))
+        return entries
+
+    def offset_at(self, wall_time, index=None):
+        """不晚于 wall_time 的最近一条索引对应的偏移（早于保存范围时返回最早偏移）"""
+        index = self.index() if index is None else index
+        i = bisect.bisect_right([ts for ts, _ in index], wall_time)
+        return index[i - 1][1] if i else self.start_offset
+
+    def time_at(self, offset, index=None):
+        """偏移处数据的大致接收时间（取之前最近一条索引的时间），没有索引时返回 None"""
+        index = self.index() if index is None else index
+        i = bisect.bisect_right([off for _, off in index], offset)
+        return index[i - 1][0] if i else None
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
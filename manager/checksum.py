@@ -0,0 +1,49 @@
+"""常用校验算法（查表实现）"""
+
+
+def _crc16_table(poly, reflected):
+    table = []
+    for i in range(256):
+        if reflected:
+            crc = i
+            for _ in range(8):
+                crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        else:
+            crc = i << 8
+            for _ in range(8):
+                crc = ((crc << 1) ^ poly) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+# Modbus: 反射多项式 0xA001，初值 0xFFFF
+_MODBUS_TABLE = _crc16_table(0xA001, True)
+# CCITT/XMODEM: 多项式 0x1021，初值 0
+_CCITT_TABLE = _crc16_table(0x1021, False)
+
+
+def sum8(data):
+    """累加和（取低 8 位）"""
+    return sum(data) & 0xFF
+
+
+def xor8(data):
+    """异或校验"""
+    value = 0
+    for b in data:
+        value ^= b
+    return value
+
+
+def crc16_modbus(data, crc=0xFFFF):
+    table = _MODBUS_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def crc16_ccitt(data, crc=0):
+    table = _CCITT_TABLE
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ b) & 0xFF]
+    return crc
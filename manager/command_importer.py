@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+import re
+
+# HEX 指令只能包含十六进制字符和空白（奇数个字符时发送前补 0）
+HEX_RE = re.compile(r"[0-9A-Fa-f\s]+")
+# 文本文件中 HEX 指令的前缀
+HEX_PREFIX = "hex:"
+# CSV 表头中指令列的名称
+CSV_HEADERS = ("cmd", "command", "指令", "命令")
+# JSON 流式解析每次读取的字符数
+JSON_READ_SIZE = 64 * 1024
+_TRUE = ("1", "true", "yes", "y", "hex", "是")
+
+
+def normalize_command(entry):
+    """指令条目统一为 (指令, 是否 HEX, 是否追加回车)
+
+    兼容旧的纯字符串格式（文本指令、追加回车）和 {"cmd", "hex", "enter"} 字典。
+    """
+    if isinstance(entry, str):
+        return entry, False, True
+    if isinstance(entry, dict):
+        return str(entry.get("cmd", "")), bool(entry.get("hex", False)), bool(entry.get("enter", True))
+    cmd, hex_flag, enter_flag = (list(entry) + [False, True])[:3]
+    return str(cmd), bool(hex_flag), bool(enter_flag)
+
+
+def validate_command(cmd, hex_flag):
+    """检查指令，返回错误信息，合法时返回 None"""
+    if not cmd:
+        return "空指令"
+    if hex_flag and not HEX_RE.fullmatch(cmd):
+        return "HEX 格式错误"
+    return None
+
+
+def _flag(text, default):
+    text = str(text).strip().lower()
+    return default if not text else text in _TRUE
+
+
+def _read_text(f):
+    """每行一条指令，# 开头为注释，hex: 前缀表示 HEX 指令"""
+    for line_no, line in enumerate(f, 1):
+        cmd = line.strip()
+        if not cmd or cmd.startswith("#"):
+            continue
+        if cmd[:len(HEX_PREFIX)].lower() == HEX_PREFIX:
+            yield line_no, (cmd[len(HEX_PREFIX):].strip(), True, True)
+        else:
+            yield line_no, (cmd, False, True)
+
+
+def _read_csv(f):
+    """列: 指令[, 是否 HEX[, 是否追加回车]]，第一行可以是表头"""
+    for line_no, row in enumerate(csv.reader(f), 1):
+        if not row or not row[0].strip():
+            continue
+        if line_no == 1 and row[0].strip().lower() in CSV_HEADERS:
+            continue
+        cmd = row[0].strip()
+        hex_flag = _flag(row[1], False) if len(row) > 1 else False
+        enter_flag = _flag(row[2], True) if len(row) > 2 else True
+        yield line_no, (cmd, hex_flag, enter_flag)
+
+
+def _read_json(f):
+    """流式解析 JSON 数组（字符串或 {"cmd", "hex", "enter"} 对象），逐个元素解码，不整体读入
+
+    也接受设备配置格式 {"commands": [...]}（整体解析）。
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(JSON_READ_SIZE).lstrip()
+    if buf.startswith("{"):
+        data = json.loads(buf + f.read())
+        for index, entry in enumerate(data.get("commands", []), 1):
+            yield index, normalize_command(entry)
+        return
+    if not buf.startswith("["):
+        raise ValueError("JSON 文件应为指令数组")
+    pos = 1
+    index = 0
+    while True:
+        # 跳过空白和分隔符
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = f.read(JSON_READ_SIZE), 0
+            if not buf:
+                raise ValueError("JSON 数组不完整")
+        if buf[pos] == "]":
+            return
+        # 元素被缓冲区截断时读入更多内容再解码
+        while True:
+            try:
+                entry, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                more = f.read(JSON_READ_SIZE)
+                if not more:
+                    raise
+                buf = buf[pos:] + more
+                pos = 0
+        index += 1
+        yield index, normalize_command(entry)
+        pos = end
+        if pos > JSON_READ_SIZE:
+            buf = buf[pos:]
+            pos = 0
+
+
+def _read_json_lines(f):
+    """每行一个 JSON 元素"""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if line:
+            yield line_no, normalize_command(json.loads(line))
+
+
+READERS = {".csv": _read_csv, ".json": _read_json, ".jsonl": _read_json_lines}
+
+
+def import_commands(path, existing=(), batch_size=2000, stop=None):
+    """流式导入指令文件：校验 HEX、去重（与 existing 和文件内重复），每读取 batch_size 条产出一批
+
+    :param existing: 已有的 (指令, HEX, 追加回车) 条目，与它们重复的不再导入
+    :return: 迭代器，每批产出 (新指令列表, 重复条数, [(行号, 指令, 错误), ...], 已读取字节)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    seen = {(cmd, hex_flag) for cmd, hex_flag, _ in existing}
+    batch, errors = [], []
+    duplicates = 0
+    count = 0
+    with open(path, "r", encoding="utf-8-sig", newline="" if ext == ".csv" else None) as f:
+        for number, (cmd, hex_flag, enter_flag) in READERS.get(ext, _read_text)(f):
+            if stop and stop():
+                return
+            count += 1
+            if hex_flag:
+                cmd = " ".join(cmd.split()).upper()
+            error = validate_command(cmd, hex_flag)
+            key = (cmd, hex_flag)
+            if error:
+                errors.append((number, cmd, error))
+            elif key in seen:
+                duplicates += 1
+            else:
+                seen.add(key)
+                batch.append((cmd, hex_flag, enter_flag))
+            if count % batch_size == 0:
+                # 进度按底层文件的读取位置估算
+                yield batch, duplicates, errors, f.buffer.tell()
+                batch, errors, duplicates = [], [], 0
+        yield batch, duplicates, errors, f.buffer.tell()
@@ -1,23 +1,124 @@
 import json
 import os
+import queue
+import sqlite3
+import threading
+
+from manager.command_importer import normalize_command
+from manager.framer import DEFAULT_FRAMER_CONFIG
+
+# 后台同步线程的关闭指令
+_CLOSE = object()
+# devices 表中与设备配置字典同名的列
+_DEVICE_COLUMNS = ("serial_port", "baud_rate", "parity", "stop_bits", "bytesize")
 
 
 class DeviceManager:
-    def __init__(self, filename="devices.json"):
-        self.filename = filename
+    """设备配置：设备参数常驻内存，指令列表在切换到设备时才从数据库读取
+
+    修改只更新内存并放入队列，由后台线程批量写入 SQLite（每批一个事务），
+    保存指令列表时只写入与上次相比发生变化的部分。
+    """
+
+    def __init__(self, db_file="devices.db", json_file="devices.json"):
+        """
+        :param json_file: 旧版配置文件，数据库为空时导入一次，导入后重命名为 .bak
+        """
+        self.db_file = db_file
+        self.json_file = json_file
+        # 名称 -> 设备参数（不含指令列表），按添加顺序排列
         self.devices = {}
-        self.device_names = []
+        # 名称 -> [(指令, HEX, 追加回车), ...]，只包含本次运行中用到的设备
+        self._commands = {}
+        self.current_name = None
         self.current_device = None
+        # 后台写入失败时调用 on_error(错误信息)（在同步线程中调用，界面需转到自己的线程处理）
+        self.on_error = None
+        self.error = None
+        # 写入失败的批次涉及的设备，界面线程下次访问时丢弃缓存并重新写入
+        self._stale = set()
+        self._stale_lock = threading.Lock()
+
+        # 界面线程的只读连接，用于按需读取指令列表
+        self._conn = self._connect()
+        self.creat_table(self._conn)
         self.load_devices()
 
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._sync_loop, name="DeviceSync", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def creat_table(self, conn):
+        """建表，并按 PRAGMA user_version 逐步迁移"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_v1(conn)
+
+    def _migrate_v1(self, conn):
+        """devices / commands 两张表；存在旧版 devices.json 时把其中的设备和指令导入
+
+        导入失败时保留 JSON 文件、不更新 user_version，下次启动重新导入。
+        """
+        with conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS devices
+                            (
+                                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                                name        TEXT    NOT NULL UNIQUE,
+                                serial_port TEXT    NOT NULL DEFAULT '',
+                                baud_rate   INTEGER NOT NULL DEFAULT 115200,
+                                parity      TEXT    NOT NULL DEFAULT 'N',
+                                stop_bits   REAL    NOT NULL DEFAULT 1,
+                                bytesize    INTEGER NOT NULL DEFAULT 8,
+                                framer      TEXT
+                            )""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS commands
+                            (
+                                device_id         INTEGER NOT NULL,
+                                pos               INTEGER NOT NULL,
+                                cmd               TEXT    NOT NULL,
+                                hex_flag          INTEGER NOT NULL DEFAULT 0,
+                                append_enter_flag INTEGER NOT NULL DEFAULT 1,
+                                PRIMARY KEY (device_id, pos)
+                            ) WITHOUT ROWID""")
+        devices = {}
+        try:
+            if os.path.exists(self.json_file):
+                with open(self.json_file, "r", encoding="utf-8") as f:
+                    devices = json.load(f)
+            with conn:
+                for name, device in devices.items():
+                    self._db_upsert_device(conn, name, device)
+                    self._db_write_commands(conn, name, 0,
+                                            [normalize_command(entry) for entry in device.get("commands", [])])
+                conn.execute("PRAGMA user_version = 1")
+        except Exception as e:
+            print("导入旧设备配置失败:", e)
+            return
+        if devices:
+            try:
+                os.replace(self.json_file, self.json_file + ".bak")
+            except OSError as e:
+                print("重命名旧设备配置失败:", e)
+
     def load_devices(self):
-        """加载设备配置"""
-        if os.path.exists(self.filename):
+        """加载设备参数（指令列表按需读取）"""
+        self.devices = {}
+        rows = self._conn.execute(
+            f"SELECT name, {', '.join(_DEVICE_COLUMNS)}, framer FROM devices ORDER BY id").fetchall()
+        for name, *values, framer in rows:
+            device = dict(zip(_DEVICE_COLUMNS, values))
             try:
-                with open(self.filename, "r", encoding="utf-8") as f:
-                    self.devices = json.load(f)
-            except Exception as e:
-                print("加载设备配置失败:", e)
+                device["framer"] = json.loads(framer) if framer else dict(DEFAULT_FRAMER_CONFIG)
+            except ValueError:
+                device["framer"] = dict(DEFAULT_FRAMER_CONFIG)
+            self.devices[name] = device
 
     def add_device(self, name, serial_port="", baud_rate=115200, parity="N", stop_bits=1, bytesize=8):
         """添加新设备"""
@@ -27,40 +128,193 @@ class DeviceManager:
             "parity": parity,
             "stop_bits": stop_bits,
             "bytesize": bytesize,
-            "commands": []
+            "framer": dict(DEFAULT_FRAMER_CONFIG),
         }
+        self._commands[name] = []
+        self.current_name = name
         self.current_device = self.devices[name]
-        self.save_devices()
+        self._queue.put(("device", name, dict(self.devices[name])))
+        self._queue.put(("commands", name, 0, []))
 
     def save_devices(self):
-        """保存所有设备配置"""
-        try:
-            with open(self.filename, "w", encoding="utf-8") as f:
-                json.dump(self.devices, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print("保存设备配置失败:", e)
+        """保存所有设备参数（修改会自动保存，一般无需调用）"""
+        for name, device in self.devices.items():
+            self._queue.put(("device", name, dict(device)))
 
     def delete_device(self, name):
         """删除设备"""
         if name in self.devices:
             del self.devices[name]
-            self.save_devices()
+            self._commands.pop(name, None)
+            self._queue.put(("delete", name))
+            self.current_name = None
             self.current_device = None
 
     def set_current_device(self, name):
-        """切换当前设备"""
+        """切换当前设备，首次切换到该设备时读取它的指令列表"""
         if name in self.devices:
+            self.current_name = name
             self.current_device = self.devices[name]
+            self._load_commands(name)
 
-    def save_device_commands(self, cmd_list_widget):
-        """保存命令列表到当前设备"""
+    def _repair_stale(self):
+        """写入失败后：丢弃相关设备的指令缓存（下次保存时与数据库比较，写入全部差异），重新写入设备参数"""
+        if not self._stale:
+            return
+        with self._stale_lock:
+            names, self._stale = self._stale, set()
+        # 先等已排队的改动写完，随后读到的数据库内容才是比较的基准
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait(5)
+        for name in names:
+            self._commands.pop(name, None)
+            device = self.devices.get(name)
+            self._queue.put(("device", name, dict(device)) if device is not None else ("delete", name))
+
+    def _load_commands(self, name):
+        self._repair_stale()
+        commands = self._commands.get(name)
+        if commands is None:
+            # 还没有用过的设备不会有待写入的指令改动，直接读数据库即可
+            rows = self._conn.execute("""SELECT c.cmd, c.hex_flag, c.append_enter_flag
+                                         FROM commands c
+                                                  JOIN devices d ON d.id = c.device_id
+                                         WHERE d.name = ?
+                                         ORDER BY c.pos""", (name,)).fetchall()
+            commands = self._commands[name] = [(cmd, bool(h), bool(e)) for cmd, h, e in rows]
+        return commands
+
+    def get_commands(self, name=None):
+        """获取设备的指令列表 [(指令, HEX, 追加回车), ...]"""
+        name = name or self.current_name
+        if name not in self.devices:
+            return []
+        return list(self._load_commands(name))
+
+    def save_device_commands(self, commands):
+        """保存命令列表 [(指令, HEX, 追加回车), ...] 到当前设备
+
+        只写入与上次保存相比发生变化的部分：从第一个不同的位置开始重写到末尾，
+        因此追加导入只需插入新增的指令。
+        """
         if self.current_device is None:
             return False
-        cmds = [cmd_list_widget.item(i).text() for i in range(cmd_list_widget.count())]
-        self.current_device["commands"] = cmds
-        self.save_devices()
+        name = self.current_name
+        old = self._load_commands(name)
+        new = [normalize_command(command) for command in commands]
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        if start == len(old) == len(new):
+            return True
+        self._commands[name] = new
+        self._queue.put(("commands", name, start, new[start:]))
+        return True
+
+    def get_framer_config(self, name=None):
+        """获取设备的分帧配置，未设置时按换行分帧"""
+        device = self.devices.get(name) if name else self.current_device
+        if device and device.get("framer"):
+            return dict(device["framer"])
+        return dict(DEFAULT_FRAMER_CONFIG)
+
+    def set_framer_config(self, config, name=None):
+        """保存设备的分帧配置"""
+        name = name or self.current_name
+        device = self.devices.get(name)
+        if device is None:
+            return False
+        device["framer"] = dict(config)
+        self._queue.put(("device", name, dict(device)))
         return True
 
+    def get_serial_params(self, name=None):
+        """获取设备的串口参数（用于 SerialManager.open），未设置的项使用默认值"""
+        device = (self.devices.get(name) if name else self.current_device) or {}
+        return {
+            "baud_rate": int(device.get("baud_rate", 115200)),
+            "bytesize": int(device.get("bytesize", 8)),
+            "parity": device.get("parity", "N"),
+            "stop_bits": float(device.get("stop_bits", 1)),
+        }
+
     def list_device_names(self):
         """列出所有设备名称"""
-        return list(self.devices.keys())
\ No newline at end of file
+        return list(self.devices.keys())
+
+    def close(self):
+        """等待后台同步完成"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_CLOSE,))
+        self._thread.join()
+        self._conn.close()
+
+    def _sync_loop(self):
+        """后台同步线程：批量取出改动，在一个事务中写入数据库"""
+        conn = self._connect()
+        try:
+            while True:
+                ops = [self._queue.get()]
+                while True:
+                    try:
+                        ops.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = False
+                flushed = []
+                try:
+                    with conn:
+                        for op in ops:
+                            if op[0] is _CLOSE:
+                                closing = True
+                            elif op[0] == "flush":
+                                flushed.append(op[1])
+                            elif op[0] == "device":
+                                self._db_upsert_device(conn, *op[1:])
+                            elif op[0] == "commands":
+                                self._db_write_commands(conn, *op[1:])
+                            elif op[0] == "delete":
+                                conn.execute("DELETE FROM commands WHERE device_id = "
+                                             "(SELECT id FROM devices WHERE name = ?)", (op[1],))
+                                conn.execute("DELETE FROM devices WHERE name = ?", (op[1],))
+                except Exception as e:
+                    print("保存设备配置失败:", e)
+                    self.error = e
+                    with self._stale_lock:
+                        self._stale.update(op[1] for op in ops if op[0] in ("device", "commands", "delete"))
+                    if self.on_error:
+                        self.on_error(f"保存设备配置失败: {e}")
+                for event in flushed:
+                    event.set()
+                if closing:
+                    return
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _db_upsert_device(conn, name, device):
+        values = [device.get(column) for column in _DEVICE_COLUMNS]
+        values = [v if v is not None else d for v, d in zip(values, ("", 115200, "N", 1, 8))]
+        conn.execute(f"""INSERT INTO devices (name, {', '.join(_DEVICE_COLUMNS)}, framer)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)
+                         ON CONFLICT (name) DO UPDATE SET
+                             {', '.join(f'{c}=excluded.{c}' for c in _DEVICE_COLUMNS)},
+                             framer=excluded.framer""",
+                     (name, *values, json.dumps(device.get("framer") or DEFAULT_FRAMER_CONFIG)))
+
+    @staticmethod
+    def _db_write_commands(conn, name, start, commands):
+        """删除 start 及之后的指令，再写入 commands（从 start 开始编号）"""
+        row = conn.execute("SELECT id FROM devices WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        device_id = row[0]
+        conn.execute("DELETE FROM commands WHERE device_id = ? AND pos >= ?", (device_id, start))
+        conn.executemany(
+            "INSERT INTO commands (device_id, pos, cmd, hex_flag, append_enter_flag) VALUES (?, ?, ?, ?, ?)",
+            ((device_id, start + i, cmd, int(hex_flag), int(enter_flag))
+             for i, (cmd, hex_flag, enter_flag) in enumerate(commands)))
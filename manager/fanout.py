@@ -0,0 +1,101 @@
+import collections
+import threading
+
+
+class Subscription:
+    """一个消费者的接收队列：接收线程 put()，消费者线程 get()
+
+    队列是 collections.deque，append/popleft 本身是原子的，读写双方都不加锁；
+    Event 只用来唤醒正在等待的消费者。队列满时丢弃最早的数据并计入 dropped。
+    """
+
+    def __init__(self, frames=False, max_items=100000):
+        # True 时接收分好的帧，否则接收读到的原始数据块
+        self.frames = frames
+        self.max_items = max_items
+        self.dropped = 0
+        self.closed = False
+        self._items = collections.deque(maxlen=max_items)
+        self._event = threading.Event()
+
+    def put(self, items):
+        overflow = len(self._items) + len(items) - self.max_items
+        if overflow > 0:
+            self.dropped += overflow
+        self._items.extend(items)
+        self._event.set()
+
+    def get(self, timeout=0):
+        """取出当前全部数据；队列为空时最多等待 timeout 秒，超时或被唤醒时可能返回空列表"""
+        if not self._items and timeout and not self.closed:
+            self._event.wait(timeout)
+        # 先清除再取，取数据期间到达的数据会重新置位，不会丢失唤醒
+        self._event.clear()
+        items = []
+        pop = self._items.popleft
+        try:
+            while True:
+                items.append(pop())
+        except IndexError:
+            pass
+        return items
+
+    def clear(self):
+        self._items.clear()
+
+    def wake(self):
+        """唤醒等待中的 get()（例如停止消费者时）"""
+        self._event.set()
+
+    def close(self):
+        self.closed = True
+        self._event.set()
+
+
+class FanOut:
+    """把同一个端口的读取结果分发给多个订阅者，使端口只有一个读取者
+
+    订阅者列表用元组保存，订阅/取消订阅时整体替换，发布时不加锁。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw = ()
+        self._frames = ()
+
+    @property
+    def active(self):
+        """是否有订阅者"""
+        return bool(self._raw or self._frames)
+
+    def subscribe(self, frames=False, max_items=100000):
+        sub = Subscription(frames, max_items)
+        with self._lock:
+            if frames:
+                self._frames += (sub,)
+            else:
+                self._raw += (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._raw = tuple(s for s in self._raw if s is not sub)
+            self._frames = tuple(s for s in self._frames if s is not sub)
+        sub.close()
+
+    def publish_raw(self, data):
+        for sub in self._raw:
+            sub.put((data,))
+
+    def publish_frames(self, frames):
+        for sub in self._frames:
+            sub.put(frames)
+
+    def close(self):
+        """端口关闭：通知所有订阅者不会再有数据"""
+        with self._lock:
+            subs = self._raw + self._frames
+            self._raw = ()
+            self._frames = ()
+        for sub in subs:
+            sub.close()
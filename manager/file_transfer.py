@@ -0,0 +1,292 @@
+import mmap
+import os
+import time
+
+from manager.checksum import crc16_ccitt, sum8
+
+# XMODEM / YMODEM 控制字符
+SOH = 0x01  # 128 字节数据块
+STX = 0x02  # 1024 字节数据块
+EOT = 0x04
+ACK = 0x06
+NAK = 0x15
+CAN = 0x18
+SUB = 0x1A  # XMODEM 末块填充
+CRC_MODE = ord("C")
+STREAM_MODE = ord("G")  # YMODEM-G：接收方不逐块应答，发送方连续发送
+
+# 传输方式 -> 显示名称
+PROTOCOLS = {
+    "raw": "原始数据",
+    "xmodem": "XMODEM-1K",
+    "ymodem": "YMODEM",
+}
+
+
+class TransferError(Exception):
+    pass
+
+
+def line_rate(params):
+    """按串口参数计算理论线速（字节/秒）：每字节 1 起始位 + 数据位 + 校验位 + 停止位"""
+    if not params:
+        return None
+    bits = 1 + params["bytesize"] + (params["parity"] != "N") + params["stop_bits"]
+    return params["baud_rate"] / bits
+
+
+class FileSender:
+    """向串口发送文件：原始数据流，或 XMODEM-1K / YMODEM（接收方请求 'G' 时按 YMODEM-G 连续发送）
+
+    文件用 mmap 映射后按内存视图切片发送，不整体读入内存；经过端口的发送队列时大块数据不复制。
+    XMODEM/YMODEM 按协议逐块等待应答（NAK 或超时重发），应答从 source 读取。
+    :param source: 接收器的原始数据订阅（Subscription）；为 None 时直接读串口（端口没有其他读取者时）
+    :param progress: 回调 progress(已确认字节, 总字节)
+    :param log: 日志回调 log(msg, level)
+    """
+
+    def __init__(self, serial_mgr, path, protocol="raw", source=None, progress=None, log=None,
+                 chunk_size=64 * 1024, timeout=10.0, start_timeout=60.0, retries=10):
+        self.serial = serial_mgr
+        self.path = path
+        self.protocol = protocol
+        self.source = source
+        self.progress = progress
+        self.log = log or (lambda msg, level="info": None)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+        self.retries = retries
+        self.total = 0
+        self.done = 0
+        self.error = None
+        self._running = True
+        # 已收到、尚未处理的应答字节
+        self._rx = bytearray()
+        self._crc = True
+
+    def stop(self):
+        self._running = False
+        if self.source is not None:
+            self.source.wake()
+
+    @property
+    def running(self):
+        return self._running
+
+    def run(self):
+        """发送整个文件，返回是否成功（失败原因在 error 中）"""
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self.total = size
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+                view = memoryview(mm) if mm is not None else memoryview(b"")
+                try:
+                    if self.protocol == "raw":
+                        self._send_raw(view)
+                    elif self.protocol == "xmodem":
+                        self._send_xmodem(view)
+                    elif self.protocol == "ymodem":
+                        self._send_ymodem(view, size, os.fstat(f.fileno()).st_mtime)
+                    else:
+                        raise TransferError(f"不支持的传输方式: {self.protocol}")
+                except (TransferError, OSError) as e:
+                    # 在这里处理异常，关闭映射前不再有异常回溯引用着切片
+                    self.error = str(e)
+                    if isinstance(e, TransferError) and self.protocol != "raw" and self.serial.ser:
+                        # 通知接收方放弃
+                        self._write(bytes([CAN] * 8), check=False)
+                finally:
+                    view.release()
+                    if mm is not None:
+                        # 取消或失败时发送队列中可能还有映射的切片，丢弃后才能关闭
+                        writer = self.serial.writer
+                        if writer is not None:
+                            writer.discard(mm)
+                        mm.close()
+            return self.error is None
+        except OSError as e:
+            self.error = str(e)
+            return False
+
+    # ------------------------- 原始数据 -------------------------
+    def _send_raw(self, view):
+        writer = self.serial.writer
+        chunk = self.chunk_size
+        total = len(view)
+        for off in range(0, total, chunk):
+            if not self._running:
+                raise TransferError("已取消")
+            self._write(view[off:off + chunk])
+            self._report(off + min(chunk, total - off) - (writer.depth if writer else 0))
+        # 等待发送队列写完，进度按实际写入计算
+        while writer is not None and writer.depth:
+            if not self._running:
+                raise TransferError("已取消")
+            if writer.closed:
+                raise TransferError("发送失败，串口已关闭")
+            writer.flush(0.1)
+            self._report(total - writer.depth)
+        self._report(total)
+
+    # ------------------------- XMODEM / YMODEM -------------------------
+    def _send_xmodem(self, view):
+        mode = self._wait_start()
+        if mode == NAK:
+            # 接收方只支持累加和校验，退回 128 字节块
+            self._crc = False
+            self.log("接收方使用累加和校验，按 128 字节块发送")
+        self._send_blocks(view, stream=False)
+        self._send_eot()
+
+    def _send_ymodem(self, view, size, mtime):
+        mode = self._wait_start()
+        stream = mode == STREAM_MODE
+        if stream:
+            self.log("接收方请求 YMODEM-G，连续发送不等待逐块应答")
+        name = os.path.basename(self.path).encode("utf-8")
+        header = name + b"\0" + f"{size} {int(mtime):o} 0".encode() + b"\0"
+        if len(header) > 1024:
+            raise TransferError("文件名过长")
+        self._send_header(self._block(0, header, 128 if len(header) <= 128 else 1024, pad=0))
+        self._send_blocks(view, stream)
+        self._send_eot()
+        # 批量传输结束：空文件名的 0 号块（YMODEM-G 接收方不一定应答）
+        self._wait_start()
+        end_block = self._block(0, b"", 128, pad=0)
+        if stream:
+            self._write(end_block)
+        else:
+            self._send_block(end_block, 0)
+
+    def _send_header(self, block):
+        """发送文件头并等待接收方再次请求 'C'/'G' 开始数据阶段（有的 YMODEM-G 接收方不应答文件头）"""
+        for _ in range(self.retries):
+            self._write(block)
+            reply = self._wait_control((ACK, NAK, CRC_MODE, STREAM_MODE), self.timeout)
+            if reply == ACK:
+                self._wait_start()
+                return
+            if reply in (CRC_MODE, STREAM_MODE):
+                self._rx.clear()
+                return
+        raise TransferError(f"文件头重试 {self.retries} 次仍未确认")
+
+    def _wait_start(self):
+        """等待接收方的 'C'（CRC）、'G'（YMODEM-G）或 NAK（累加和）"""
+        mode = self._wait_control((CRC_MODE, STREAM_MODE, NAK), self.start_timeout)
+        if mode is None:
+            raise TransferError("等待接收方超时")
+        # 接收方可能在等待期间重复发出了多个请求
+        self._rx.clear()
+        self._read(0)
+        return mode
+
+    def _send_blocks(self, view, stream):
+        total = len(view)
+        block_size = 1024 if self._crc else 128
+        seq = 1
+        for off in range(0, total, block_size):
+            data = view[off:off + block_size]
+            # 末块不超过 128 字节时用短块，减少填充
+            size = 128 if len(data) <= 128 else block_size
+            block = self._block(seq & 0xFF, data, size, pad=SUB)
+            if stream:
+                self._write(block)
+                # 连续发送时只检查接收方是否取消
+                rx = self._rx
+                rx += self._read(0)
+                if CAN in rx:
+                    self._check_cancel()
+                del rx[:-1]
+            else:
+                self._send_block(block, seq)
+            self._report(min(off + block_size, total))
+            seq += 1
+        self._report(total)
+
+    def _block(self, seq, data, size, pad):
+        payload = bytes(data)
+        if len(payload) < size:
+            payload += bytes([pad]) * (size - len(payload))
+        if self._crc:
+            crc = crc16_ccitt(payload)
+            trailer = bytes((crc >> 8, crc & 0xFF))
+        else:
+            trailer = bytes((sum8(payload),))
+        return bytes((SOH if size == 128 else STX, seq, 0xFF - seq)) + payload + trailer
+
+    def _send_block(self, block, seq):
+        for _ in range(self.retries):
+            self._write(block)
+            reply = self._wait_control((ACK, NAK), self.timeout)
+            if reply == ACK:
+                return
+        raise TransferError(f"第 {seq} 块重试 {self.retries} 次仍未确认")
+
+    def _send_eot(self):
+        for _ in range(self.retries):
+            self._write(bytes((EOT,)))
+            # YMODEM 接收方通常先 NAK 第一个 EOT
+            if self._wait_control((ACK, NAK), self.timeout) == ACK:
+                return
+        raise TransferError("结束标志未被确认")
+
+    def _wait_control(self, expected, timeout):
+        """等待 expected 中的任一控制字符并返回，超时返回 None；其他字节忽略，连续两个 CAN 表示接收方取消"""
+        deadline = time.monotonic() + timeout
+        rx = self._rx
+        while self._running:
+            for i, b in enumerate(rx):
+                if b in expected:
+                    del rx[:i + 1]
+                    return b
+                if b == CAN:
+                    self._check_cancel()
+            # 保留最后一个字节，以便识别跨两次读取的 CAN CAN
+            del rx[:-1]
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            rx += self._read(remaining)
+        raise TransferError("已取消")
+
+    def _check_cancel(self):
+        if bytes((CAN, CAN)) in self._rx:
+            raise TransferError("接收方取消了传输")
+
+    # ------------------------- 读写 -------------------------
+    def _write(self, data, check=True):
+        """写入数据：有发送队列时入队（队列满时等待），否则直接写串口"""
+        writer = self.serial.writer
+        if writer is None:
+            if not self.serial.send_bytes(data) and check:
+                raise TransferError("发送失败，串口未打开")
+            return
+        while not writer.submit(data, block=True, timeout=0.2):
+            if not check:
+                return
+            if not self._running:
+                raise TransferError("已取消")
+            if writer.closed:
+                raise TransferError("发送失败，串口已关闭")
+
+    def _read(self, timeout):
+        """读取新到的数据，没有数据时最多等待 timeout 秒后返回 b\"\""""
+        if self.source is not None:
+            if self.source.closed:
+                raise TransferError("串口已关闭")
+            return b"".join(self.source.get(timeout))
+        if self.serial.bytes_waiting():
+            return self.serial.read_chunk() or b""
+        if timeout > 0:
+            time.sleep(min(timeout, 0.001))
+        return b""
+
+    def _report(self, done):
+        if not self._running:
+            raise TransferError("已取消")
+        self.done = max(0, done)
+        if self.progress:
+            self.progress(self.done, self.total)
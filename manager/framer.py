@@ -0,0 +1,332 @@
+import time
+
+# 分帧方式 -> 显示名称
+FRAMER_TYPES = {
+    "delimiter": "分隔符",
+    "fixed": "固定长度",
+    "length_prefix": "长度前缀",
+    "slip": "SLIP",
+    "cobs": "COBS",
+    "timeout": "字节间超时",
+}
+
+DEFAULT_FRAMER_CONFIG = {"type": "delimiter", "delimiter": "0A"}
+
+
+class Framer:
+    """增量分帧器基类：feed() 输入新收到的数据，返回切出的完整帧列表
+
+    数据追加到同一个 bytearray 中，只记录已消费位置，积累到一定量再整体前移，
+    避免每切一帧都复制剩余数据。
+    """
+    # 帧内容是否按文本显示（否则按 HEX 显示）
+    text = False
+
+    def __init__(self, max_frame=65536):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._pos = 0
+
+    def feed(self, data, now=None):
+        self._buf += data
+        frames = self._extract()
+        self._compact()
+        return frames
+
+    def poll(self, now=None):
+        """没有新数据时调用，返回因超时而结束的帧"""
+        return []
+
+    def next_deadline(self):
+        """下一次需要调用 poll() 的单调时钟时间，不需要时返回 None"""
+        return None
+
+    def reset(self):
+        self._buf.clear()
+        self._pos = 0
+
+    def pending(self):
+        """尚未组成完整帧的字节数"""
+        return len(self._buf) - self._pos
+
+    def take_pending(self):
+        """取出尚未组成完整帧的字节并清空缓冲区（切换分帧方式时交给新的分帧器）"""
+        data = bytes(self._buf[self._pos:])
+        self.reset()
+        return data
+
+    def _extract(self):
+        raise NotImplementedError
+
+    def _compact(self):
+        pos = self._pos
+        if not pos:
+            return
+        if pos >= len(self._buf):
+            self._buf.clear()
+            self._pos = 0
+        elif pos >= 4096 and pos * 2 >= len(self._buf):
+            del self._buf[:pos]
+            self._pos = 0
+
+
+class DelimiterFramer(Framer):
+    """按分隔符分帧（默认换行），帧内容不含分隔符
+
+    没有分隔符结尾的数据（如 "login:"、"> " 提示符）在 idle_ms 内没有新数据时作为一帧输出，
+    与按行读取时的读超时效果一致；idle_ms 为 0 时一直等到分隔符。
+    """
+    text = True
+
+    def __init__(self, delimiter=b"\n", max_frame=65536, idle_ms=100):
+        super().__init__(max_frame)
+        self.delimiter = bytes(delimiter) or b"\n"
+        self.idle = max(0, idle_ms) / 1000
+        # 已搜索过、确定不含分隔符的位置
+        self._scan = 0
+        self._last = 0.0
+
+    def feed(self, data, now=None):
+        self._last = time.monotonic() if now is None else now
+        return super().feed(data, now)
+
+    def poll(self, now=None):
+        if not self.idle or self._pos >= len(self._buf):
+            return []
+        if now is None:
+            now = time.monotonic()
+        if now - self._last < self.idle:
+            return []
+        frame = bytes(self._buf[self._pos:])
+        self._pos = len(self._buf)
+        self._compact()
+        return [frame]
+
+    def next_deadline(self):
+        if not self.idle or self._pos >= len(self._buf):
+            return None
+        return self._last + self.idle
+
+    def _extract(self):
+        buf = self._buf
+        delim = self.delimiter
+        frames = []
+        start = self._pos
+        search = max(start, self._scan - len(delim) + 1)
+        while True:
+            idx = buf.find(delim, search)
+            if idx < 0:
+                break
+            frames.append(bytes(buf[start:idx]))
+            start = search = idx + len(delim)
+        # 超长仍未出现分隔符时强制切帧，避免缓冲区无限增长
+        if len(buf) - start >= self.max_frame:
+            frames.append(bytes(buf[start:]))
+            start = len(buf)
+        self._pos = start
+        self._scan = len(buf)
+        return frames
+
+    def _compact(self):
+        pos = self._pos
+        super()._compact()
+        if self._pos != pos:
+            self._scan = max(0, self._scan - pos)
+
+    def reset(self):
+        super().reset()
+        self._scan = 0
+
+
+class FixedLengthFramer(Framer):
+    """固定长度分帧"""
+
+    def __init__(self, length=8, max_frame=65536):
+        super().__init__(max_frame)
+        self.length = max(1, length)
+
+    def _extract(self):
+        buf = self._buf
+        size = self.length
+        frames = []
+        pos = self._pos
+        while len(buf) - pos >= size:
+            frames.append(bytes(buf[pos:pos + size]))
+            pos += size
+        self._pos = pos
+        return frames
+
+
+class LengthPrefixFramer(Framer):
+    """帧头中带长度字段的分帧
+
+    :param header_size: 帧头长度
+    :param length_offset: 长度字段在帧头中的偏移
+    :param length_size: 长度字段字节数
+    :param byteorder: 长度字段字节序 "big"/"little"
+    :param length_adjust: 帧总长度 = 帧头长度 + 长度字段值 + length_adjust（如长度不含校验和时加上校验和长度）
+    """
+
+    def __init__(self, header_size=2, length_offset=0, length_size=2, byteorder="big", length_adjust=0,
+                 max_frame=65536):
+        super().__init__(max_frame)
+        self.header_size = max(header_size, length_offset + length_size)
+        self.length_offset = length_offset
+        self.length_size = length_size
+        self.byteorder = byteorder
+        self.length_adjust = length_adjust
+
+    def _extract(self):
+        buf = self._buf
+        frames = []
+        pos = self._pos
+        header_size = self.header_size
+        while len(buf) - pos >= header_size:
+            field = buf[pos + self.length_offset:pos + self.length_offset + self.length_size]
+            total = header_size + int.from_bytes(field, self.byteorder) + self.length_adjust
+            if total < header_size or total > self.max_frame:
+                # 长度非法，丢弃一个字节重新同步
+                pos += 1
+                continue
+            if len(buf) - pos < total:
+                break
+            frames.append(bytes(buf[pos:pos + total]))
+            pos += total
+        self._pos = pos
+        return frames
+
+
+class SlipFramer(Framer):
+    """SLIP (RFC 1055) 分帧"""
+
+    def _extract(self):
+        buf = self._buf
+        frames = []
+        start = self._pos
+        while True:
+            idx = buf.find(b"\xc0", start)
+            if idx < 0:
+                break
+            if idx > start:
+                frames.append(bytes(buf[start:idx]).replace(b"\xdb\xdc", b"\xc0").replace(b"\xdb\xdd", b"\xdb"))
+            start = idx + 1
+        if len(buf) - start >= self.max_frame:
+            start = len(buf)
+        self._pos = start
+        return frames
+
+
+class CobsFramer(Framer):
+    """COBS 分帧（以 0x00 结尾）"""
+
+    def _extract(self):
+        buf = self._buf
+        frames = []
+        start = self._pos
+        while True:
+            idx = buf.find(b"\x00", start)
+            if idx < 0:
+                break
+            if idx > start:
+                frame = self.decode(memoryview(buf)[start:idx])
+                if frame is not None:
+                    frames.append(frame)
+            start = idx + 1
+        if len(buf) - start >= self.max_frame:
+            start = len(buf)
+        self._pos = start
+        return frames
+
+    @staticmethod
+    def decode(data):
+        """解码一帧 COBS 数据，格式错误时返回 None"""
+        out = bytearray()
+        i = 0
+        n = len(data)
+        while i < n:
+            code = data[i]
+            if code == 0 or i + code > n:
+                return None
+            out += data[i + 1:i + code]
+            i += code
+            if code < 0xFF and i < n:
+                out.append(0)
+        return bytes(out)
+
+
+class TimeoutFramer(Framer):
+    """字节间超时分帧：超过 gap_ms 没有收到新数据即认为一帧结束"""
+
+    def __init__(self, gap_ms=5, max_frame=65536):
+        super().__init__(max_frame)
+        self.gap = gap_ms / 1000
+        self._last = 0.0
+
+    def feed(self, data, now=None):
+        if now is None:
+            now = time.monotonic()
+        frames = self.poll(now)
+        self._buf += data
+        self._last = now
+        if len(self._buf) >= self.max_frame:
+            frames.append(bytes(self._buf))
+            self._buf.clear()
+        return frames
+
+    def poll(self, now=None):
+        if not self._buf:
+            return []
+        if now is None:
+            now = time.monotonic()
+        if now - self._last < self.gap:
+            return []
+        frame = bytes(self._buf)
+        self._buf.clear()
+        return [frame]
+
+    def next_deadline(self):
+        if not self._buf:
+            return None
+        return self._last + self.gap
+
+    def pending(self):
+        return len(self._buf)
+
+
+def create_framer(config=None):
+    """根据配置创建分帧器，配置格式见 DEFAULT_FRAMER_CONFIG"""
+    config = config or DEFAULT_FRAMER_CONFIG
+    kind = config.get("type", "delimiter")
+    if kind == "delimiter":
+        return DelimiterFramer(bytes.fromhex(config.get("delimiter", "0A")), idle_ms=float(config.get("idle_ms", 100)))
+    if kind == "fixed":
+        return FixedLengthFramer(int(config.get("length", 8)))
+    if kind == "length_prefix":
+        return LengthPrefixFramer(
+            header_size=int(config.get("header_size", 2)),
+            length_offset=int(config.get("length_offset", 0)),
+            length_size=int(config.get("length_size", 2)),
+            byteorder=config.get("byteorder", "big"),
+            length_adjust=int(config.get("length_adjust", 0)),
+        )
+    if kind == "slip":
+        return SlipFramer()
+    if kind == "cobs":
+        return CobsFramer()
+    if kind == "timeout":
+        return TimeoutFramer(float(config.get("gap_ms", 5)))
+    raise ValueError(f"未知的分帧方式: {kind}")
+
+
+def describe_framer(config=None):
+    """分帧配置的简短描述，用于界面显示"""
+    config = config or DEFAULT_FRAMER_CONFIG
+    kind = config.get("type", "delimiter")
+    name = FRAMER_TYPES.get(kind, kind)
+    if kind == "delimiter":
+        return f"{name} {config.get('delimiter', '0A')}"
+    if kind == "fixed":
+        return f"{name} {config.get('length', 8)}"
+    if kind == "timeout":
+        return f"{name} {config.get('gap_ms', 5)}ms"
+    return name
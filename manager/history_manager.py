@@ -1,86 +1,260 @@
+import queue
 import sqlite3
+import threading
+from collections import OrderedDict
+
+# 后台同步线程的关闭指令
+_CLOSE = object()
 
 
 class HistoryManager:
+    """历史记录：内存中维护有序模型，界面操作只改内存，数据库由后台线程批量同步"""
+
     def __init__(self, db_file="history.db", max_history=1000):
-        self.conn = sqlite3.connect(db_file)
+        self.db_file = db_file
         self.max_history = max_history
-        self.creat_table()
-
-    def creat_table(self):
-        cur = self.conn.cursor()
-        cur.execute("""CREATE TABLE IF NOT EXISTS history
-                       (
-                           id
-                           INTEGER
-                           PRIMARY
-                           KEY
-                           AUTOINCREMENT,
-                           cmd
-                           TEXT,
-                           hex_flag
-                           INTEGER
-                           default
-                           0,
-                           append_enter_flag
-                           INTEGER
-                           default
-                           0,
-                           ts
-                           TIMESTAMP
-                           DEFAULT
-                           CURRENT_TIMESTAMP
-                       )""")
-        self.conn.commit()
+        # 数据库行数超过 max_history + trim_slack 时才裁剪一次
+        self.trim_slack = max(10, max_history // 10)
+        # (cmd, hex_flag, append_enter_flag) -> None，按从旧到新排列
+        self._entries = OrderedDict()
 
-    def save_history(self, cmd, hex_flag, append_enter_flag):
-        """保存历史记录"""
-        print(f"保存历史记录: {cmd}, {hex_flag}, {append_enter_flag}")
-        cur = self.conn.cursor()
+        conn = self._connect()
+        self.creat_table(conn)
+        rows = conn.execute("SELECT cmd, hex_flag, append_enter_flag FROM history ORDER BY seq DESC LIMIT ?",
+                            (self.max_history,)).fetchall()
+        # 以下两个值只由后台同步线程使用
+        self._seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM history").fetchone()[0]
+        self._db_count = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        conn.close()
+        for row in reversed(rows):
+            self._entries[self._key(*row)] = None
 
-        # 避免连续重复
-        row = cur.execute("SELECT cmd, hex_flag, append_enter_flag FROM history ORDER BY id DESC LIMIT 1").fetchone()
-        if row and row[0] == cmd and row[1] == hex_flag and row[2] == append_enter_flag:
-            return
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._sync_loop, name="HistorySync", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _key(cmd, hex_flag, append_enter_flag):
+        return cmd, int(bool(hex_flag)), int(bool(append_enter_flag))
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def creat_table(self, conn):
+        """建表，并按 PRAGMA user_version 逐步迁移旧版本数据库"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_v1(conn)
+        if version < 2:
+            self._migrate_v2(conn)
 
-        # 删除旧的相同记录
-        cur.execute("DELETE FROM history WHERE cmd=? and hex_flag=? and append_enter_flag=?",
-                    (cmd, hex_flag, append_enter_flag))
-        # 插入新记录
-        cur.execute("INSERT INTO history (cmd, hex_flag, append_enter_flag) VALUES (?, ?, ?)",
-                    (cmd, hex_flag, append_enter_flag))
-        self.conn.commit()
-
-        # 保留最新 max_history 条
-        row_count = cur.execute("SELECT COUNT(*) FROM history").fetchone()[0]
-        if row_count > self.max_history:
-            cur.execute("""DELETE
-                           FROM history
-                           WHERE id NOT IN (SELECT id
-                                            FROM history
-                                            ORDER BY id DESC LIMIT ?
-                               )""", (self.max_history,))
-            self.conn.commit()
+    @staticmethod
+    def _migrate_v1(conn):
+        """唯一索引 + 顺序号；旧表（无唯一索引）的数据去重后迁移"""
+        old_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='history'").fetchone() is not None
+        with conn:
+            if old_table:
+                conn.execute("ALTER TABLE history RENAME TO history_old")
+            conn.execute("""CREATE TABLE history
+                            (
+                                id                INTEGER PRIMARY KEY AUTOINCREMENT,
+                                cmd               TEXT    NOT NULL,
+                                hex_flag          INTEGER NOT NULL DEFAULT 0,
+                                append_enter_flag INTEGER NOT NULL DEFAULT 0,
+                                seq               INTEGER NOT NULL,
+                                ts                TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                            )""")
+            conn.execute("CREATE UNIQUE INDEX idx_history_key ON history (cmd, hex_flag, append_enter_flag)")
+            conn.execute("CREATE INDEX idx_history_seq ON history (seq)")
+            if old_table:
+                # 旧表按 id 排序，重复记录只保留最新的一条
+                conn.execute("""INSERT INTO history (cmd, hex_flag, append_enter_flag, seq, ts)
+                                SELECT cmd, hex_flag, append_enter_flag, MAX(id), MAX(ts)
+                                FROM history_old
+                                WHERE cmd IS NOT NULL
+                                GROUP BY cmd, hex_flag, append_enter_flag""")
+                conn.execute("DROP TABLE history_old")
+            conn.execute("PRAGMA user_version = 1")
+
+    @staticmethod
+    def _migrate_v2(conn):
+        """FTS5 全文索引（trigram 分词，支持子串检索），由触发器与 history 表保持同步"""
+        try:
+            with conn:
+                conn.execute("""CREATE VIRTUAL TABLE history_fts USING fts5(
+                                    cmd, content='history', content_rowid='id', tokenize='trigram')""")
+                conn.execute("""CREATE TRIGGER history_ai AFTER INSERT ON history BEGIN
+                                    INSERT INTO history_fts(rowid, cmd) VALUES (new.id, new.cmd);
+                                END""")
+                conn.execute("""CREATE TRIGGER history_ad AFTER DELETE ON history BEGIN
+                                    INSERT INTO history_fts(history_fts, rowid, cmd) VALUES ('delete', old.id, old.cmd);
+                                END""")
+                conn.execute("""CREATE TRIGGER history_au AFTER UPDATE OF cmd ON history BEGIN
+                                    INSERT INTO history_fts(history_fts, rowid, cmd) VALUES ('delete', old.id, old.cmd);
+                                    INSERT INTO history_fts(rowid, cmd) VALUES (new.id, new.cmd);
+                                END""")
+                conn.execute("INSERT INTO history_fts(history_fts) VALUES ('rebuild')")
+                conn.execute("PRAGMA user_version = 2")
+        except sqlite3.OperationalError as e:
+            # SQLite 未编译 FTS5 或不支持 trigram 时退化为 LIKE 检索
+            print("创建历史记录全文索引失败:", e)
+
+    def upsert_history(self, cmd, hex_flag, append_enter_flag):
+        """记录一条历史（已存在则移到最新）
+
+        :return: (记录, 是否已存在, 因超出上限被移除的记录列表)
+        """
+        key = self._key(cmd, hex_flag, append_enter_flag)
+        entries = self._entries
+        existed = key in entries
+        if existed:
+            if next(reversed(entries)) == key:
+                # 与最新一条相同，无需任何改动
+                return key, True, []
+            entries.move_to_end(key)
+        else:
+            entries[key] = None
+        trimmed = []
+        while len(entries) > self.max_history:
+            trimmed.append(entries.popitem(last=False)[0])
+        self._queue.put(("upsert", key))
+        return key, existed, trimmed
+
+    def save_history(self, cmd, hex_flag, append_enter_flag):
+        """保存历史记录"""
+        self.upsert_history(cmd, hex_flag, append_enter_flag)
 
     def load_history(self):
-        """返回最近 max_history 条历史命令"""
-        cur = self.conn.cursor()
-        return [row for row in cur.execute(
-            "SELECT cmd, hex_flag, append_enter_flag FROM history ORDER BY id asc LIMIT ?", (self.max_history,)
-        )]
+        """返回最近 max_history 条历史命令（从旧到新）"""
+        return list(self._entries)
 
     def clear_history(self):
         """清空历史记录"""
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM history")
-        self.conn.commit()
-
-    def close(self):
-        self.conn.close()
+        self._entries.clear()
+        self._queue.put(("clear", None))
 
     def delete_history(self, cmd, hex_flag, append_enter_flag):
         """删除指定历史记录"""
-        cur = self.conn.cursor()
-        cur.execute("DELETE FROM history WHERE cmd=? and hex_flag=? and append_enter_flag=?",
-                    (cmd, hex_flag, append_enter_flag))
-        self.conn.commit()
+        key = self._key(cmd, hex_flag, append_enter_flag)
+        self._entries.pop(key, None)
+        self._queue.put(("delete", key))
+
+    def close(self):
+        """等待后台同步完成"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put((_CLOSE, None))
+        self._thread.join()
+
+    def _sync_loop(self):
+        """后台同步线程：批量取出改动，在一个事务中写入数据库"""
+        conn = self._connect()
+        self._last_rowid = 0
+        try:
+            while True:
+                ops = [self._queue.get()]
+                while True:
+                    try:
+                        ops.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                closing = False
+                try:
+                    with conn:
+                        for op, key in ops:
+                            if op is _CLOSE:
+                                closing = True
+                            elif op == "upsert":
+                                self._db_upsert(conn, key)
+                            elif op == "delete":
+                                cur = conn.execute(
+                                    "DELETE FROM history WHERE cmd=? AND hex_flag=? AND append_enter_flag=?", key)
+                                self._db_count -= cur.rowcount
+                            elif op == "clear":
+                                conn.execute("DELETE FROM history")
+                                self._db_count = 0
+                        if self._db_count > self.max_history + self.trim_slack:
+                            self._db_trim(conn)
+                except Exception as e:
+                    print("同步历史记录失败:", e)
+                    self._db_count = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+                if closing:
+                    return
+        finally:
+            conn.close()
+
+    def _db_upsert(self, conn, key):
+        # 已存在的记录只更新顺序号，由唯一索引完成去重
+        self._seq += 1
+        cur = conn.execute("""INSERT INTO history (cmd, hex_flag, append_enter_flag, seq)
+                              VALUES (?, ?, ?, ?)
+                              ON CONFLICT (cmd, hex_flag, append_enter_flag)
+                                  DO UPDATE SET seq=excluded.seq, ts=CURRENT_TIMESTAMP""", (*key, self._seq))
+        # 走 UPDATE 分支时 lastrowid 不变，变化说明插入了新行
+        if cur.lastrowid != self._last_rowid:
+            self._last_rowid = cur.lastrowid
+            self._db_count += 1
+
+    def _db_trim(self, conn):
+        # 保留最新 max_history 条：按 seq 索引找到分界点后一次删除
+        cur = conn.execute("""DELETE
+                              FROM history
+                              WHERE seq <= (SELECT seq FROM history ORDER BY seq DESC LIMIT 1 OFFSET ?)""",
+                           (self.max_history,))
+        self._db_count -= cur.rowcount
+
+
+class HistorySearcher:
+    """历史记录检索：持有自己的数据库连接，需在使用它的线程中创建"""
+
+    def __init__(self, db_file="history.db"):
+        self.conn = sqlite3.connect(db_file)
+        self.has_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='history_fts'").fetchone() is not None
+
+    def search(self, text, limit=20):
+        """按前缀/子串检索历史命令，前缀匹配排在前面，子串匹配按最近加入排序
+
+        两段查询都只按索引顺序取前 limit 条，耗时与历史记录总数基本无关。
+        :return: [(cmd, hex_flag, append_enter_flag), ...]
+        """
+        if not text:
+            return []
+        # 前缀匹配：(cmd, ...) 唯一索引上的范围查询
+        rows = self.conn.execute(
+            """SELECT cmd, hex_flag, append_enter_flag
+               FROM history
+               WHERE cmd >= ? AND cmd < ?
+               ORDER BY cmd LIMIT ?""", (text, text + "\U0010ffff", limit)).fetchall()
+        if len(rows) >= limit:
+            return rows
+        if self.has_fts:
+            # trigram 至少需要 3 个字符
+            if len(text) < 3:
+                return rows
+            more = self.conn.execute(
+                """SELECT h.cmd, h.hex_flag, h.append_enter_flag
+                   FROM history_fts
+                            JOIN history h ON h.id = history_fts.rowid
+                   WHERE history_fts MATCH ?
+                     AND substr(h.cmd, 1, ?) != ?
+                   ORDER BY history_fts.rowid DESC LIMIT ?""",
+                ('"' + text.replace('"', '""') + '"', len(text), text, limit - len(rows))).fetchall()
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            more = self.conn.execute(
+                """SELECT cmd, hex_flag, append_enter_flag
+                   FROM history
+                   WHERE cmd LIKE ? ESCAPE '\\'
+                     AND substr(cmd, 1, ?) != ?
+                   ORDER BY id DESC LIMIT ?""", (pattern, len(text), text, limit - len(rows))).fetchall()
+        return rows + more
+
+    def close(self):
+        self.conn.close()
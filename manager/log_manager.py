@@ -1,24 +1,173 @@
 import datetime
 import os
+import queue
+import threading
+import time
+
+from manager.stats import LATENCY_BUCKETS_MS
+
+# 写线程控制指令
+_ROTATE = object()
+_CLOSE = object()
 
 
 class LogManager:
-    def __init__(self, log_dir="logs"):
+    def __init__(self, log_dir="logs", flush_interval=0.5, flush_bytes=64 * 1024,
+                 max_bytes=100 * 1024 * 1024, rotate_interval=0, stats=None):
+        """
+        :param flush_interval: 最长刷新间隔（秒）
+        :param flush_bytes: 缓冲达到该字节数时立即刷新
+        :param max_bytes: 单个日志文件超过该大小时切换新文件（0 表示不限制）
+        :param rotate_interval: 每隔多少秒切换新文件（0 表示不按时间切换）
+        :param stats: manager.stats.Stats，记录写线程的滞后和每次取出的日志条数
+        """
         self.log_dir = log_dir
         os.makedirs(self.log_dir, exist_ok=True)
         # 文件名以时间命名
-        self.log_file = os.path.join(self.log_dir, f"log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+        self.log_file = self._new_log_path()
         self.logging_flag = True
 
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self._lag = self._backlog = self._lines = None
+        if stats is not None:
+            self._lag = stats.histogram("log_lag_ms", LATENCY_BUCKETS_MS, "ms")
+            self._backlog = stats.gauge("log_backlog")
+            self._lines = stats.counter("log_lines")
+
+        # write() 只入队，由后台线程统一格式化、批量写入
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer_loop, name="LogWriter", daemon=True)
+        self._thread.start()
+
     def set_logging_flag(self, flag):
         """设置是否记录日志"""
         print(f"设置日志记录状态: {flag}")
         self.logging_flag = flag
 
     def write(self, msg: str, level="info"):
-        """写日志"""
-        if not self.logging_flag:
+        """写日志（非阻塞，线程安全）"""
+        if not self.logging_flag or self._closed:
+            return
+        self._queue.put((time.time(), level, msg))
+
+    def rotate(self):
+        """切换到新的日志文件，之前写入的日志仍保存在旧文件中"""
+        if self._closed:
+            return
+        self.log_file = self._new_log_path()
+        self._queue.put((_ROTATE, None, self.log_file))
+
+    def close(self):
+        """写完队列中剩余的日志并关闭文件
+
+        文件由写线程在处理到关闭指令时关闭，这里等它把关闭指令之前的日志全部写完，不设超时。
+        """
+        if self._closed:
             return
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] [{level}] {msg}\n")
+        self._closed = True
+        self._queue.put((_CLOSE, None, None))
+        self._thread.join()
+
+    def _new_log_path(self):
+        name = f"log_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        path = os.path.join(self.log_dir, f"{name}.log")
+        index = 1
+        while os.path.exists(path) or path == getattr(self, "log_file", None):
+            path = os.path.join(self.log_dir, f"{name}_{index}.log")
+            index += 1
+        return path
+
+    def _writer_loop(self):
+        """后台写线程：批量取出日志，定时或达到阈值时刷新"""
+        self._file = None
+        self._path = self.log_file
+        self._file_size = 0
+        self._opened_at = 0.0
+        self._unflushed = 0
+        last_flush = time.monotonic()
+        # 同一秒内的时间戳只格式化一次
+        cached_second = None
+        cached_stamp = ""
+
+        while True:
+            # 有未刷新的数据时，最多等到下一次刷新时刻
+            timeout = None
+            if self._unflushed:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for ts, level, msg in items:
+                if ts is _ROTATE or ts is _CLOSE:
+                    self._append_lines(lines)
+                    lines = []
+                    self._close_file()
+                    if ts is _CLOSE:
+                        return
+                    self._path = msg
+                    continue
+                second = int(ts)
+                if second != cached_second:
+                    cached_second = second
+                    cached_stamp = datetime.datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+                lines.append(f"[{cached_stamp}] [{level}] {msg}\n")
+            self._append_lines(lines)
+            if self._lag is not None and items and isinstance(items[0][0], float):
+                # 滞后：本批最早一条从 write() 到写入文件的时间
+                self._lag.record((time.time() - items[0][0]) * 1000)
+                self._backlog.set(len(items))
+                self._lines.add(len(items))
+
+            now = time.monotonic()
+            if self._file and self._unflushed and (self._unflushed >= self.flush_bytes
+                                                   or now - last_flush >= self.flush_interval):
+                try:
+                    self._file.flush()
+                except Exception as e:
+                    print("写日志失败:", e)
+                self._unflushed = 0
+                last_flush = now
+
+            # 按大小或时间切换文件
+            if self._file and ((self.max_bytes and self._file_size >= self.max_bytes)
+                               or (self.rotate_interval and now - self._opened_at >= self.rotate_interval)):
+                self._close_file()
+                self._path = self.log_file = self._new_log_path()
+
+    def _append_lines(self, lines):
+        """把一批日志写入当前文件（必要时打开文件）"""
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self._path, "ab")
+                self._file_size = self._file.tell()
+                self._opened_at = time.monotonic()
+            data = "".join(lines).encode("utf-8")
+            self._file.write(data)
+            self._file_size += len(data)
+            self._unflushed += len(data)
+        except Exception as e:
+            print("写日志失败:", e)
+            self._close_file()
+
+    def _close_file(self):
+        if self._file:
+            try:
+                self._file.close()
+            except Exception as e:
+                print("关闭日志文件失败:", e)
+        self._file = None
+        self._unflushed = 0
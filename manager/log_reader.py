@@ -0,0 +1,256 @@
+import mmap
+import os
+import re
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+
+# 索引缓存文件: 魔数, 块大小, 已索引字节数, 已索引行数, 文件开头 4KB 的 CRC32, 索引项数
+INDEX_MAGIC = b"STLIDX01"
+INDEX_HEADER = struct.Struct("<8sQQQIQ")
+# 用于确认缓存对应的仍是同一个文件（日志只追加，开头不会变）
+HEAD_BYTES = 4096
+# LogManager.write 写入的时间前缀
+STAMP_RE = re.compile(rb"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]")
+
+
+class LogFileIndex:
+    """大日志文件的稀疏行索引：大约每 block_size 字节记一条 (行号, 偏移)，读取时用 mmap 定位任意行
+
+    索引缓存在日志旁的 <日志>.idx 中；日志继续增长时只扫描新增部分。
+    只索引完整的行（以换行结尾），末尾未写完的行在下次 load() 时加入。
+    """
+
+    def __init__(self, path, block_size=64 * 1024):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.block_size = block_size
+        self.indexed_size = 0
+        self.line_count = 0
+        # 索引项：第 _lines[i] 行从 _offsets[i] 开始
+        self._lines = array("Q", [0])
+        self._offsets = array("Q", [0])
+        self._file = None
+        self._mm = None
+
+    # ------------------------- 建立索引 -------------------------
+    def load(self, progress=None, stop=None):
+        """读取缓存并索引新增部分（也用于日志增长后刷新），返回新增的行数
+
+        :param progress: 回调 progress(已扫描字节, 文件大小)
+        :param stop: 返回 True 时中止扫描（已扫描的部分仍然有效）
+        """
+        self._remap()
+        size = len(self._mm) if self._mm is not None else 0
+        if self.indexed_size == 0 or self.indexed_size > size:
+            self._reset()
+            self._load_cache(size)
+        before = self.line_count
+        if self.indexed_size < size:
+            self._scan(size, progress, stop)
+            self._save_cache()
+        return self.line_count - before
+
+    def _remap(self):
+        self.close()
+        self._file = open(self.path, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _reset(self):
+        self.indexed_size = 0
+        self.line_count = 0
+        self._lines = array("Q", [0])
+        self._offsets = array("Q", [0])
+
+    def _head_crc(self):
+        return zlib.crc32(self._mm[:HEAD_BYTES]) if self._mm is not None else 0
+
+    def _scan(self, end, progress=None, stop=None):
+        mm = self._mm
+        pos = self.indexed_size
+        count = self.line_count
+        lines, offsets = self._lines, self._offsets
+        while pos < end:
+            if stop and stop():
+                break
+            block_end = min(end, pos + self.block_size)
+            last = mm.rfind(b"\n", pos, block_end)
+            if last < 0:
+                # 超长行或末尾未写完的行
+                last = mm.find(b"\n", block_end, end)
+                if last < 0:
+                    break
+            count += mm[pos:last + 1].count(b"\n")
+            pos = last + 1
+            lines.append(count)
+            offsets.append(pos)
+            if progress:
+                progress(pos, end)
+        self.indexed_size = pos
+        self.line_count = count
+
+    def _load_cache(self, size):
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+                magic, block_size, indexed_size, line_count, head_crc, n = INDEX_HEADER.unpack(header)
+                if (magic != INDEX_MAGIC or block_size != self.block_size or indexed_size > size
+                        or head_crc != self._head_crc()):
+                    return
+                lines, offsets = array("Q"), array("Q")
+                lines.fromfile(f, n)
+                offsets.fromfile(f, n)
+        except (OSError, EOFError, struct.error):
+            return
+        self._lines, self._offsets = lines, offsets
+        self.indexed_size = indexed_size
+        self.line_count = line_count
+
+    def _save_cache(self):
+        try:
+            with open(self.index_path, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, self.block_size, self.indexed_size, self.line_count,
+                                          self._head_crc(), len(self._lines)))
+                self._lines.tofile(f)
+                self._offsets.tofile(f)
+        except OSError as e:
+            print(f"保存日志索引失败: {e}")
+
+    # ------------------------- 读取 -------------------------
+    def read_lines(self, start, count):
+        """读取从第 start 行起的 count 行（行号从 0 开始）"""
+        stop = min(self.line_count, start + count)
+        start = max(0, start)
+        if start >= stop:
+            return []
+        i = bisect_right(self._lines, start) - 1
+        line_no, pos = self._lines[i], self._offsets[i]
+        mm = self._mm
+        result = []
+        while line_no < stop:
+            nl = mm.find(b"\n", pos, self.indexed_size)
+            if nl < 0:
+                break
+            if line_no >= start:
+                result.append(mm[pos:nl].decode("utf-8", errors="replace").rstrip("\r"))
+            pos = nl + 1
+            line_no += 1
+        return result
+
+    def line_at(self, offset):
+        """偏移所在的行号"""
+        i = bisect_right(self._offsets, offset) - 1
+        return self._lines[i] + self._mm[self._offsets[i]:offset].count(b"\n")
+
+    def _stamp_at(self, pos, max_lines=64):
+        """pos 处（行首）起第一条带时间前缀的行的时间，max_lines 行内没有时返回 None"""
+        mm = self._mm
+        for _ in range(max_lines):
+            m = STAMP_RE.match(mm, pos, self.indexed_size)
+            if m:
+                return m.group(1)
+            nl = mm.find(b"\n", pos, self.indexed_size)
+            if nl < 0:
+                return None
+            pos = nl + 1
+        return None
+
+    def find_time(self, stamp):
+        """二分查找第一条时间不早于 stamp（"YYYY-MM-DD HH:MM:SS"）的行号，没有时返回 None"""
+        if not self.line_count:
+            return None
+        target = stamp.encode()
+        offsets = self._offsets
+        # 索引项个数比行数少得多，先在索引项上二分，再在块内顺序查找
+        lo, hi = 0, len(offsets) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = self._stamp_at(offsets[mid])
+            if found is None or found < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        i = max(0, lo - 1)
+        line_no, pos = self._lines[i], offsets[i]
+        mm = self._mm
+        while line_no < self.line_count:
+            m = STAMP_RE.match(mm, pos, self.indexed_size)
+            if m and m.group(1) >= target:
+                return line_no
+            pos = mm.find(b"\n", pos, self.indexed_size) + 1
+            line_no += 1
+        return None
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LinePattern:
+    """按行查找的条件：普通文本用 bytes.find（不区分大小写时先把窗口转为小写），正则用字节正则"""
+
+    def __init__(self, text, regex=False, case_sensitive=False):
+        """正则无效时抛出 re.error"""
+        self.text = text
+        self.fold = not case_sensitive and not regex
+        if regex:
+            flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+            self._regex = re.compile(text.encode("utf-8"), flags)
+            self._needle = None
+        else:
+            self._regex = None
+            needle = text.encode("utf-8")
+            self._needle = needle.lower() if self.fold else needle
+
+    def search(self, hay, start):
+        """hay 中 start 之后第一个匹配的位置，没有返回 -1"""
+        if self._regex is None:
+            return hay.find(self._needle, start)
+        m = self._regex.search(hay, start)
+        return m.start() if m else -1
+
+
+def grep_file(path, pattern, end=None, window=16 * 1024 * 1024, stop=None):
+    """在日志中逐行查找 LinePattern，返回 (已扫描到的偏移, [(行号, 行文本), ...]) 的迭代器（每个窗口产出一次）
+
+    :param end: 只查找到该偏移（通常为索引的 indexed_size），None 表示整个文件
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = len(mm) if end is None else min(end, len(mm))
+            pos = 0
+            line_no = 0
+            while pos < end:
+                if stop and stop():
+                    return
+                # 窗口结束在行尾，匹配不会跨窗口
+                window_end = mm.find(b"\n", min(end, pos + window), end)
+                window_end = end if window_end < 0 else window_end + 1
+                chunk = mm[pos:window_end]
+                hay = chunk.lower() if pattern.fold else chunk
+                matches = []
+                counted_to = 0
+                i = pattern.search(hay, 0)
+                while i >= 0:
+                    line_start = chunk.rfind(b"\n", 0, i) + 1
+                    line_end = chunk.find(b"\n", i)
+                    if line_end < 0:
+                        line_end = len(chunk)
+                    line_no += chunk.count(b"\n", counted_to, line_start)
+                    counted_to = line_start
+                    matches.append((line_no, chunk[line_start:line_end].decode("utf-8", errors="replace").rstrip("\r")))
+                    # 同一行只报告一次
+                    if line_end + 1 >= len(chunk):
+                        break
+                    i = pattern.search(hay, line_end + 1)
+                line_no += chunk.count(b"\n", counted_to)
+                pos = window_end
+                yield pos, matches
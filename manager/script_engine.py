@@ -0,0 +1,668 @@
+"""自动化测试脚本：解析为扁平的指令序列（循环/条件编译为跳转），运行时不再解析文本
+
+脚本格式（每行一条语句，# 开头为注释）::
+
+    set addr 01                     # 设置变量
+    timeout 500                     # 之后 expect 的默认超时 (ms)
+    eol crlf                        # 之后 send 的结尾符: crlf/lf/cr/lfcr/none
+    loop 3 i                        # 循环 3 次，可选循环变量 i（0 开始）
+        send AT+ADDR=${addr}        # 发送文本（加结尾符），${变量} 替换
+        sendhex 01 03 ${addr} ${crc16(01 03 ${addr})}   # 发送 HEX（不加结尾符）
+        expect /VER=(?P<ver>\\d+)/ 200  # 等待正则匹配，命名分组写入变量
+        expect hex "01 03" 200      # 等待字节串
+        expect "OK"                 # 等待文本
+        expect frames 2             # 等待帧数
+        if ok                       # 条件: ok / not ok / A == B / A != B
+            log 版本 ${ver}
+        else
+            fail 没有回复            # 记为失败并结束脚本
+        end
+        inc count                   # 变量加 1（可指定步长）
+        delay 100                   # 延时 (ms)
+    end
+    stop                            # 结束脚本
+
+校验函数（参数为 HEX 文本，结果为 HEX 文本）: sum8 xor8 crc16（Modbus，低字节在前）
+crc16_ccitt（高字节在前） len（字节数）；hex(文本) 把文本转换为 HEX。
+"""
+import re
+import time
+
+from manager.checksum import crc16_ccitt, crc16_modbus, sum8, xor8
+from manager.framer import DelimiterFramer
+from manager.serial_manager import compile_command
+
+# 指令操作码（按执行频率排列，便于解释循环优先匹配）
+SEND, EXPECT, DELAY, LOOP_NEXT, LOOP_INIT, JUMP, JUMP_IF_NOT, SET, INC, LOG, FAIL, STOP = range(12)
+
+# 一轮执行的结果：正常结束（继续下一轮）、遇到 stop（结束脚本）、失败或被停止
+ROUND_DONE, ROUND_STOP, ROUND_ABORT = range(3)
+
+EOL = {"crlf": b"\r\n", "lf": b"\n", "cr": b"\r", "lfcr": b"\n\r", "none": b""}
+
+_ESCAPES = {"r": "\r", "n": "\n", "t": "\t", "\\": "\\", '"': '"', "0": "\0"}
+
+
+class ScriptError(Exception):
+    """脚本语法或运行错误"""
+
+    def __init__(self, msg, line_no=None):
+        super().__init__(f"第 {line_no} 行: {msg}" if line_no else msg)
+        self.line_no = line_no
+
+
+def _hex_bytes(text):
+    data = text.replace(" ", "")
+    if len(data) % 2 != 0:
+        data += "0"
+    return bytes.fromhex(data)
+
+
+def _crc16_le(text):
+    crc = crc16_modbus(_hex_bytes(text))
+    return f"{crc & 0xFF:02X} {crc >> 8:02X}"
+
+
+def _crc16_be(text):
+    crc = crc16_ccitt(_hex_bytes(text))
+    return f"{crc >> 8:02X} {crc & 0xFF:02X}"
+
+
+HELPERS = {
+    "sum8": lambda text: f"{sum8(_hex_bytes(text)):02X}",
+    "xor8": lambda text: f"{xor8(_hex_bytes(text)):02X}",
+    "crc16": _crc16_le,
+    "crc16_ccitt": _crc16_be,
+    "len": lambda text: f"{len(_hex_bytes(text)):02X}",
+    "hex": lambda text: text.encode("utf-8").hex(" ").upper(),
+}
+
+
+class Template:
+    """带 ${变量} / ${函数(参数)} 的文本，解析一次，运行时只做拼接"""
+    __slots__ = ("parts", "static")
+
+    def __init__(self, parts):
+        self.parts = parts
+        # 不含替换时直接使用常量文本
+        self.static = "".join(parts) if all(isinstance(p, str) for p in parts) else None
+
+    def render(self, variables):
+        if self.static is not None:
+            return self.static
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif part[0] is None:
+                try:
+                    out.append(str(variables[part[1]]))
+                except KeyError:
+                    raise ScriptError(f"未定义的变量: {part[1]}") from None
+            else:
+                try:
+                    out.append(part[0](part[1].render(variables)))
+                except ValueError as e:
+                    raise ScriptError(f"校验函数参数错误: {e}") from None
+        return "".join(out)
+
+
+def parse_template(text, line_no=None):
+    parts = []
+    pos = 0
+    while True:
+        start = text.find("${", pos)
+        if start < 0:
+            break
+        if start > pos:
+            parts.append(text[pos:start])
+        # 查找匹配的 }，允许嵌套 ${...}
+        depth = 0
+        i = start
+        while i < len(text):
+            if text.startswith("${", i):
+                depth += 1
+                i += 2
+                continue
+            if text[i] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        else:
+            raise ScriptError(f"缺少 }}: {text[start:]}", line_no)
+        parts.append(_parse_expr(text[start + 2:i].strip(), line_no))
+        pos = i + 1
+    if pos < len(text) or not parts:
+        parts.append(text[pos:])
+    return Template(parts)
+
+
+def _parse_expr(expr, line_no):
+    m = re.fullmatch(r"(\w+)\((.*)\)", expr, re.S)
+    if m:
+        func = HELPERS.get(m.group(1))
+        if func is None:
+            raise ScriptError(f"未知的函数: {m.group(1)}", line_no)
+        return func, parse_template(m.group(2).strip(), line_no)
+    if re.fullmatch(r"\w+", expr):
+        return None, expr
+    raise ScriptError(f"无效的表达式: ${{{expr}}}", line_no)
+
+
+def _unquote(text, line_no=None):
+    """去掉两侧引号并处理转义（\\r \\n \\t \\xNN）；无引号时原样返回"""
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        return text
+    body = text[1:-1]
+    out = []
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            nxt = body[i + 1]
+            if nxt == "x" and i + 3 < len(body) + 1:
+                try:
+                    out.append(chr(int(body[i + 2:i + 4], 16)))
+                except ValueError:
+                    raise ScriptError(f"无效的转义: {body[i:i + 4]}", line_no) from None
+                i += 4
+                continue
+            if nxt in _ESCAPES:
+                out.append(_ESCAPES[nxt])
+                i += 2
+                continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+class Expectation:
+    """单步的期望回复，满足任一条件即结束等待
+
+    :param regex: 与任一帧（文本帧按 UTF-8 解码，二进制帧按 HEX 文本）匹配的正则
+    :param data: 在本步收到的原始字节中出现的字节串
+    :param frames: 收到的帧数达到该值
+    :param timeout_ms: 超时时间
+    """
+
+    def __init__(self, regex=None, data=None, frames=None, timeout_ms=1000):
+        self.regex = re.compile(regex) if isinstance(regex, str) else regex
+        self.data = data
+        self.frames = frames
+        self.timeout = timeout_ms / 1000
+
+    def describe(self):
+        parts = []
+        if self.regex is not None:
+            parts.append(f"/{self.regex.pattern}/")
+        if self.data is not None:
+            parts.append(self.data.hex(" ").upper())
+        if self.frames:
+            parts.append(f"{self.frames} 帧")
+        return " 或 ".join(parts) or "无"
+
+
+class AutomationStep:
+    """一条自动化步骤：发送指令，可选等待期望回复"""
+
+    def __init__(self, cmd, hex_flag=False, end=b"\r\n", expect=None):
+        self.cmd = cmd
+        self.hex_flag = hex_flag
+        self.end = end
+        self.expect = expect
+        self.payload = compile_command(cmd, hex_flag, end).payload
+
+
+class Program:
+    """编译后的脚本：instrs 为 (操作码, 参数a, 参数b) 列表"""
+
+    def __init__(self, instrs, name="", loop_slots=0):
+        self.instrs = instrs
+        self.name = name
+        self.loop_slots = loop_slots
+
+    def __len__(self):
+        return len(self.instrs)
+
+    @classmethod
+    def from_steps(cls, steps, name=""):
+        """由指令列表（AutomationStep）构造程序"""
+        instrs = []
+        for step in steps:
+            instrs.append((SEND, Template([step.cmd]), (step.hex_flag, step.end, step.payload)))
+            if step.expect is not None:
+                instrs.append((EXPECT, step.expect, None))
+        return cls(instrs, name)
+
+
+def load_script(path, encoding="utf-8"):
+    with open(path, "r", encoding=encoding) as f:
+        return compile_script(f.read(), name=path)
+
+
+def compile_script(text, name=""):
+    """把脚本文本编译为 Program，语法错误抛出 ScriptError"""
+    instrs = []
+    # 未闭合的块: (类型, 行号, 数据)
+    blocks = []
+    loop_slots = 0
+    eol = b"\r\n"
+    timeout_ms = 1000
+
+    for line_no, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        word, _, rest = line.partition(" ")
+        word = word.lower()
+        rest = rest.strip()
+
+        if word == "send":
+            instrs.append(_send_instr(_unquote(rest, line_no), False, eol, line_no))
+        elif word == "sendhex":
+            instrs.append(_send_instr(_unquote(rest, line_no), True, b"", line_no))
+        elif word == "expect":
+            instrs.append((EXPECT, _parse_expect(rest, timeout_ms, line_no), None))
+        elif word == "delay":
+            instrs.append((DELAY, _number_or_template(rest, line_no, 1000), None))
+        elif word == "set":
+            var, _, value = rest.partition(" ")
+            _check_name(var, line_no)
+            instrs.append((SET, var, parse_template(_unquote(value.strip(), line_no), line_no)))
+        elif word == "inc":
+            var, _, step = rest.partition(" ")
+            _check_name(var, line_no)
+            instrs.append((INC, var, _int(step.strip() or "1", line_no)))
+        elif word == "log":
+            instrs.append((LOG, parse_template(_unquote(rest, line_no), line_no), None))
+        elif word == "fail":
+            instrs.append((FAIL, parse_template(_unquote(rest, line_no) or "脚本失败", line_no), None))
+        elif word == "stop":
+            instrs.append((STOP, None, None))
+        elif word == "eol":
+            if rest.lower() not in EOL:
+                raise ScriptError(f"未知的结尾符: {rest}", line_no)
+            eol = EOL[rest.lower()]
+        elif word == "timeout":
+            timeout_ms = _int(rest, line_no)
+        elif word == "loop":
+            args = rest.split()
+            if not args or len(args) > 2:
+                raise ScriptError("用法: loop 次数 [变量]", line_no)
+            var = args[1] if len(args) == 2 else None
+            if var:
+                _check_name(var, line_no)
+            slot = loop_slots
+            loop_slots += 1
+            blocks.append(("loop", line_no, len(instrs)))
+            # 跳出位置在 end 处回填
+            instrs.append([LOOP_INIT, slot, (_number_or_template(args[0], line_no), var, None)])
+        elif word == "if":
+            blocks.append(("if", line_no, [len(instrs)]))
+            instrs.append([JUMP_IF_NOT, None, _parse_condition(rest, line_no)])
+        elif word == "else":
+            if not blocks or blocks[-1][0] != "if" or len(blocks[-1][2]) != 1:
+                raise ScriptError("else 没有对应的 if", line_no)
+            jumps = blocks[-1][2]
+            jumps.append(len(instrs))
+            instrs.append([JUMP, None, None])
+            # 条件不成立时跳到 else 之后
+            instrs[jumps[0]][1] = len(instrs)
+        elif word == "end":
+            if not blocks:
+                raise ScriptError("end 没有对应的 loop/if", line_no)
+            kind, _, data = blocks.pop()
+            if kind == "loop":
+                init = instrs[data]
+                count, var, _ = init[2]
+                instrs.append((LOOP_NEXT, init[1], (data + 1, var)))
+                init[2] = (count, var, len(instrs))
+            else:
+                # if 无 else 时回填条件跳转，有 else 时回填 then 分支末尾的跳转
+                instrs[data[-1]][1] = len(instrs)
+        else:
+            raise ScriptError(f"未知的语句: {word}", line_no)
+
+    if blocks:
+        kind, line_no, _ = blocks[-1]
+        raise ScriptError(f"{kind} 缺少 end", line_no)
+    return Program([tuple(i) for i in instrs], name, loop_slots)
+
+
+def _check_name(var, line_no):
+    if not re.fullmatch(r"\w+", var or ""):
+        raise ScriptError(f"无效的变量名: {var}", line_no)
+
+
+def _int(text, line_no):
+    try:
+        return int(text, 0)
+    except ValueError:
+        raise ScriptError(f"无效的数字: {text}", line_no) from None
+
+
+def _number_or_template(text, line_no, scale=1):
+    """数字在编译时换算（delay 换算为秒），含变量时运行时再解析"""
+    if "${" in text:
+        return parse_template(text, line_no)
+    try:
+        value = float(text)
+    except ValueError:
+        raise ScriptError(f"无效的数字: {text}", line_no) from None
+    return value / scale if scale != 1 else int(value)
+
+
+def _send_instr(text, hex_flag, end, line_no):
+    tpl = parse_template(text, line_no)
+    payload = None
+    if tpl.static is not None:
+        try:
+            payload = compile_command(tpl.static, hex_flag, end).payload
+        except ValueError:
+            raise ScriptError(f"HEX 格式错误: {tpl.static}", line_no) from None
+    return SEND, tpl, (hex_flag, end, payload)
+
+
+def _parse_expect(rest, default_timeout, line_no):
+    timeout_ms = default_timeout
+    if rest.startswith("/"):
+        close = rest.rfind("/")
+        if close <= 0:
+            raise ScriptError("正则缺少结尾的 /", line_no)
+        tail = rest[close + 1:].strip()
+        if tail:
+            timeout_ms = _int(tail, line_no)
+        try:
+            return Expectation(regex=re.compile(rest[1:close]), timeout_ms=timeout_ms)
+        except re.error as e:
+            raise ScriptError(f"正则错误: {e}", line_no) from None
+    kind, _, args = rest.partition(" ")
+    if kind == "frames":
+        count, _, tail = args.strip().partition(" ")
+        if tail.strip():
+            timeout_ms = _int(tail.strip(), line_no)
+        return Expectation(frames=_int(count, line_no), timeout_ms=timeout_ms)
+    if kind == "hex":
+        value, tail = _split_quoted(args.strip(), line_no)
+        if tail:
+            timeout_ms = _int(tail, line_no)
+        try:
+            return Expectation(data=_hex_bytes(value), timeout_ms=timeout_ms)
+        except ValueError:
+            raise ScriptError(f"HEX 格式错误: {value}", line_no) from None
+    if rest.startswith('"'):
+        value, tail = _split_quoted(rest, line_no)
+        if tail:
+            timeout_ms = _int(tail, line_no)
+        return Expectation(data=value.encode("utf-8"), timeout_ms=timeout_ms)
+    raise ScriptError("用法: expect /正则/ | hex \"HEX\" | \"文本\" | frames N [超时ms]", line_no)
+
+
+def _split_quoted(text, line_no):
+    """拆分出开头的引号字符串和其后的内容"""
+    if not text.startswith('"'):
+        raise ScriptError(f"缺少引号: {text}", line_no)
+    i = 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == '"':
+            return _unquote(text[:i + 1], line_no), text[i + 1:].strip()
+        i += 1
+    raise ScriptError(f"缺少结尾的引号: {text}", line_no)
+
+
+def _parse_condition(text, line_no):
+    """条件编译为 (runner) -> bool"""
+    cond = text.strip()
+    if cond == "ok":
+        return lambda runner: runner.last_ok
+    if cond in ("not ok", "fail"):
+        return lambda runner: not runner.last_ok
+    for op in ("==", "!="):
+        if op in cond:
+            left, _, right = cond.partition(op)
+            left = parse_template(_unquote(left.strip(), line_no), line_no)
+            right = parse_template(_unquote(right.strip(), line_no), line_no)
+            if op == "==":
+                return lambda runner: left.render(runner.variables) == right.render(runner.variables)
+            return lambda runner: left.render(runner.variables) != right.render(runner.variables)
+    raise ScriptError(f"无效的条件: {cond}", line_no)
+
+
+class ScriptRunner:
+    """在调用线程中执行 Program：发送、等待回复并记录每次 expect 的结果和往返时延
+
+    :param log: 日志回调 log(msg, level)
+    :param on_result: 每次 expect/fail 的结果回调，参数为 dict(cmd, ok, latency_ms, frames)
+    :param on_send: 每次发送的回调，参数为指令文本
+    :param source: 接收器的原始数据订阅（Subscription）；为 None 时直接读串口（端口没有其他读取者时）
+    """
+
+    def __init__(self, program, serial_mgr, framer=None, log=None, on_result=None, on_send=None,
+                 variables=None, source=None):
+        self.program = program
+        self.serial = serial_mgr
+        self.source = source
+        self.framer = framer or DelimiterFramer()
+        self.log = log or (lambda msg, level="info": None)
+        self.on_result = on_result
+        self.on_send = on_send
+        self.variables = dict(variables or {})
+        self.results = []
+        self.last_ok = True
+        self._running = True
+
+    def stop(self):
+        self._running = False
+        if self.source is not None:
+            self.source.wake()
+
+    @property
+    def running(self):
+        return self._running
+
+    def run(self, loops=1, interval_ms=0):
+        """整个程序执行 loops 轮；interval_ms 为相邻两次发送之间的最小间隔"""
+        loops = max(1, loops)
+        for loop_idx in range(loops):
+            if not self._running:
+                self.log("自动化已停止")
+                break
+            if loops > 1:
+                self.log(f"开始第 {loop_idx + 1}/{loops} 轮")
+            if self._execute(interval_ms / 1000) != ROUND_DONE:
+                break
+        return self.results
+
+    def summary(self):
+        measured = [r["latency_ms"] for r in self.results if r["latency_ms"] is not None]
+        passed = sum(1 for r in self.results if r["ok"])
+        return {
+            "steps": len(self.results),
+            "passed": passed,
+            "failed": len(self.results) - passed,
+            "latency_avg_ms": sum(measured) / len(measured) if measured else None,
+            "latency_max_ms": max(measured) if measured else None,
+        }
+
+    def _execute(self, interval):
+        """执行一轮，返回 ROUND_DONE / ROUND_STOP（遇到 stop 语句）/ ROUND_ABORT（遇到 fail 或被停止）"""
+        instrs = self.program.instrs
+        count = len(instrs)
+        counters = [0] * self.program.loop_slots
+        variables = self.variables
+        serial = self.serial
+        log = self.log
+        perf = time.perf_counter
+        last_cmd = ""
+        sent_at = 0.0
+        ready_at = 0.0
+        pc = 0
+        while pc < count:
+            if not self._running:
+                return ROUND_ABORT
+            op, a, b = instrs[pc]
+            pc += 1
+            try:
+                if op == SEND:
+                    hex_flag, end, payload = b
+                    if payload is None:
+                        last_cmd = a.render(variables)
+                        try:
+                            payload = compile_command(last_cmd, hex_flag, end).payload
+                        except ValueError:
+                            raise ScriptError(f"HEX 格式错误: {last_cmd}") from None
+                    else:
+                        last_cmd = a.static
+                    if interval and ready_at:
+                        self._sleep(ready_at - perf())
+                    self._drain()
+                    if self.on_send:
+                        self.on_send(last_cmd)
+                    sent_at = perf()
+                    # 发送队列满时等待排空
+                    while not serial.send_bytes(payload, block=True, timeout=0.1):
+                        if not serial.is_open:
+                            raise ScriptError("发送失败，串口未打开")
+                        if not self._running:
+                            return ROUND_ABORT
+                    log(f"发送: {last_cmd}")
+                    ready_at = perf() + interval
+                elif op == EXPECT:
+                    frames, ok = self._wait_for(a, sent_at)
+                    latency_ms = (perf() - sent_at) * 1000
+                    if self.source is None:
+                        # 有订阅时接收器已经显示并记录了每一帧
+                        for line in frames:
+                            log(f"接收: {line}")
+                    if ok:
+                        log(f"✅ 收到期望回复，耗时 {latency_ms:.1f} ms")
+                    else:
+                        log(f"❌ 等待 {a.describe()} 超时 ({a.timeout * 1000:.0f} ms)", "error")
+                    self.last_ok = ok
+                    self._record(last_cmd, ok, latency_ms, len(frames))
+                    ready_at = perf() + interval
+                elif op == DELAY:
+                    self._sleep(a if not isinstance(a, Template) else float(a.render(variables)) / 1000)
+                elif op == LOOP_NEXT:
+                    counters[a] -= 1
+                    if counters[a] > 0:
+                        target, var = b
+                        if var:
+                            variables[var] += 1
+                        pc = target
+                elif op == LOOP_INIT:
+                    n, var, end_pc = b
+                    if isinstance(n, Template):
+                        n = int(n.render(variables), 0)
+                    counters[a] = n
+                    if var:
+                        variables[var] = 0
+                    if n <= 0:
+                        pc = end_pc
+                elif op == JUMP:
+                    pc = a
+                elif op == JUMP_IF_NOT:
+                    if not b(self):
+                        pc = a
+                elif op == SET:
+                    variables[a] = b.render(variables)
+                elif op == INC:
+                    try:
+                        variables[a] = int(variables.get(a, 0)) + b
+                    except ValueError:
+                        raise ScriptError(f"变量不是数字: {a}") from None
+                elif op == LOG:
+                    log(a.render(variables))
+                elif op == FAIL:
+                    msg = a.render(variables)
+                    log(f"❌ {msg}", "error")
+                    self._record(msg, False, None, 0)
+                    return ROUND_ABORT
+                elif op == STOP:
+                    return ROUND_STOP
+            except ScriptError as e:
+                log(f"❌ 脚本错误: {e}", "error")
+                self._record(last_cmd, False, None, 0)
+                return ROUND_ABORT
+        return ROUND_DONE
+
+    def _record(self, cmd, ok, latency_ms, frames):
+        result = {"cmd": cmd, "ok": ok, "latency_ms": latency_ms, "frames": frames}
+        self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    def _wait_for(self, expect, sent_at):
+        """读取回复直到满足期望或超时，返回 (收到的帧文本列表, 是否满足)"""
+        frames = []
+        raw = bytearray()
+        deadline = sent_at + expect.timeout
+        source = self.source
+        while self._running:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or (source is not None and source.closed):
+                break
+            # 直接读串口时无数据只短暂休眠，避免阻塞读取越过超时时间；订阅队列收到数据会立即唤醒
+            wait = remaining if source is not None else min(remaining, 0.001)
+            framer_deadline = self.framer.next_deadline()
+            if framer_deadline is not None:
+                wait = min(wait, max(0.0, framer_deadline - time.monotonic()))
+            chunk = self._read(wait)
+            if chunk and expect.data is not None:
+                raw += chunk
+            new_frames = self._frames_from(chunk)
+            frames.extend(new_frames)
+            if expect.data is not None and expect.data in raw:
+                return frames, True
+            if expect.frames and len(frames) >= expect.frames:
+                return frames, True
+            if expect.regex is not None:
+                for line in new_frames:
+                    m = expect.regex.search(line)
+                    if m:
+                        self.variables["reply"] = line
+                        self.variables.update(m.groupdict())
+                        return frames, True
+        return frames, False
+
+    def _read(self, timeout):
+        """读取新到的数据，没有数据时最多等待 timeout 秒后返回 b"""""
+        if self.source is not None:
+            return b"".join(self.source.get(timeout))
+        if self.serial.bytes_waiting():
+            return self.serial.read_chunk() or b""
+        if timeout > 0:
+            time.sleep(timeout)
+        return b""
+
+    def _frames_from(self, chunk):
+        """分帧并转换为文本"""
+        framer = self.framer
+        frames = framer.feed(chunk) if chunk else framer.poll()
+        if framer.text:
+            return [line for line in (f.decode("utf-8", errors="ignore").strip() for f in frames) if line]
+        return [f.hex(" ").upper() for f in frames]
+
+    def _drain(self):
+        """丢弃残留的数据，避免把迟到的回复算到下一步"""
+        if self.source is not None:
+            # 接收器已经显示并记录了这些数据
+            self.source.get()
+        else:
+            while self.serial.bytes_waiting():
+                for line in self._frames_from(self.serial.read_chunk() or b""):
+                    self.log(f"接收(未匹配): {line}")
+        self.framer.reset()
+
+    def _sleep(self, seconds):
+        """可被 stop() 打断的休眠"""
+        deadline = time.perf_counter() + seconds
+        while self._running:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.05))
@@ -1,25 +1,73 @@
+from functools import lru_cache
+
 import serial
 import serial.tools.list_ports
 
+from manager.stats import SIZE_BUCKETS, Stats
+
+
+class CompiledCommand:
+    """预编译的指令：保存最终写入串口的字节，重复发送时无需再解析"""
+    __slots__ = ("text", "hex_flag", "end", "payload")
+
+    def __init__(self, text, hex_flag, end, payload):
+        self.text = text
+        self.hex_flag = hex_flag
+        self.end = end
+        self.payload = payload
+
+
+@lru_cache(maxsize=1024)
+def compile_command(text: str, hex_flag=False, end=b"\r\n"):
+    """把指令文本转换为要发送的字节（HEX 解析/UTF-8 编码 + 结尾符），结果按参数缓存"""
+    if hex_flag:
+        data = text.upper().replace(" ", "")
+        if len(data) % 2 != 0:
+            data += "0"
+        payload = bytes.fromhex(data) + end  # 去空格后转字节
+    else:
+        payload = text.encode("utf-8") + end
+    return CompiledCommand(text, bool(hex_flag), end, payload)
+
 
 class SerialManager:
+    # in_waiting 不是字节数的端口一次最多读取的字节数
+    READ_SIZE = 65536
+
     def __init__(self):
         self.ser = None
+        # in_waiting 是否为真实的字节数：socket:// 的 in_waiting 只是 select 检查（0 或 1）
+        self._waiting_is_count = True
+        # 该串口的收发统计，接收线程、日志和发送线程共用
+        self.stats = Stats()
+        self._rx_bytes = self.stats.counter("rx_bytes", "B")
+        self._rx_reads = self.stats.histogram("rx_read_size", SIZE_BUCKETS, "B")
+        self._tx_bytes = self.stats.counter("tx_bytes", "B")
+        self._tx_writes = self.stats.counter("tx_writes")
+        # 发送队列（TxWriter），设置后 send/send_bytes 只入队，由其写线程写入串口
+        self.writer = None
 
     @staticmethod
     def list_ports():
         """返回所有串口信息"""
         return list(serial.tools.list_ports.comports())
 
-    def open(self, port, baud_rate=9600, bytesize=8, parity="N", stop_bits=1, timeout=0.1):
+    def open(self, port, baud_rate=9600, bytesize=8, parity="N", stop_bits=1, timeout=0.1, flow_control="none"):
+        """打开串口，port 也可以是 pyserial 的 URL（如 socket://host:port、loop://）
+
+        :param flow_control: 流控方式 "none" / "rtscts"（硬件）/ "xonxoff"（软件），由驱动执行
+        """
+        self._waiting_is_count = not str(port).lower().startswith("socket://")
         try:
-            self.ser = serial.Serial(
-                port=port,
+            self.ser = serial.serial_for_url(
+                port,
                 baudrate=baud_rate,
                 bytesize=bytesize,
                 parity=parity,
                 stopbits=stop_bits,
-                timeout=timeout
+                timeout=timeout,
+                rtscts=flow_control == "rtscts",
+                xonxoff=flow_control == "xonxoff",
             )
             return True
         except Exception as e:
@@ -28,26 +76,96 @@ class SerialManager:
             return False
 
     def close(self):
-        """关闭串口"""
+        """关闭串口（先尽量写完发送队列中的数据）"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
         if self.ser and self.ser.is_open:
             self.ser.close()
         self.ser = None
 
     def send(self, data: str, hex_flag=False, end=b"\r\n"):
         """发送数据"""
-        print(f"发送数据: {data}, hex_flag: {hex_flag}, end: {end}")
         if self.ser and self.ser.is_open:
-            if hex_flag:
-                data = data.upper().replace(" ", "")
-                if len(data) % 2 != 0:
-                    data += "0"
-                data = bytes.fromhex(data)  # 去空格后转字节
-                self.ser.write(data + end)
-            else:
-                self.ser.write(data.encode("utf-8") + end)  # 默认加换行
+            return self.send_bytes(compile_command(data, hex_flag, end).payload)
+        return False
+
+    @property
+    def is_open(self):
+        """串口已打开且发送队列（如有）仍在工作；send_bytes 返回 False 时用它区分串口关闭和队列满"""
+        ser = self.ser
+        return bool(ser and ser.is_open) and (self.writer is None or not self.writer.closed)
+
+    def send_bytes(self, payload, block=False, timeout=None):
+        """写入已编码好的字节（配合 compile_command 使用），有发送队列时只入队
+
+        :param block: 发送队列已满时等待而不是返回 False（大量连续发送时使用）
+        :param timeout: block=True 时最多等待的秒数，超时返回 False
+        """
+        ser = self.ser
+        if ser and ser.is_open:
+            writer = self.writer
+            if writer is not None:
+                return writer.submit(payload, block, timeout)
+            ser.write(payload)
+            self.record_write(len(payload))
             return True
         return False
 
+    def bytes_waiting(self):
+        """返回接收缓冲区中待读取的字节数"""
+        if self.ser and self.ser.is_open:
+            return self.ser.in_waiting
+        return 0
+
+    def read_chunk(self):
+        """阻塞读取当前所有可用字节（至少等待 1 字节，最长等待 timeout），串口未打开时返回 None"""
+        ser = self.ser
+        if ser and ser.is_open:
+            if self._waiting_is_count:
+                data = ser.read(ser.in_waiting or 1)
+            elif ser.in_waiting:
+                data = self._read_now(ser)
+            else:
+                # 等到首字节后再一次读出随后到达的数据
+                data = ser.read(1)
+                if data:
+                    data += self._read_now(ser)
+            if data:
+                self.record_read(len(data))
+            return data
+        return None
+
+    def read_available(self):
+        """不等待，读取当前已到达的字节（没有时返回 b""），串口未打开时返回 None"""
+        ser = self.ser
+        if ser and ser.is_open:
+            if not ser.in_waiting:
+                return b""
+            data = ser.read(ser.in_waiting) if self._waiting_is_count else self._read_now(ser)
+            if data:
+                self.record_read(len(data))
+            return data
+        return None
+
+    def _read_now(self, ser):
+        """超时临时设为 0，读取最多 READ_SIZE 字节（只用于 socket://，修改超时不涉及串口驱动设置）"""
+        timeout = ser.timeout
+        ser.timeout = 0
+        try:
+            return ser.read(self.READ_SIZE)
+        finally:
+            ser.timeout = timeout
+
+    def record_read(self, size):
+        """记录一次读取（绕过 read_chunk 直接读文件描述符的接收器也调用）"""
+        self._rx_bytes.add(size)
+        self._rx_reads.record(size)
+
+    def record_write(self, size):
+        self._tx_bytes.add(size)
+        self._tx_writes.add()
+
     def read(self):
         if self.ser and self.ser.is_open and self.ser.in_waiting:
             try:
@@ -0,0 +1,208 @@
+import functools
+import os
+import re
+
+from manager.capture_manager import RawCaptureWriter, RingCaptureWriter
+from manager.framer import create_framer
+from manager.log_manager import LogManager
+from manager.serial_manager import SerialManager
+from thread.async_receiver import AsyncIOHub, AsyncReceiver
+from thread.serial_receiver import SerialReceiver
+from thread.tx_writer import TxWriter
+
+
+# 流控方式 -> 显示名称（"none" 不显示）
+FLOW_CONTROL_NAMES = {"rtscts": "RTS/CTS", "xonxoff": "XON/XOFF"}
+
+
+def safe_port_name(port):
+    """端口名转换为可用作目录名的形式，如 /dev/ttyUSB0 -> dev_ttyUSB0"""
+    return re.sub(r"[^\w.-]+", "_", port).strip("_") or "port"
+
+
+class Session:
+    """单个串口的会话：串口、接收线程、分帧器、日志和自动化任务按端口独立
+
+    接收线程和日志在 open() 时才创建，close() 后释放，未打开的会话只占用少量内存。
+    """
+
+    def __init__(self, port, log_root="logs"):
+        self.port = port
+        self.log_root = log_root
+        self.serial = SerialManager()
+        self.params = {}
+        self.framer_config = None
+        self.log_mgr = None
+        self.receiver = None
+        self.auto_thread = None
+        self.send_scheduler = None
+        self.transfer_thread = None
+
+    @property
+    def log_dir(self):
+        return os.path.join(self.log_root, safe_port_name(self.port))
+
+    @property
+    def is_open(self):
+        """端口已打开，且接收没有因读取失败而停止"""
+        ser = self.serial.ser
+        return bool(ser and ser.is_open) and (self.receiver is None or self.receiver.error is None)
+
+    def describe(self):
+        p = self.params
+        if not p:
+            return self.port
+        flow = FLOW_CONTROL_NAMES.get(p.get("flow_control", "none"), "")
+        return f"{self.port} @ {p['baud_rate']}, {p['bytesize']}{p['parity']}{p['stop_bits']:g}" + (
+            f", {flow}" if flow else "")
+
+    def open(self, baud_rate=115200, bytesize=8, parity="N", stop_bits=1, framer_config=None,
+             capture=False, decode_text=True, log_options=None, hub=None, capture_ring_mb=0, flow_control="none",
+             tx_options=None):
+        """打开串口并创建接收器（未启动，连接信号后调用 start()）
+
+        :param capture_ring_mb: 大于 0 时抓包写入该大小的内存映射环形文件（高波特率长时间抓包），否则按块追加写入
+        :param hub: AsyncIOHub，指定时由共享的 asyncio I/O 线程接收，否则每个端口一个接收线程
+        :param tx_options: 发送队列 TxWriter 的参数（max_batch、max_delay_ms 等）
+        """
+        if self.serial.ser is not None:
+            # 已打开（读取失败的会话要先 close() 再重新打开）
+            return self.is_open
+        if not self.serial.open(self.port, baud_rate, bytesize, parity, stop_bits, flow_control=flow_control):
+            return False
+        # 后续任何一步失败（日志目录不可写、磁盘满、映射失败等）都要关闭串口，否则端口一直被占用
+        new_log_mgr = None
+        capture_writer = None
+        try:
+            # 发送都经过该端口的写线程，界面线程不会被慢速写入阻塞
+            self.serial.writer = TxWriter(self.serial, **(tx_options or {}))
+            self.serial.writer.start()
+            if self.log_mgr is None:
+                self.log_mgr = new_log_mgr = LogManager(self.log_dir, stats=self.serial.stats, **(log_options or {}))
+            if capture:
+                capture_writer = (RingCaptureWriter(self.log_dir, capture_ring_mb * 1024 * 1024) if capture_ring_mb
+                                  else RawCaptureWriter(self.log_dir))
+            receiver_cls = SerialReceiver if hub is None else functools.partial(AsyncReceiver, hub)
+            self.receiver = receiver_cls(self.serial, self.log_mgr, capture=capture_writer, decode_text=decode_text,
+                                         framer=create_framer(framer_config))
+        except Exception as e:
+            print(f"打开会话失败: {e}")
+            if capture_writer is not None:
+                capture_writer.close()
+            if new_log_mgr is not None:
+                new_log_mgr.close()
+                self.log_mgr = None
+            self.receiver = None
+            self.serial.close()
+            return False
+        self.params = {"baud_rate": baud_rate, "bytesize": bytesize, "parity": parity, "stop_bits": stop_bits,
+                       "flow_control": flow_control}
+        self.framer_config = framer_config
+        return True
+
+    def start(self):
+        if self.receiver and not self.receiver.isRunning():
+            self.receiver.start()
+
+    def set_framer_config(self, config):
+        """切换分帧方式，接收中在两次读取之间生效，已收到但未成帧的数据不丢失"""
+        self.framer_config = config
+        if self.receiver:
+            self.receiver.set_framer(create_framer(config))
+
+    def stop_tasks(self):
+        """停止循环发送、自动化和文件发送任务"""
+        if self.send_scheduler is not None and self.send_scheduler.isRunning():
+            self.send_scheduler.stop()
+        if self.transfer_thread is not None and self.transfer_thread.isRunning():
+            self.transfer_thread.stop()
+        if self.auto_thread is not None and self.auto_thread.isRunning():
+            self.auto_thread.stop()
+            self.auto_thread.wait()
+
+    def close(self):
+        """停止所有任务和接收线程，关闭串口和日志"""
+        self.stop_tasks()
+        if self.receiver is not None:
+            self.receiver.stop()
+            if self.receiver.capture:
+                self.receiver.capture.close()
+            self.receiver = None
+        self.serial.close()
+        if self.log_mgr is not None:
+            self.log_mgr.close()
+            self.log_mgr = None
+
+
+class SessionManager:
+    """按端口管理多个并发会话"""
+
+    def __init__(self, log_root="logs", log_options=None, backend="thread"):
+        """
+        :param log_options: 创建各会话 LogManager 的参数（max_bytes、rotate_interval 等）
+        :param backend: 接收方式，"thread" 每个端口一个接收线程，"asyncio" 所有端口共用一个 I/O 线程
+        """
+        self.log_root = log_root
+        self.backend = backend
+        # asyncio 后端的 I/O 线程，第一次打开端口时创建
+        self._hub = None
+        self.log_options = dict(log_options or {})
+        self.logging_flag = True
+        # port -> Session，按打开顺序排列
+        self._sessions = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+    def __contains__(self, port):
+        return port in self._sessions
+
+    def get(self, port):
+        return self._sessions.get(port)
+
+    def open_session(self, port, **params):
+        """打开端口对应的会话，失败返回 None"""
+        session = self._sessions.get(port) or Session(port, self.log_root)
+        hub = None
+        if self.backend == "asyncio":
+            if self._hub is None:
+                self._hub = AsyncIOHub()
+            hub = self._hub
+        if not session.open(log_options=self.log_options, hub=hub, **params):
+            return None
+        session.log_mgr.set_logging_flag(self.logging_flag)
+        self._sessions[port] = session
+        return session
+
+    def close_session(self, port):
+        session = self._sessions.pop(port, None)
+        if session:
+            session.close()
+        return session
+
+    def close_all(self):
+        for port in list(self._sessions):
+            self.close_session(port)
+
+    def close(self):
+        """关闭所有会话并停止 I/O 线程"""
+        self.close_all()
+        if self._hub is not None:
+            self._hub.stop()
+            self._hub = None
+
+    def set_log_options(self, logging_flag=None, **options):
+        """更新日志参数，已打开的会话立即生效"""
+        self.log_options.update(options)
+        if logging_flag is not None:
+            self.logging_flag = logging_flag
+        for session in self._sessions.values():
+            if session.log_mgr is None:
+                continue
+            for key, value in options.items():
+                setattr(session.log_mgr, key, value)
+            if logging_flag is not None:
+                session.log_mgr.set_logging_flag(logging_flag)
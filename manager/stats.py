@@ -0,0 +1,153 @@
+"""收发热点路径的计数器、直方图和瞬时值
+
+记录操作只做整数加法和一次二分查找，不加锁：每个指标通常只由一个线程写入
+（接收线程、日志写线程、发送线程），界面线程只读。多个线程同时写同一计数时，
+极少数情况下可能丢失一次累加，对统计用途没有影响。
+"""
+import datetime
+import json
+import math
+import time
+from bisect import bisect_left
+
+# 读取字节数的桶上限
+SIZE_BUCKETS = (1, 8, 64, 256, 1024, 4096, 16384, 65536)
+# 时延（ms）的桶上限
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+# 发送抖动（µs）的桶上限
+JITTER_BUCKETS_US = (10, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 50000)
+
+
+class Counter:
+    """单调递增的计数"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def add(self, n=1):
+        self.value += n
+
+    def reset(self):
+        self.value = 0
+
+    def snapshot(self):
+        return {"value": self.value}
+
+
+class Gauge:
+    """瞬时值（如队列深度），同时记录出现过的最大值"""
+    __slots__ = ("value", "max")
+
+    def __init__(self):
+        self.value = 0
+        self.max = 0
+
+    def set(self, value):
+        self.value = value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.value = 0
+        self.max = 0
+
+    def snapshot(self):
+        return {"value": self.value, "max": self.max}
+
+
+class Histogram:
+    """固定桶直方图：百分位数取所在桶的上限（最后一个桶取最大值）"""
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        buckets = {f"<={bound:g}": n for bound, n in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max if self.count else None,
+            "buckets": buckets,
+        }
+
+
+class Stats:
+    """一组命名指标（一个串口一组），同名指标只创建一次"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._units = {}
+        self.started = time.monotonic()
+
+    def counter(self, name, unit=""):
+        return self._get(name, unit, Counter)
+
+    def gauge(self, name, unit=""):
+        return self._get(name, unit, Gauge)
+
+    def histogram(self, name, bounds, unit=""):
+        return self._get(name, unit, lambda: Histogram(bounds))
+
+    def _get(self, name, unit, factory):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, factory())
+            self._units[name] = unit
+        return metric
+
+    def reset(self):
+        for metric in list(self._metrics.values()):
+            metric.reset()
+        self.started = time.monotonic()
+
+    def snapshot(self):
+        """所有指标的当前值：{"uptime_s": 秒, "metrics": {名称: {"type", "unit", ...}}}"""
+        metrics = {}
+        for name, metric in list(self._metrics.items()):
+            values = metric.snapshot()
+            values["type"] = type(metric).__name__.lower()
+            values["unit"] = self._units.get(name, "")
+            metrics[name] = values
+        return {"uptime_s": time.monotonic() - self.started, "metrics": metrics}
+
+    def dump(self, path, **extra):
+        """把快照保存为 JSON，成功返回 True"""
+        data = {"time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"), **extra, **self.snapshot()}
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"保存统计失败: {e}")
+            return False
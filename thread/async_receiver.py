@@ -0,0 +1,343 @@
+import asyncio
+import collections
+import os
+import threading
+import time
+
+from thread.serial_receiver import SerialReceiver
+
+# 无文件描述符的端口（Windows 串口、loop:// 等）退化为轮询的间隔
+POLL_INTERVAL = 0.005
+
+
+class AsyncIOHub:
+    """单个 I/O 线程上的 asyncio 事件循环：所有端口的文件描述符注册到同一个 selector，空闲时不唤醒"""
+
+    def __init__(self):
+        # 显式使用 selector 循环（Windows 默认的 Proactor 不支持 add_reader）
+        self.loop = asyncio.SelectorEventLoop()
+        self._thread = threading.Thread(target=self._run, name="AsyncSerialIO", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def call(self, fn, *args):
+        """在 I/O 线程中执行 fn 并等待其返回"""
+        if threading.current_thread() is self._thread:
+            return fn(*args)
+
+        async def wrapper():
+            return fn(*args)
+
+        return asyncio.run_coroutine_threadsafe(wrapper(), self.loop).result()
+
+    def submit(self, coro):
+        """提交协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def add_port(self, serial_mgr, framer, on_frames=None, on_data=None, on_error=None):
+        port = AsyncPort(self, serial_mgr, framer, on_frames, on_data, on_error)
+        self.call(port.attach)
+        return port
+
+    def stop(self):
+        if self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+
+
+class AsyncPort:
+    """注册在 AsyncIOHub 上的一个端口：可读时读取并分帧，提供异步的 read_frame / write
+
+    除 read_frame / write 外的方法都只能在 I/O 线程中调用。
+    :param on_frames: 分出帧时的回调（在 I/O 线程中调用）
+    :param on_data: 收到原始数据时的回调（在 I/O 线程中调用，用于抓包）
+    :param on_error: 读取失败、端口停止接收时的回调 on_error(异常)（在 I/O 线程中调用）
+    """
+
+    def __init__(self, hub, serial_mgr, framer, on_frames=None, on_data=None, on_error=None, max_queue=10000):
+        self.hub = hub
+        self.loop = hub.loop
+        self.serial = serial_mgr
+        self.framer = framer
+        self.on_frames = on_frames
+        self.on_data = on_data
+        self.on_error = on_error
+        self.error = None
+        # 供 read_frame 取用的帧，第一次调用 read_frame 后才开始排队，满了丢弃最早的
+        self.max_queue = max_queue
+        self._frames = None
+        self._waiter = None
+        self._timer = None
+        self._poll_task = None
+        self._wbuf = bytearray()
+        self._drained = None
+        self._closed = False
+        self._fd = None
+        try:
+            self._fd = serial_mgr.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            # 没有文件描述符的端口，使用轮询
+            self._fd = None
+
+    @property
+    def uses_selector(self):
+        return self._fd is not None
+
+    def attach(self):
+        if self._fd is not None:
+            self.loop.add_reader(self._fd, self._on_readable)
+        else:
+            self._poll_task = self.loop.create_task(self._poll())
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self.loop.remove_writer(self._fd)
+        if self._poll_task:
+            self._poll_task.cancel()
+        if self._timer:
+            self._timer.cancel()
+        self._wake(ConnectionError("端口已关闭"))
+        if self._drained and not self._drained.done():
+            self._drained.set_exception(ConnectionError("端口已关闭"))
+
+    def replace_framer(self, framer):
+        """换上新的分帧器（只在 I/O 线程中调用），旧分帧器中未成帧的数据交给新分帧器"""
+        old = self.framer
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        self.framer = framer
+        leftover = old.take_pending() if old is not None else b""
+        if framer is not None and leftover:
+            self._deliver(framer.feed(leftover, time.monotonic()))
+            self._schedule_timeout()
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+        if not data:
+            # 可读但读不到数据：设备已断开
+            self._fail(ConnectionError("设备已断开"))
+            return
+        self.serial.record_read(len(data))
+        self._feed(data)
+
+    async def _poll(self):
+        while not self._closed:
+            try:
+                data = self.serial.read_available()
+                if data is None:
+                    raise ConnectionError("串口已关闭")
+                if data:
+                    self._feed(data)
+                    continue
+            except Exception as e:
+                self._fail(e)
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _fail(self, error):
+        print(f"串口读取失败: {error}")
+        self.error = error
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+        self._wake(error)
+        if self.on_error:
+            self.on_error(error)
+
+    def _feed(self, data):
+        if self.on_data:
+            self.on_data(data)
+        framer = self.framer
+        if framer is None:
+            return
+        self._deliver(framer.feed(data, time.monotonic()))
+        self._schedule_timeout()
+
+    def _schedule_timeout(self):
+        """超时分帧：在分帧器的截止时间触发一次 poll，没有待定数据时不设定时器"""
+        deadline = self.framer.next_deadline()
+        if deadline is None or self._timer is not None:
+            return
+        self._timer = self.loop.call_later(max(0.0, deadline - time.monotonic()), self._on_timeout)
+
+    def _on_timeout(self):
+        self._timer = None
+        self._deliver(self.framer.poll(time.monotonic()))
+        self._schedule_timeout()
+
+    def _deliver(self, frames):
+        if not frames:
+            return
+        if self._frames is not None:
+            self._frames.extend(frames)
+            self._wake(None)
+        if self.on_frames:
+            self.on_frames(frames)
+
+    def _wake(self, error):
+        waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+    async def read_frame(self, timeout=None):
+        """读取一帧，超时抛出 asyncio.TimeoutError"""
+        if self._frames is None:
+            self._frames = collections.deque(maxlen=self.max_queue)
+        while not self._frames:
+            if self._closed or self.error:
+                raise ConnectionError(str(self.error or "端口已关闭"))
+            self._waiter = self.loop.create_future()
+            try:
+                await asyncio.wait_for(self._waiter, timeout)
+            finally:
+                self._waiter = None
+        return self._frames.popleft()
+
+    async def write(self, data):
+        """写入数据，输出缓冲满时等待可写而不阻塞事件循环"""
+        self.serial.record_write(len(data))
+        if self._fd is None:
+            self.serial.ser.write(data)
+            return
+        if not self._wbuf:
+            try:
+                n = os.write(self._fd, data)
+            except BlockingIOError:
+                n = 0
+            if n == len(data):
+                return
+            data = memoryview(data)[n:]
+        self._wbuf += data
+        if self._drained is None or self._drained.done():
+            self._drained = self.loop.create_future()
+            self.loop.add_writer(self._fd, self._on_writable)
+        await asyncio.shield(self._drained)
+
+    def _on_writable(self):
+        try:
+            n = os.write(self._fd, self._wbuf)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.loop.remove_writer(self._fd)
+            self._wbuf.clear()
+            self._drained.set_exception(e)
+            return
+        del self._wbuf[:n]
+        if not self._wbuf:
+            self.loop.remove_writer(self._fd)
+            self._drained.set_result(None)
+
+    def write_threadsafe(self, data):
+        """从其他线程写入，返回 concurrent.futures.Future"""
+        return self.hub.submit(self.write(bytes(data)))
+
+
+class AsyncReceiver(SerialReceiver):
+    """与 SerialReceiver 接口相同的接收器，但不启动自己的线程：读取、分帧和合并刷新都在 AsyncIOHub 的事件循环中完成"""
+
+    def __init__(self, hub, serial, log_mgr=None, flush_interval_ms=30, capture=None, decode_text=True, framer=None):
+        self.hub = hub
+        self.port = AsyncPort(hub, serial, None)
+        self._flush_handle = None
+        self._active = False
+        super().__init__(serial, log_mgr, flush_interval_ms, capture, decode_text, framer)
+
+    @property
+    def framer(self):
+        return self.port.framer if self.decode_text else None
+
+    @framer.setter
+    def framer(self, framer):
+        self._framer = framer
+        if self._active:
+            self.hub.call(self._set_port_framer)
+        else:
+            self._set_port_framer()
+
+    def _set_port_framer(self):
+        self.port.framer = self._framer if self.decode_text else None
+
+    def set_framer(self, framer):
+        """切换分帧方式：在 I/O 线程中换上，不与正在进行的分帧竞争"""
+        self._framer = framer
+        if not self.decode_text:
+            return
+        if self._active:
+            self.hub.loop.call_soon_threadsafe(self.port.replace_framer, framer)
+        else:
+            self.port.framer = framer
+
+    def start(self, priority=None):
+        if self._active:
+            return
+        self._active = True
+        self.port.on_frames = self._on_frames
+        self.port.on_data = self._on_data
+        self.port.on_error = self._on_error
+        self._set_port_framer()
+        self.hub.call(self.port.attach)
+
+    def isRunning(self):
+        return self._active
+
+    def _on_data(self, data):
+        if self.capture:
+            self.capture.write_chunk(data)
+        self.fanout.publish_raw(data)
+
+    def _on_error(self, error):
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self.error = error
+        self._flush()
+        self.failed.emit(str(error))
+
+    def _on_frames(self, frames):
+        self._handle_frames(frames)
+        # 按固定帧率合并刷新：有待刷新数据时才设定时器
+        if self._pending and self._flush_handle is None:
+            delay = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            self._flush_handle = self.hub.loop.call_later(delay, self._on_flush_timer)
+
+    def _on_flush_timer(self):
+        self._flush_handle = None
+        self._flush()
+
+    def stop(self):
+        if not self._active:
+            return
+        self._active = False
+
+        def detach():
+            self.port.close()
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+            self._flush()
+
+        self.hub.call(detach)
+        self.fanout.close()
+
+    def wait(self, *args):
+        return True
@@ -1,77 +1,76 @@
-import time
+from PyQt5.QtCore import QThread, pyqtSignal
 
-from PyQt5.QtCore import QThread, pyqtSignal, QSettings
+from manager.script_engine import AutomationStep, Program, ScriptRunner
 
 
 class AutomationThread(QThread):
     log_signal = pyqtSignal(str)  # 显示到UI
     send_signal = pyqtSignal(str)  # 实际发送到串口
+    step_result = pyqtSignal(dict)  # 每步结果: cmd, ok, latency_ms, frames
     finished_signal = pyqtSignal()
 
-    def __init__(self, cmds, serial_mgr, log_mgr, interval_ms=500, loops=1, logging_flag=True):
+    def __init__(self, cmds, serial_mgr, log_mgr, interval_ms=500, loops=1, logging_flag=True,
+                 hex_flag=False, end=b"\r\n", expect=None, framer=None, variables=None, receiver=None):
+        """
+        :param cmds: 编译好的脚本 Program，或指令字符串 / AutomationStep 列表
+        :param expect: 字符串指令使用的默认期望（None 表示发送后不等待回复）
+        :param receiver: 正在读取该端口的接收器，运行期间订阅它的数据而不直接读串口
+        """
         super().__init__()
-        self.cmds = cmds[:]
+        if isinstance(cmds, Program):
+            self.program = cmds
+        else:
+            self.program = Program.from_steps(
+                [cmd if isinstance(cmd, AutomationStep) else AutomationStep(cmd, hex_flag, end, expect)
+                 for cmd in cmds])
         self.serial = serial_mgr
         self.log_mgr = log_mgr
-        self.interval_ms = max(1, interval_ms)
+        self.interval_ms = max(0, interval_ms)
         self.loops = max(1, loops)
-        self._running = True
         self.logging_flag = logging_flag
+        self.receiver = receiver
+        self.runner = ScriptRunner(self.program, serial_mgr, framer, log=self._log,
+                                   on_result=self.step_result.emit, on_send=self.send_signal.emit,
+                                   variables=variables)
+
+    @property
+    def results(self):
+        return self.runner.results
 
     def set_logging_flag(self, flag):
         print(f"设置自动化日志记录状态: {flag}")
         self.logging_flag = flag
 
-    def run(self, hex_flag=False, end=b"\r\n"):
+    def run(self):
+        if self.receiver is not None:
+            self.runner.source = self.receiver.subscribe()
         try:
-            total_steps = self.loops * len(self.cmds)
-            step = 0
-            for loop_idx in range(self.loops):
-                if not self._running:
-                    self._log("自动化已停止")
-                    break
-                self._log(f"开始第 {loop_idx + 1}/{self.loops} 轮")
-                for cmd in self.cmds:
-                    if not self._running:
-                        break
-                    step += 1
-                    self._log(f"[自动发送] ({step}/{total_steps}) {cmd}")
-                    # 发送指令
-                    self.send_signal.emit(cmd)
-                    self.serial.send(cmd, hex_flag, end)
-                    # 立即写日志
-                    self._log(f"发送: {cmd}")
-
-                    # 接收返回数据
-                    time.sleep(0.05)
-                    recv_data = self._read_available()
-                    if recv_data:
-                        for line in recv_data:
-                            self._log(f"接收: {line}")
-
-                    time.sleep(self.interval_ms / 1000)
+            if self.program.name:
+                self._log(f"运行脚本: {self.program.name}")
+            self.runner.run(self.loops, self.interval_ms)
+            self._log_summary()
             self._log("自动化任务完成")
+        except Exception as e:
+            self._log(f"❌ 自动化异常: {e}", "error")
         finally:
+            if self.runner.source is not None:
+                self.receiver.unsubscribe(self.runner.source)
             self.finished_signal.emit()
 
-    def stop(self):
-        self._running = False
+    def _log_summary(self):
+        summary = self.runner.summary()
+        if not summary["steps"]:
+            return
+        msg = f"共 {summary['steps']} 步，通过 {summary['passed']}，失败 {summary['failed']}"
+        if summary["latency_avg_ms"] is not None:
+            msg += f"；往返时延 平均 {summary['latency_avg_ms']:.1f} ms，最大 {summary['latency_max_ms']:.1f} ms"
+        self._log(msg)
 
-    def _read_available(self):
-        """非阻塞读取串口所有可用数据"""
-        lines = []
-        if self.serial.ser and self.serial.ser.is_open:
-            while self.serial.ser.in_waiting:
-                try:
-                    line = self.serial.ser.readline().decode("utf-8", errors="ignore").strip()
-                    if line:
-                        lines.append(line)
-                except Exception:
-                    pass
-        return lines
+    def stop(self):
+        self.runner.stop()
 
     def _log(self, msg, level="info"):
         """同时写UI和日志文件"""
         self.log_signal.emit(msg)
-        if self.log_mgr:
-            self.log_mgr.write(msg)
+        if self.log_mgr and self.logging_flag:
+            self.log_mgr.write(msg, level)
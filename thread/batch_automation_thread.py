@@ -0,0 +1,171 @@
+import datetime
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.framer import create_framer
+from manager.log_manager import LogManager
+from manager.script_engine import ScriptRunner
+from manager.serial_manager import SerialManager
+from manager.session_manager import safe_port_name
+
+# 往返时延直方图的桶上限（ms），最后一个桶为超过最大上限的部分
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def latency_histogram(latencies, buckets=LATENCY_BUCKETS_MS):
+    """按桶统计时延分布，返回 {"<=1": n, ..., ">5000": n}"""
+    counts = [0] * (len(buckets) + 1)
+    for value in latencies:
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    hist = {f"<={bound}": count for bound, count in zip(buckets, counts)}
+    hist[f">{buckets[-1]}"] = counts[-1]
+    return hist
+
+
+def percentile(sorted_values, q):
+    """已排序数据的百分位数（最近秩法）"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(q / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(1, rank)) - 1]
+
+
+class BatchAutomationThread(QThread):
+    """同一脚本在多个端口上并行运行：线程池限制并发数，汇总各设备的结果和时延分布"""
+    log_signal = pyqtSignal(str)
+    device_finished = pyqtSignal(dict)  # 单个设备的结果
+    finished_signal = pyqtSignal(dict)  # 汇总结果
+
+    def __init__(self, program, ports, serial_params=None, framer_config=None, max_workers=8, loops=1,
+                 interval_ms=0, log_root="logs", logging_flag=True):
+        """
+        :param program: 编译好的脚本 Program（只读，各设备共用）
+        :param serial_params: 串口参数 (baud_rate, bytesize, parity, stop_bits)，通常来自硬件配置
+        """
+        super().__init__()
+        self.program = program
+        self.ports = list(ports)
+        self.serial_params = dict(serial_params or {})
+        self.framer_config = framer_config
+        self.max_workers = max(1, max_workers)
+        self.loops = max(1, loops)
+        self.interval_ms = interval_ms
+        self.logging_flag = logging_flag
+        self.batch_dir = os.path.join(log_root, f"batch_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        self.summary_file = os.path.join(self.batch_dir, "summary.json")
+        self._stopped = False
+        self._runners = set()
+        self._lock = threading.Lock()
+
+    def run(self):
+        started = datetime.datetime.now()
+        t0 = time.perf_counter()
+        results = []
+        try:
+            os.makedirs(self.batch_dir, exist_ok=True)
+            workers = min(self.max_workers, len(self.ports)) or 1
+            self.log_signal.emit(f"批量自动化开始：{len(self.ports)} 个端口，并发 {workers}")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="BatchAutomation") as pool:
+                futures = [pool.submit(self._run_device, index, port) for index, port in enumerate(self.ports)]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    state = "✅ 通过" if result["ok"] else f"❌ 失败 {result.get('error') or ''}"
+                    self.log_signal.emit(f"[{result['port']}] {state}（{result['elapsed_s']:.2f}s）")
+                    self.device_finished.emit(result)
+            summary = self._summarize(results, started, time.perf_counter() - t0)
+            with open(self.summary_file, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=4, ensure_ascii=False)
+            self.log_signal.emit(f"批量自动化结束：通过 {summary['passed_devices']}，失败 {summary['failed_devices']}，"
+                                 f"耗时 {summary['elapsed_s']:.2f}s，汇总: {self.summary_file}")
+        except Exception as e:
+            self.log_signal.emit(f"❌ 批量自动化异常: {e}")
+            summary = self._summarize(results, started, time.perf_counter() - t0)
+        self.finished_signal.emit(summary)
+
+    def _run_device(self, index, port):
+        """在线程池中运行一个设备，任何异常都记录到结果中"""
+        t0 = time.perf_counter()
+        result = {"port": port, "ok": False, "error": None, "steps": 0, "passed": 0, "failed": 0}
+        serial = SerialManager()
+        log_mgr = None
+        runner = None
+        try:
+            if self._stopped:
+                result["error"] = "已取消"
+                return result
+            if not serial.open(port, **self.serial_params):
+                result["error"] = "串口打开失败"
+                return result
+            log_mgr = LogManager(os.path.join(self.batch_dir, safe_port_name(port)), stats=serial.stats)
+            log_mgr.set_logging_flag(self.logging_flag)
+            result["log_file"] = log_mgr.log_file
+            runner = ScriptRunner(self.program, serial, create_framer(self.framer_config), log=log_mgr.write,
+                                  variables={"port": port, "index": index})
+            with self._lock:
+                self._runners.add(runner)
+            if self._stopped:
+                runner.stop()
+            runner.run(self.loops, self.interval_ms)
+
+            summary = runner.summary()
+            latencies = sorted(r["latency_ms"] for r in runner.results if r["latency_ms"] is not None)
+            result.update(summary)
+            result["ok"] = summary["failed"] == 0 and runner.running
+            if not runner.running:
+                result["error"] = "已停止"
+            result["latency_p50_ms"] = percentile(latencies, 50)
+            result["latency_p95_ms"] = percentile(latencies, 95)
+            result["latency_histogram"] = latency_histogram(latencies)
+            result["_latencies"] = latencies
+        except Exception as e:
+            result["error"] = str(e)
+        finally:
+            if runner is not None:
+                with self._lock:
+                    self._runners.discard(runner)
+            serial.close()
+            if log_mgr is not None:
+                log_mgr.close()
+            result["elapsed_s"] = time.perf_counter() - t0
+        return result
+
+    def _summarize(self, results, started, elapsed):
+        latencies = sorted(v for r in results for v in r.get("_latencies", ()))
+        devices = []
+        for r in sorted(results, key=lambda r: self.ports.index(r["port"])):
+            device = dict(r)
+            device.pop("_latencies", None)
+            devices.append(device)
+        return {
+            "script": self.program.name,
+            "started": started.strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_s": elapsed,
+            "workers": self.max_workers,
+            "loops": self.loops,
+            "passed_devices": sum(1 for r in results if r["ok"]),
+            "failed_devices": sum(1 for r in results if not r["ok"]),
+            "latency_p50_ms": percentile(latencies, 50),
+            "latency_p95_ms": percentile(latencies, 95),
+            "latency_max_ms": latencies[-1] if latencies else None,
+            "latency_histogram": latency_histogram(latencies),
+            "devices": devices,
+        }
+
+    def stop(self):
+        """停止所有设备（未开始的设备直接取消）"""
+        self._stopped = True
+        with self._lock:
+            for runner in self._runners:
+                runner.stop()
@@ -0,0 +1,48 @@
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.command_importer import import_commands
+
+
+class CommandImportThread(QThread):
+    """在后台解析指令文件，按批发出通过校验、去重后的指令"""
+    batch = pyqtSignal(list)  # [(指令, HEX, 追加回车), ...]
+    progress = pyqtSignal(int)  # 百分比
+    finished_signal = pyqtSignal(int, int, list, str)  # 导入条数, 重复条数, [(行号, 指令, 错误), ...], 失败原因
+
+    # 最多保留的错误条数（全部出错的大文件不必全部带回界面）
+    MAX_ERRORS = 1000
+
+    def __init__(self, path, existing=(), batch_size=2000):
+        """
+        :param existing: 当前列表中的指令，与之重复的不导入（在启动前复制，线程中不访问界面数据）
+        """
+        super().__init__()
+        self.path = path
+        self.existing = list(existing)
+        self.batch_size = batch_size
+        self._running = True
+
+    def run(self):
+        added = duplicates = 0
+        errors = []
+        failure = ""
+        try:
+            size = os.path.getsize(self.path) or 1
+            for commands, dup, errs, pos in import_commands(self.path, self.existing, self.batch_size,
+                                                            stop=lambda: not self._running):
+                if commands:
+                    added += len(commands)
+                    self.batch.emit(commands)
+                duplicates += dup
+                errors.extend(errs[:self.MAX_ERRORS - len(errors)])
+                self.progress.emit(min(100, int(pos * 100 / size)))
+        except Exception as e:
+            # 文件读取、编码、CSV/JSON 格式错误
+            failure = str(e)
+        self.finished_signal.emit(added, duplicates, errors, failure)
+
+    def stop(self):
+        self._running = False
+        self.wait()
@@ -0,0 +1,86 @@
+import collections
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.file_transfer import FileSender, PROTOCOLS
+
+
+class FileTransferThread(QThread):
+    """在后台发送文件，定期发出进度（已发送字节、速率、剩余时间）"""
+    progress = pyqtSignal(dict)  # done, total, rate, eta_s, elapsed_s
+    log_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(bool, str)  # 是否成功, 错误信息
+
+    # 进度发出间隔
+    REPORT_INTERVAL = 0.2
+    # 计算当前速率的时间窗口
+    RATE_WINDOW = 2.0
+
+    def __init__(self, serial_mgr, path, protocol="raw", receiver=None, log_mgr=None):
+        """
+        :param receiver: 正在读取该端口的接收器，XMODEM/YMODEM 的应答通过订阅它获得，不直接读串口
+        """
+        super().__init__()
+        self.receiver = receiver
+        self.log_mgr = log_mgr
+        self.sender = FileSender(serial_mgr, path, protocol, progress=self._on_progress, log=self._log)
+        self._samples = collections.deque()
+        self._first = None
+        self._last_report = 0.0
+
+    def run(self):
+        sender = self.sender
+        if self.receiver is not None:
+            sender.source = self.receiver.subscribe()
+        self._log(f"开始发送文件 ({PROTOCOLS.get(sender.protocol, sender.protocol)}): {sender.path}")
+        if sender.protocol != "raw":
+            self._log("等待接收方开始接收...")
+        try:
+            ok = sender.run()
+        finally:
+            if sender.source is not None:
+                self.receiver.unsubscribe(sender.source)
+        info = self._snapshot(sender.done, sender.total, time.monotonic())
+        self.progress.emit(info)
+        if ok:
+            self._log(f"✅ 文件发送完成: {sender.total} 字节，用时 {info['elapsed_s']:.1f} s，"
+                      f"平均 {info['avg_rate']:.0f} B/s")
+        else:
+            self._log(f"❌ 文件发送失败: {sender.error}")
+        self.finished_signal.emit(ok, sender.error or "")
+
+    def _on_progress(self, done, total):
+        now = time.monotonic()
+        if self._first is None:
+            self._first = (now, done)
+        self._samples.append((now, done))
+        while len(self._samples) > 2 and now - self._samples[0][0] > self.RATE_WINDOW:
+            self._samples.popleft()
+        if now - self._last_report >= self.REPORT_INTERVAL:
+            self._last_report = now
+            self.progress.emit(self._snapshot(done, total, now))
+
+    def _snapshot(self, done, total, now):
+        """当前速率按最近 RATE_WINDOW 秒计算，平均速率从开始发送数据时算起（不含等待接收方的时间）"""
+        rate = avg_rate = 0.0
+        elapsed = 0.0
+        if self._first is not None:
+            elapsed = now - self._first[0]
+            if elapsed > 0:
+                avg_rate = (done - self._first[1]) / elapsed
+            t0, d0 = self._samples[0]
+            if now > t0:
+                rate = (done - d0) / (now - t0)
+        eta = (total - done) / rate if rate > 0 else None
+        return {"done": done, "total": total, "rate": rate, "avg_rate": avg_rate, "eta_s": eta,
+                "elapsed_s": elapsed}
+
+    def stop(self):
+        self.sender.stop()
+        self.wait()
+
+    def _log(self, msg, level="info"):
+        self.log_signal.emit(msg)
+        if self.log_mgr:
+            self.log_mgr.write(msg, level)
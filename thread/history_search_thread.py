@@ -0,0 +1,46 @@
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.history_manager import HistorySearcher
+
+
+class HistorySearchThread(QThread):
+    """在后台线程中检索历史记录，只处理最新一次请求"""
+    results = pyqtSignal(str, list)  # 查询文本, [(cmd, hex_flag, append_enter_flag), ...]
+
+    def __init__(self, db_file="history.db", limit=20):
+        super().__init__()
+        self.db_file = db_file
+        self.limit = limit
+        self._running = True
+        self._pending = None
+        self._event = threading.Event()
+
+    def search(self, text):
+        """提交查询（可在界面线程中频繁调用，未处理的旧查询会被覆盖）"""
+        self._pending = text
+        self._event.set()
+
+    def run(self):
+        searcher = HistorySearcher(self.db_file)
+        try:
+            while self._running:
+                self._event.wait()
+                self._event.clear()
+                text = self._pending
+                if not self._running or text is None:
+                    continue
+                try:
+                    rows = searcher.search(text, self.limit)
+                except Exception as e:
+                    print("检索历史记录失败:", e)
+                    rows = []
+                self.results.emit(text, rows)
+        finally:
+            searcher.close()
+
+    def stop(self):
+        self._running = False
+        self._event.set()
+        self.wait()
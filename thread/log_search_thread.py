@@ -0,0 +1,72 @@
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.log_reader import grep_file
+
+
+class LogIndexThread(QThread):
+    """在后台建立或刷新日志索引（首次打开多 GB 文件时需要扫描一遍）"""
+    progress = pyqtSignal(int)  # 百分比
+    finished_signal = pyqtSignal(bool, str)  # 是否成功, 错误信息
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+        self._running = True
+        self._last_report = 0.0
+
+    def run(self):
+        try:
+            self.index.load(self._on_progress, lambda: not self._running)
+            self.finished_signal.emit(True, "")
+        except Exception as e:
+            self.finished_signal.emit(False, str(e))
+
+    def _on_progress(self, pos, end):
+        now = time.monotonic()
+        if now - self._last_report >= 0.1:
+            self._last_report = now
+            self.progress.emit(int(pos * 100 / end))
+
+    def stop(self):
+        self._running = False
+        self.wait()
+
+
+class LogGrepThread(QThread):
+    """在后台逐行查找日志，边查找边发出结果"""
+    matches = pyqtSignal(list)  # [(行号, 行文本), ...]
+    progress = pyqtSignal(int)  # 百分比
+    finished_signal = pyqtSignal(int, bool)  # 结果总数, 是否因超过上限而截断
+
+    def __init__(self, path, pattern, end=None, max_results=100000):
+        super().__init__()
+        self.path = path
+        self.pattern = pattern
+        self.end = end
+        self.max_results = max_results
+        self._running = True
+
+    def run(self):
+        total = 0
+        truncated = False
+        try:
+            for pos, found in grep_file(self.path, self.pattern, self.end, stop=lambda: not self._running):
+                if found:
+                    if total + len(found) > self.max_results:
+                        found = found[:self.max_results - total]
+                        truncated = True
+                    total += len(found)
+                    self.matches.emit(found)
+                if self.end:
+                    self.progress.emit(int(pos * 100 / self.end))
+                if truncated:
+                    break
+        except Exception as e:
+            print(f"查找日志失败: {e}")
+        self.finished_signal.emit(total, truncated)
+
+    def stop(self):
+        self._running = False
+        self.wait()
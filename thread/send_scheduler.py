@@ -0,0 +1,143 @@
+import math
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from manager.stats import JITTER_BUCKETS_US
+
+
+class IntervalStats:
+    """实际发送间隔统计（Welford 算法，单位纳秒）"""
+
+    def __init__(self, target_ns):
+        self.target_ns = target_ns
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        # 超过目标间隔 1.5 倍的次数
+        self.late = 0
+
+    def add(self, interval_ns):
+        self.count += 1
+        delta = interval_ns - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (interval_ns - self.mean)
+        if self.min is None or interval_ns < self.min:
+            self.min = interval_ns
+        if self.max is None or interval_ns > self.max:
+            self.max = interval_ns
+        if interval_ns > self.target_ns * 1.5:
+            self.late += 1
+
+    def snapshot(self):
+        std = math.sqrt(self._m2 / self.count) if self.count else 0.0
+        return {
+            "count": self.count,
+            "target_ms": self.target_ns / 1e6,
+            "mean_ms": self.mean / 1e6,
+            "min_ms": (self.min or 0) / 1e6,
+            "max_ms": (self.max or 0) / 1e6,
+            "jitter_ms": std / 1e6,
+            "late": self.late,
+        }
+
+
+class SendScheduler(QThread):
+    """循环发送调度线程：按单调时钟的绝对截止时间发送，最后一段时间忙等以减小抖动"""
+    stats_signal = pyqtSignal(dict)  # 间隔统计（定期发出）
+    failed = pyqtSignal(str)
+    finished_signal = pyqtSignal(int)  # 总发送条数
+
+    # 距截止时间不足该值时改为忙等
+    SPIN_NS = 1_000_000
+    # 统计发出间隔
+    REPORT_NS = 500_000_000
+    # 发送队列满时每次等待的秒数（等待期间检查停止标志）
+    QUEUE_WAIT = 0.1
+
+    def __init__(self, serial_mgr, payloads, interval_ms, cmds=None, log_mgr=None):
+        super().__init__()
+        self.serial = serial_mgr
+        self.payloads = list(payloads)
+        self.cmds = list(cmds) if cmds else None
+        self.log_mgr = log_mgr
+        self.interval_ns = max(1, int(interval_ms * 1_000_000))
+        self.stats = IntervalStats(self.interval_ns)
+        self.sent_count = 0
+        self._running = True
+
+    def run(self):
+        payloads = self.payloads
+        cmds = self.cmds
+        send_bytes = self.serial.send_bytes
+        interval = self.interval_ns
+        stats = self.stats
+        # 实际发送时刻相对截止时间的滞后
+        jitter = self.serial.stats.histogram("send_jitter_us", JITTER_BUCKETS_US, "µs")
+        clock = time.perf_counter_ns
+        index = 0
+        last_send = None
+        deadline = clock()
+        next_report = deadline + self.REPORT_NS
+        try:
+            while self._running:
+                self._sleep_until(deadline)
+                if not self._running:
+                    break
+                now = clock()
+                jitter.record((now - deadline) / 1000)
+                if not self._send(send_bytes, payloads[index]):
+                    break
+                self.sent_count += 1
+                if last_send is not None:
+                    stats.add(now - last_send)
+                last_send = now
+                if self.log_mgr and cmds:
+                    self.log_mgr.write(f"➡️ 已发送: {cmds[index]}", "debug")
+                index += 1
+                if index >= len(payloads):
+                    index = 0
+
+                # 绝对截止时间：不因本次发送耗时累积误差；落后超过一个周期时跳过错过的时刻，避免集中补发
+                deadline += interval
+                if deadline < now:
+                    deadline += ((now - deadline) // interval + 1) * interval
+                if now >= next_report:
+                    self.stats_signal.emit(stats.snapshot())
+                    next_report = now + self.REPORT_NS
+        except Exception as e:
+            self.failed.emit(f"❌ 发送失败: {e}")
+        finally:
+            self.stats_signal.emit(stats.snapshot())
+            self.finished_signal.emit(self.sent_count)
+
+    def _send(self, send_bytes, payload):
+        """发送一条；发送队列满时等待排空（端口速度跟不上发送间隔时按端口速度发送），串口关闭时报告失败"""
+        while not send_bytes(payload, block=True, timeout=self.QUEUE_WAIT):
+            if not self.serial.is_open:
+                self.failed.emit("❌ 发送失败，串口未打开")
+                return False
+            if not self._running:
+                return False
+        return True
+
+    def _sleep_until(self, deadline):
+        """先休眠到截止时间前 SPIN_NS，再忙等到截止时间"""
+        clock = time.perf_counter_ns
+        while self._running:
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return
+            if remaining > self.SPIN_NS:
+                # 分段休眠，便于及时响应停止
+                time.sleep(min(remaining - self.SPIN_NS, 100_000_000) / 1e9)
+            # 忙等阶段不休眠
+
+    def stop(self):
+        self._running = False
+        self.wait()
@@ -1,28 +1,189 @@
+import collections
+import time
+
 from PyQt5.QtCore import QThread, pyqtSignal
 
+from manager.fanout import FanOut
+from manager.framer import DelimiterFramer
 from manager.serial_manager import SerialManager
+from manager.stats import LATENCY_BUCKETS_MS
 
 
 class SerialReceiver(QThread):
-    received = pyqtSignal(str)
+    # 一次刷新合并的多帧数据
+    received_batch = pyqtSignal(list)
+    # 读取失败（设备断开等），接收已停止，参数为错误信息
+    failed = pyqtSignal(str)
 
-    def __init__(self, serial: SerialManager, log_mgr=None):
+    def __init__(self, serial: SerialManager, log_mgr=None, flush_interval_ms=30, capture=None, decode_text=True,
+                 framer=None):
         super().__init__()
         self.serial = serial
         self.log_mgr = log_mgr
+        # 原始数据抓包（RawCaptureWriter），为 None 时不抓包
+        self.capture = capture
+        # 关闭后只抓包，不做分帧、解码和显示
+        self.decode_text = decode_text
+        # 分帧器（默认按换行分帧），数据按块读取后再分帧
+        self.framer = framer or DelimiterFramer()
+        # set_framer() 交来的新分帧器，由接收线程在两次读取之间换上
+        self._next_framer = None
         self._running = True
+        # 读取失败的原因，失败后接收停止
+        self.error = None
+        # 待刷新到界面的帧
+        self._pending = []
+        self.flush_interval = flush_interval_ms / 1000
+        self._last_flush = time.monotonic()
+
+        # 背压统计
+        self.flush_count = 0
+        self.frame_count = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        stats = serial.stats
+        self._rx_frames = stats.counter("rx_frames")
+        self._queue_depth = stats.gauge("rx_signal_queue")
+        self._display_latency = stats.histogram("rx_display_latency_ms", LATENCY_BUCKETS_MS, "ms")
+        # 界面处理完每批数据后调用 batch_displayed() 时才开启：记录已发出、尚未显示的批次中最早一帧的接收时刻
+        self.track_display = False
+        self._inflight = collections.deque()
+        self._pending_since = 0.0
+        # 端口的唯一读取者：其他需要接收数据的模块（自动化等）通过 subscribe() 获取，不再直接读串口
+        self.fanout = FanOut()
+
+    def subscribe(self, frames=False, max_items=100000):
+        """订阅接收到的原始数据块（frames=True 时订阅分好的帧），返回 Subscription"""
+        return self.fanout.subscribe(frames, max_items)
+
+    def unsubscribe(self, sub):
+        self.fanout.unsubscribe(sub)
+
+    def set_framer(self, framer):
+        """切换分帧方式（可在任意线程调用）：接收线程在两次读取之间换上，旧分帧器中未成帧的数据交给新分帧器"""
+        self._next_framer = framer
+
+    def _swap_framer(self):
+        framer, self._next_framer = self._next_framer, None
+        leftover = self.framer.take_pending()
+        self.framer = framer
+        if leftover and self.decode_text:
+            self._handle_frames(framer.feed(leftover, time.monotonic()))
 
     def run(self):
         while self._running:
-            line = self.serial.readline()
-            if line:
-                msg = f"[接收] {line}"
-                self.received.emit(msg)
-                if self.log_mgr:
-                    self.log_mgr.write(msg)
-            self.msleep(50)
+            if self._next_framer is not None:
+                self._swap_framer()
+            try:
+                chunk = self.serial.read_chunk()
+            except Exception as e:
+                self._fail(e)
+                break
+            if chunk is None:
+                # 串口未打开
+                self._flush()
+                self.msleep(50)
+                continue
+            if chunk:
+                if self.capture:
+                    self.capture.write_chunk(chunk)
+                self.fanout.publish_raw(chunk)
+                if self.decode_text:
+                    self._handle_frames(self.framer.feed(chunk, time.monotonic()))
+
+            # 按固定帧率合并刷新
+            if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+            try:
+                self._idle_wait()
+            except Exception as e:
+                self._fail(e)
+                break
+        self._flush()
+
+    def _fail(self, error):
+        """读取失败：记录原因并通知界面关闭会话，端口出错后继续读取只会反复失败"""
+        print(f"串口读取失败: {error}")
+        self.error = error
+        self._flush()
+        self.failed.emit(str(error))
+
+    def _idle_wait(self):
+        """串口空闲时处理到期的超时分帧和界面刷新，避免阻塞读取推迟它们"""
+        while self._running and not self.serial.bytes_waiting():
+            if self._next_framer is not None:
+                self._swap_framer()
+            framer = self.framer
+            now = time.monotonic()
+            framer_deadline = None
+            if self.decode_text:
+                self._handle_frames(framer.poll(now))
+                framer_deadline = framer.next_deadline()
+            if self._pending and now - self._last_flush >= self.flush_interval:
+                self._flush()
+
+            deadlines = [framer_deadline] if framer_deadline is not None else []
+            if self._pending:
+                deadlines.append(self._last_flush + self.flush_interval)
+            if not deadlines:
+                return
+            delay = min(deadlines) - now
+            if framer_deadline is not None or self.fanout.active:
+                # 等待超时分帧或有订阅者（如自动化等待回复）时要及时发现新到的字节
+                delay = min(delay, 0.001)
+            if delay > 0:
+                time.sleep(delay)
+
+    def _handle_frames(self, frames):
+        """把分好的帧转换为显示文本，写日志并加入待刷新列表"""
+        if not frames:
+            return
+        self._rx_frames.add(len(frames))
+        self.fanout.publish_frames(frames)
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        text = self.framer.text
+        for frame in frames:
+            if text:
+                line = frame.decode("utf-8", errors="ignore").strip()
+                if not line:
+                    continue
+            else:
+                line = frame.hex(" ").upper()
+            msg = f"[接收] {line}"
+            self._pending.append(msg)
+            if self.log_mgr:
+                self.log_mgr.write(msg)
+
+    def _flush(self):
+        """把待刷新的帧一次性发送到界面"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        size = len(batch)
+        self.flush_count += 1
+        self.frame_count += size
+        self.last_batch_size = size
+        if size > self.max_batch_size:
+            self.max_batch_size = size
+        if self.track_display:
+            self._inflight.append(self._pending_since)
+            self._queue_depth.set(len(self._inflight))
+        self.received_batch.emit(batch)
+
+    def batch_displayed(self):
+        """界面显示完一批数据后调用：记录接收到显示的时延和信号队列中积压的批次数"""
+        try:
+            since = self._inflight.popleft()
+        except IndexError:
+            return
+        self._display_latency.record((time.monotonic() - since) * 1000)
+        self._queue_depth.set(len(self._inflight))
 
     def stop(self):
         self._running = False
         self.quit()
         self.wait()
+        self.fanout.close()
@@ -0,0 +1,234 @@
+import collections
+import os
+import select
+import threading
+import time
+
+from manager.stats import SIZE_BUCKETS
+
+
+class TxWriter:
+    """单个端口的发送队列和写线程：submit() 只入队，写线程把排队的小帧合并成一次写入
+
+    入队的数据不复制（bytes/bytearray/memoryview 原样保存，入队后调用方不要再修改）；
+    只有合并多个小帧时才复制到一个缓冲区，单个大块直接按内存视图切片写入。
+    有文件描述符的端口（POSIX 串口、PTY）直接 os.write 内存视图：输出缓冲满或被 RTS/CTS、XON/XOFF
+    暂停时用 select 等待可写，只阻塞写线程；其他端口退化为 ser.write。
+    """
+
+    # 被流控暂停时检查停止标志的间隔
+    STALL_POLL = 0.1
+    # 计算排空速率的最短时间窗口
+    RATE_WINDOW = 0.5
+
+    def __init__(self, serial_mgr, max_batch=16384, max_delay_ms=0, max_queue_bytes=4 * 1024 * 1024):
+        """
+        :param max_batch: 合并写入的最大字节数
+        :param max_delay_ms: 延迟预算：排队不足 max_batch 时最多再等待多久凑成一次写入，0 表示有数据就写
+        :param max_queue_bytes: 队列上限，超过时 submit(block=True) 等待，否则返回 False
+        """
+        self.serial = serial_mgr
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max(0, max_delay_ms) / 1000
+        self.max_queue_bytes = max_queue_bytes
+        self.error = None
+        self._items = collections.deque()
+        # 已入队、尚未写完的字节数（包括正在写的一批）
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._running = True
+        # 写线程正在写的一批数据，discard() 要求放弃时置 _abort
+        self._writing = None
+        self._abort = False
+        try:
+            self._fd = serial_mgr.ser.fileno()
+        except (AttributeError, OSError, ValueError):
+            # 没有文件描述符的端口（Windows 串口、socket://、loop:// 等）
+            self._fd = None
+        stats = serial_mgr.stats
+        self._depth = stats.gauge("tx_queue_bytes", "B")
+        self._write_size = stats.histogram("tx_write_size", SIZE_BUCKETS, "B")
+        self._blocked = stats.counter("tx_blocked_ms", "ms")
+        self._dropped = stats.counter("tx_dropped_bytes", "B")
+        self._rate = 0.0
+        self._rate_bytes = 0
+        self._rate_since = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="TxWriter", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    @property
+    def closed(self):
+        """写线程是否已停止（close/stop 之后，或写入失败后；失败原因在 error 中）"""
+        return not self._running
+
+    @property
+    def depth(self):
+        """排队中（含正在写入）的字节数"""
+        return self._queued
+
+    @property
+    def drain_rate(self):
+        """最近的排空速率（字节/秒），队列空闲时为 0"""
+        if not self._queued and time.monotonic() - self._rate_since > self.RATE_WINDOW:
+            return 0.0
+        return self._rate
+
+    def submit(self, data, block=False, timeout=None):
+        """数据入队，返回是否成功（写线程已停止、或队列已满且 block=False 或等待超时时返回 False）
+
+        队列满未能入队的字节计入 tx_dropped_bytes；调用方可用 closed 区分队列满和写线程已停止。
+        """
+        size = len(data)
+        if not size:
+            return True
+        with self._cond:
+            if block:
+                # 单块大于队列上限时只要求队列为空
+                limit = max(0, self.max_queue_bytes - size)
+                if not self._cond.wait_for(lambda: self._queued <= limit or not self._running, timeout):
+                    self._dropped.add(size)
+                    return False
+            elif self._queued + size > self.max_queue_bytes:
+                self._dropped.add(size)
+                return False
+            if not self._running:
+                return False
+            self._items.append(data)
+            self._queued += size
+            self._depth.set(self._queued)
+            self._cond.notify_all()
+        return True
+
+    def flush(self, timeout=None):
+        """等待队列写完，超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queued or not self._running, timeout) and not self._queued
+
+    def discard(self, obj):
+        """丢弃排队中引用 obj 缓冲区的数据（memoryview 切片），返回丢弃的字节数
+
+        正在写的一批也来自 obj 时停止写入剩余部分，并等待写线程放开它；
+        返回后队列中不再引用 obj，调用方可以关闭它（如取消文件发送后关闭 mmap）。
+        """
+        with self._cond:
+            kept = collections.deque()
+            dropped = 0
+            for item in self._items:
+                if self._refers(item, obj):
+                    dropped += len(item)
+                else:
+                    kept.append(item)
+            self._items = kept
+            self._queued -= dropped
+            self._depth.set(self._queued)
+            writing = self._writing
+            if writing is not None and self._refers(writing, obj):
+                self._abort = True
+                self._cond.wait_for(lambda: self._writing is not writing)
+            writing = None
+            self._cond.notify_all()
+        return dropped
+
+    @staticmethod
+    def _refers(item, obj):
+        return isinstance(item, memoryview) and item.obj is obj
+
+    def close(self, timeout=1.0):
+        """最多等待 timeout 秒写完排队的数据，然后停止写线程（剩余数据丢弃）"""
+        if self._thread.is_alive():
+            self.flush(timeout)
+        self.stop()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join()
+        with self._cond:
+            self._items.clear()
+            self._queued = 0
+            self._depth.set(0)
+            self._cond.notify_all()
+
+    def _run(self):
+        cond = self._cond
+        while True:
+            with cond:
+                cond.wait_for(lambda: self._items or not self._running)
+                if not self._running:
+                    return
+                if self.max_delay and self._queued < self.max_batch:
+                    # 延迟预算内等待更多数据，凑成一次较大的写入
+                    cond.wait_for(lambda: self._queued >= self.max_batch or not self._running, self.max_delay)
+                data = self._writing = self._take()
+            size = len(data)
+            failed = False
+            try:
+                self._write(data)
+            except Exception as e:
+                print(f"串口写入失败: {e}")
+                self.error = e
+                # OSError（包括 SerialException）说明端口已失效，后面的数据也写不出去
+                failed = isinstance(e, OSError)
+            # 不保留对已写数据的引用（可能是调用方 mmap 的切片）
+            data = None
+            with cond:
+                self._writing = None
+                self._abort = False
+                if failed:
+                    # 停止写线程并丢弃排队的数据：closed 变为 True，之后 submit() 返回 False
+                    self._running = False
+                    self._items.clear()
+                    self._queued = 0
+                else:
+                    self._queued -= size
+                self._depth.set(self._queued)
+                cond.notify_all()
+
+    def _take(self):
+        """取出一批数据：单块直接返回（不复制），多个小块合并到不超过 max_batch 的缓冲区"""
+        items = self._items
+        first = items.popleft()
+        if len(first) >= self.max_batch or not items or len(first) + len(items[0]) > self.max_batch:
+            return first
+        buf = bytearray(first)
+        while items and len(buf) + len(items[0]) <= self.max_batch:
+            buf += items.popleft()
+        return buf
+
+    def _write(self, data):
+        view = memoryview(data).cast("B")
+        fd = self._fd
+        max_batch = self.max_batch
+        while len(view) and self._running and not self._abort:
+            piece = view[:max_batch]
+            if fd is None:
+                self.serial.ser.write(piece)
+                n = len(piece)
+            else:
+                try:
+                    n = os.write(fd, piece)
+                except BlockingIOError:
+                    n = 0
+                if not n:
+                    # 输出缓冲已满或被流控暂停
+                    started = time.monotonic()
+                    select.select([], [fd], [], self.STALL_POLL)
+                    self._blocked.add((time.monotonic() - started) * 1000)
+                    continue
+            view = view[n:]
+            self.serial.record_write(n)
+            self._write_size.record(n)
+            self._update_rate(n)
+
+    def _update_rate(self, n):
+        self._rate_bytes += n
+        now = time.monotonic()
+        elapsed = now - self._rate_since
+        if elapsed >= self.RATE_WINDOW:
+            self._rate = self._rate_bytes / elapsed
+            self._rate_bytes = 0
+            self._rate_since = now
@@ -0,0 +1,72 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QListWidget, QListWidgetItem, QSpinBox,
+                             QPushButton, QDialogButtonBox, QMessageBox)
+
+
+class BatchDialog(QDialog):
+    """选择批量自动化的端口和并发数"""
+
+    def __init__(self, ports, busy_ports=(), max_workers=8, parent=None):
+        """
+        :param ports: [(端口, 描述), ...]
+        :param busy_ports: 已被会话占用的端口（不可选）
+        """
+        super().__init__(parent)
+        self.setWindowTitle("批量自动化")
+        self.setModal(True)
+        self.resize(420, 400)
+        self.selected_ports = []
+        self.max_workers = max_workers
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("选择要并行运行的端口（使用当前硬件配置的串口参数和帧格式）:"))
+        self.port_list = QListWidget()
+        for port, description in ports:
+            item = QListWidgetItem(f"{port}  {description}" if description and description != port else port)
+            item.setData(Qt.UserRole, port)
+            if port in busy_ports:
+                item.setText(item.text() + "（已打开）")
+                item.setFlags(item.flags() & ~Qt.ItemIsEnabled)
+                item.setCheckState(Qt.Unchecked)
+            else:
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Checked)
+            self.port_list.addItem(item)
+        layout.addWidget(self.port_list)
+
+        select_layout = QHBoxLayout()
+        select_all_btn = QPushButton("全选")
+        select_all_btn.clicked.connect(lambda: self.set_all_checked(True))
+        select_none_btn = QPushButton("全不选")
+        select_none_btn.clicked.connect(lambda: self.set_all_checked(False))
+        select_layout.addWidget(select_all_btn)
+        select_layout.addWidget(select_none_btn)
+        select_layout.addStretch()
+        select_layout.addWidget(QLabel("最大并发数:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 256)
+        self.workers_spin.setValue(max_workers)
+        select_layout.addWidget(self.workers_spin)
+        layout.addLayout(select_layout)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText("开始")
+        button_box.button(QDialogButtonBox.Cancel).setText("取消")
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def set_all_checked(self, checked):
+        for i in range(self.port_list.count()):
+            item = self.port_list.item(i)
+            if item.flags() & Qt.ItemIsEnabled:
+                item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+
+    def accept(self):
+        self.selected_ports = [self.port_list.item(i).data(Qt.UserRole) for i in range(self.port_list.count())
+                               if self.port_list.item(i).checkState() == Qt.Checked]
+        if not self.selected_ports:
+            QMessageBox.warning(self, "错误", "请至少选择一个端口")
+            return
+        self.max_workers = self.workers_spin.value()
+        super().accept()
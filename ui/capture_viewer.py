@@ -0,0 +1,118 @@
+import datetime
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit,
+                             QPlainTextEdit, QScrollBar, QMessageBox)
+
+from manager.capture_manager import RingCaptureReader
+
+# 每页显示的字节数
+PAGE_SIZE = 4096
+
+
+def hex_dump(data, base_offset=0, width=16):
+    """偏移 + HEX + ASCII 格式的十六进制转储"""
+    lines = []
+    for i in range(0, len(data), width):
+        row = data[i:i + width]
+        text = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
+        lines.append(f"{base_offset + i:012X}  {row.hex(' ').upper():<{width * 3}} {text}")
+    return "\n".join(lines)
+
+
+class CaptureViewerDialog(QDialog):
+    """环形抓包查看器：按页读取内存映射文件，只解码当前页，可按时间跳转"""
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"抓包查看 - {path}")
+        self.resize(900, 620)
+        self.reader = RingCaptureReader(path)
+        self.finished.connect(self.reader.close)
+        self._index = []
+        self._first_page = 0
+
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel("")
+        layout.addWidget(self.info_label)
+
+        ctrl_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("◀ 上一页")
+        self.prev_btn.clicked.connect(lambda: self.page_bar.setValue(self.page_bar.value() - 1))
+        self.next_btn = QPushButton("下一页 ▶")
+        self.next_btn.clicked.connect(lambda: self.page_bar.setValue(self.page_bar.value() + 1))
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItem("HEX", "hex")
+        self.mode_combo.addItem("文本", "text")
+        self.mode_combo.currentIndexChanged.connect(self.show_page)
+        self.time_edit = QLineEdit()
+        self.time_edit.setPlaceholderText("HH:MM:SS 或 YYYY-MM-DD HH:MM:SS")
+        self.time_edit.returnPressed.connect(self.jump_to_time)
+        jump_btn = QPushButton("跳转")
+        jump_btn.clicked.connect(self.jump_to_time)
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        end_btn = QPushButton("末尾")
+        end_btn.clicked.connect(lambda: self.page_bar.setValue(self.page_bar.maximum()))
+        for widget in (self.prev_btn, self.next_btn, self.mode_combo, self.time_edit, jump_btn, refresh_btn, end_btn):
+            ctrl_layout.addWidget(widget)
+        layout.addLayout(ctrl_layout)
+
+        self.page_bar = QScrollBar(Qt.Horizontal)
+        self.page_bar.valueChanged.connect(self.show_page)
+        layout.addWidget(self.page_bar)
+
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        self.text_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self.text_view.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text_view)
+        self.page_label = QLabel("")
+        layout.addWidget(self.page_label)
+
+        self.refresh()
+
+    def refresh(self):
+        """重新读取写入位置和索引（抓包进行中时数据会继续增长）"""
+        start, end = self.reader.start_offset, self.reader.end_offset
+        self._index = self.reader.index()
+        self._first_page = start // PAGE_SIZE
+        last_page = max(self._first_page, (end - 1) // PAGE_SIZE)
+        self.page_bar.blockSignals(True)
+        self.page_bar.setRange(0, last_page - self._first_page)
+        self.page_bar.blockSignals(False)
+        started = datetime.datetime.fromtimestamp(self.reader.wall_start).strftime("%Y-%m-%d %H:%M:%S")
+        self.info_label.setText(f"开始于 {started}，共写入 {end} 字节，环大小 {self.reader.size} 字节，"
+                                f"当前保存 {end - start} 字节，索引 {len(self._index)} 条")
+        self.show_page()
+
+    def show_page(self):
+        page = self._first_page + self.page_bar.value()
+        offset = page * PAGE_SIZE
+        data = self.reader.read(offset, PAGE_SIZE)
+        offset = max(offset, self.reader.start_offset)
+        if self.mode_combo.currentData() == "hex":
+            self.text_view.setPlainText(hex_dump(data, offset))
+        else:
+            self.text_view.setPlainText(data.decode("utf-8", errors="replace"))
+        ts = self.reader.time_at(offset, self._index)
+        stamp = datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S.%f")[:-3] if ts else "-"
+        self.page_label.setText(f"偏移 {offset}（{len(data)} 字节），接收时间约 {stamp}")
+        self.prev_btn.setEnabled(self.page_bar.value() > 0)
+        self.next_btn.setEnabled(self.page_bar.value() < self.page_bar.maximum())
+
+    def jump_to_time(self):
+        text = self.time_edit.text().strip()
+        try:
+            if len(text) <= 8:
+                day = datetime.datetime.fromtimestamp(self.reader.wall_start).date()
+                target = datetime.datetime.combine(day, datetime.datetime.strptime(text, "%H:%M:%S").time())
+            else:
+                target = datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            QMessageBox.warning(self, "错误", "时间格式应为 HH:MM:SS 或 YYYY-MM-DD HH:MM:SS")
+            return
+        offset = self.reader.offset_at(target.timestamp(), self._index)
+        self.page_bar.setValue(offset // PAGE_SIZE - self._first_page)
@@ -0,0 +1,64 @@
+from PyQt5.QtCore import Qt, QStringListModel, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QTextEdit, QCompleter
+
+
+class CommandInput(QTextEdit):
+    """命令输入框：按当前行内容弹出历史命令补全"""
+    # 当前行文本变化（用于提交历史检索）
+    line_edited = pyqtSignal(str)
+    # 选中补全项: (cmd, hex_flag, append_enter_flag)
+    completion_selected = pyqtSignal(str, int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._suggestions = {}
+        self._inserting = False
+        self.completer_model = QStringListModel(self)
+        self.completer = QCompleter(self.completer_model, self)
+        self.completer.setWidget(self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.completer.activated[str].connect(self.insert_completion)
+        self.textChanged.connect(self._on_text_changed)
+
+    def current_line(self):
+        return self.textCursor().block().text()
+
+    def _on_text_changed(self):
+        if self._inserting:
+            return
+        self.line_edited.emit(self.current_line().strip())
+
+    def show_suggestions(self, text, rows):
+        """显示检索结果（结果过期或为空时隐藏弹窗）"""
+        popup = self.completer.popup()
+        if text != self.current_line().strip() or not rows or not self.hasFocus():
+            popup.hide()
+            return
+        self._suggestions = {row[0]: row for row in rows}
+        self.completer_model.setStringList(list(self._suggestions))
+        rect = self.cursorRect()
+        rect.setWidth(max(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width(), 200))
+        self.completer.complete(rect)
+
+    def insert_completion(self, cmd):
+        """用补全项替换当前行"""
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.StartOfBlock)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        self._inserting = True
+        cursor.insertText(cmd)
+        self._inserting = False
+        self.setTextCursor(cursor)
+        row = self._suggestions.get(cmd)
+        if row:
+            self.completion_selected.emit(*row)
+
+    def keyPressEvent(self, event):
+        # 弹窗显示时，确认/取消类按键交给补全器处理
+        if self.completer.popup().isVisible() and event.key() in (
+                Qt.Key_Enter, Qt.Key_Return, Qt.Key_Escape, Qt.Key_Tab, Qt.Key_Backtab):
+            event.ignore()
+            return
+        super().keyPressEvent(event)
@@ -0,0 +1,157 @@
+import json
+
+from PyQt5.QtCore import QAbstractListModel, QMimeData, QModelIndex, Qt
+
+# 数据角色与历史记录列表条目一致：指令文本、是否 HEX、是否追加回车
+CMD_ROLE = Qt.UserRole
+HEX_ROLE = Qt.UserRole + 1
+ENTER_ROLE = Qt.UserRole + 2
+
+
+class CommandListModel(QAbstractListModel):
+    """指令列表模型：全部指令保存在列表中，视图滚动到末尾时才逐批显示（fetchMore），几万条也能立即打开
+
+    支持在列表内拖动排序。
+    """
+    FETCH_SIZE = 500
+    MIME_TYPE = "application/x-serialtool-commands"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # [(指令, HEX, 追加回车), ...]
+        self._commands = []
+        # 已显示给视图的行数
+        self._loaded = 0
+
+    # ------------------------- 数据 -------------------------
+    def set_commands(self, commands):
+        self.beginResetModel()
+        self._commands = list(commands)
+        self._loaded = min(len(self._commands), self.FETCH_SIZE)
+        self.endResetModel()
+
+    def commands(self):
+        return list(self._commands)
+
+    def command(self, row):
+        return self._commands[row]
+
+    def __len__(self):
+        return len(self._commands)
+
+    def append(self, commands):
+        """追加到末尾：之前已全部显示时先显示一批，其余等滚动到末尾再显示"""
+        if not commands:
+            return
+        shown_all = self._loaded == len(self._commands)
+        self._commands.extend(commands)
+        if shown_all:
+            self.fetchMore(QModelIndex())
+
+    def insert(self, row, command):
+        row = max(0, min(row, len(self._commands)))
+        if row <= self._loaded:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._commands.insert(row, command)
+            self._loaded += 1
+            self.endInsertRows()
+        else:
+            self._commands.insert(row, command)
+
+    def take(self, row):
+        if row < self._loaded:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            command = self._commands.pop(row)
+            self._loaded -= 1
+            self.endRemoveRows()
+        else:
+            command = self._commands.pop(row)
+        return command
+
+    def move(self, src, dst):
+        """移动一行，返回新位置（移到尚未显示的位置时先显示到该行）"""
+        dst = max(0, min(dst, len(self._commands) - 1))
+        if src == dst:
+            return dst
+        self.insert(dst, self.take(src))
+        self.ensure_loaded(dst)
+        return dst
+
+    def ensure_loaded(self, row):
+        while row >= self._loaded and self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    # ------------------------- 懒加载 -------------------------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._loaded
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < len(self._commands)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_SIZE, len(self._commands) - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        cmd, hex_flag, enter_flag = self._commands[index.row()]
+        if role == Qt.DisplayRole:
+            return f"[HEX] {cmd}" if hex_flag else cmd
+        if role == Qt.ToolTipRole:
+            return ("HEX" if hex_flag else "文本") + ("，追加回车" if enter_flag else "")
+        if role == CMD_ROLE:
+            return cmd
+        if role == HEX_ROLE:
+            return hex_flag
+        if role == ENTER_ROLE:
+            return enter_flag
+        return None
+
+    # ------------------------- 拖动排序 -------------------------
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [self.MIME_TYPE]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        rows = sorted(index.row() for index in indexes if index.isValid())
+        mime.setData(self.MIME_TYPE, json.dumps([self._commands[row] for row in rows]).encode("utf-8"))
+        return mime
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != Qt.MoveAction or not data.hasFormat(self.MIME_TYPE):
+            return False
+        if row < 0:
+            row = parent.row() if parent.isValid() else self._loaded
+        commands = [tuple(c) for c in json.loads(bytes(data.data(self.MIME_TYPE)).decode("utf-8"))]
+        self.beginInsertRows(QModelIndex(), row, row + len(commands) - 1)
+        self._commands[row:row] = commands
+        self._loaded += len(commands)
+        self.endInsertRows()
+        # 原位置的行由视图随后调用 removeRows 删除
+        return True
+
+    def removeRows(self, row, count, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row + count > self._loaded:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row + count - 1)
+        del self._commands[row:row + count]
+        self._loaded -= count
+        self.endRemoveRows()
+        return True
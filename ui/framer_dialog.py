@@ -0,0 +1,132 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QComboBox, QLineEdit, QSpinBox,
+                             QDialogButtonBox, QMessageBox)
+
+from manager.framer import FRAMER_TYPES, DEFAULT_FRAMER_CONFIG
+
+
+class FramerDialog(QDialog):
+    """编辑设备的分帧方式"""
+
+    def __init__(self, config=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("帧格式")
+        self.setModal(True)
+        self.resize(360, 240)
+        self.config = dict(config or DEFAULT_FRAMER_CONFIG)
+        self.init_ui()
+        self.load_config()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        self.form = QFormLayout()
+
+        self.type_combo = QComboBox()
+        for kind, name in FRAMER_TYPES.items():
+            self.type_combo.addItem(name, kind)
+        self.type_combo.currentIndexChanged.connect(self.update_fields)
+        self.form.addRow("分帧方式:", self.type_combo)
+
+        self.delimiter_edit = QLineEdit()
+        self.delimiter_edit.setPlaceholderText("HEX，如 0D 0A")
+        self.form.addRow("分隔符:", self.delimiter_edit)
+        self.idle_spin = QSpinBox()
+        self.idle_spin.setRange(0, 10000)
+        self.idle_spin.setSuffix(" ms")
+        self.idle_spin.setSpecialValueText("关闭")
+        self.idle_spin.setToolTip("超过该时间没有新数据时，输出尚未遇到分隔符的数据（如提示符）")
+        self.form.addRow("无分隔符输出:", self.idle_spin)
+
+        self.length_spin = QSpinBox()
+        self.length_spin.setRange(1, 65535)
+        self.form.addRow("帧长度:", self.length_spin)
+
+        self.header_size_spin = QSpinBox()
+        self.header_size_spin.setRange(1, 64)
+        self.form.addRow("帧头长度:", self.header_size_spin)
+        self.length_offset_spin = QSpinBox()
+        self.length_offset_spin.setRange(0, 63)
+        self.form.addRow("长度字段偏移:", self.length_offset_spin)
+        self.length_size_spin = QSpinBox()
+        self.length_size_spin.setRange(1, 4)
+        self.form.addRow("长度字段字节数:", self.length_size_spin)
+        self.byteorder_combo = QComboBox()
+        self.byteorder_combo.addItem("大端", "big")
+        self.byteorder_combo.addItem("小端", "little")
+        self.form.addRow("字节序:", self.byteorder_combo)
+        self.length_adjust_spin = QSpinBox()
+        self.length_adjust_spin.setRange(-64, 64)
+        self.form.addRow("长度修正:", self.length_adjust_spin)
+
+        self.gap_spin = QSpinBox()
+        self.gap_spin.setRange(1, 10000)
+        self.gap_spin.setSuffix(" ms")
+        self.form.addRow("字节间超时:", self.gap_spin)
+
+        layout.addLayout(self.form)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText("确定")
+        button_box.accepted.connect(self.accept)
+        button_box.button(QDialogButtonBox.Cancel).setText("取消")
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def load_config(self):
+        config = self.config
+        self.type_combo.setCurrentIndex(max(0, self.type_combo.findData(config.get("type", "delimiter"))))
+        self.delimiter_edit.setText(config.get("delimiter", "0A"))
+        self.idle_spin.setValue(int(config.get("idle_ms", 100)))
+        self.length_spin.setValue(int(config.get("length", 8)))
+        self.header_size_spin.setValue(int(config.get("header_size", 2)))
+        self.length_offset_spin.setValue(int(config.get("length_offset", 0)))
+        self.length_size_spin.setValue(int(config.get("length_size", 2)))
+        self.byteorder_combo.setCurrentIndex(max(0, self.byteorder_combo.findData(config.get("byteorder", "big"))))
+        self.length_adjust_spin.setValue(int(config.get("length_adjust", 0)))
+        self.gap_spin.setValue(int(config.get("gap_ms", 5)))
+        self.update_fields()
+
+    def update_fields(self):
+        """只显示当前分帧方式需要的参数"""
+        kind = self.type_combo.currentData()
+        visible = {
+            self.delimiter_edit: kind == "delimiter",
+            self.idle_spin: kind == "delimiter",
+            self.length_spin: kind == "fixed",
+            self.header_size_spin: kind == "length_prefix",
+            self.length_offset_spin: kind == "length_prefix",
+            self.length_size_spin: kind == "length_prefix",
+            self.byteorder_combo: kind == "length_prefix",
+            self.length_adjust_spin: kind == "length_prefix",
+            self.gap_spin: kind == "timeout",
+        }
+        for widget, show in visible.items():
+            widget.setVisible(show)
+            self.form.labelForField(widget).setVisible(show)
+
+    def accept(self):
+        kind = self.type_combo.currentData()
+        config = {"type": kind}
+        if kind == "delimiter":
+            delimiter = self.delimiter_edit.text().replace(" ", "").upper()
+            try:
+                if not delimiter or len(bytes.fromhex(delimiter)) == 0:
+                    raise ValueError
+            except ValueError:
+                QMessageBox.warning(self, "错误", "分隔符必须是有效的 HEX 字节")
+                return
+            config["delimiter"] = delimiter
+            config["idle_ms"] = self.idle_spin.value()
+        elif kind == "fixed":
+            config["length"] = self.length_spin.value()
+        elif kind == "length_prefix":
+            config.update({
+                "header_size": self.header_size_spin.value(),
+                "length_offset": self.length_offset_spin.value(),
+                "length_size": self.length_size_spin.value(),
+                "byteorder": self.byteorder_combo.currentData(),
+                "length_adjust": self.length_adjust_spin.value(),
+            })
+        elif kind == "timeout":
+            config["gap_ms"] = self.gap_spin.value()
+        self.config = config
+        super().accept()
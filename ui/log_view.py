@@ -0,0 +1,158 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QListView, QAbstractItemView, QApplication, QInputDialog
+
+
+class LogModel(QAbstractListModel):
+    """环形缓冲区日志模型，超过行数上限时丢弃最早的行"""
+
+    def __init__(self, max_lines=1000000, parent=None):
+        super().__init__(parent)
+        self.max_lines = max(1, max_lines)
+        self._lines = []
+        # 缓冲区写满后，最早一行所在的位置
+        self._head = 0
+        # 保留的行数（缓冲区写满后丢弃最早的行时先减少，再由追加覆盖这些位置）
+        self._count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.line(index.row())
+        return None
+
+    def line(self, row):
+        """按行号（0 为最早保留的行）取一行"""
+        return self._lines[(self._head + row) % len(self._lines)]
+
+    def lines(self):
+        """按时间顺序返回全部保留的行"""
+        return (self._lines[self._head:] + self._lines[:self._head])[:self._count]
+
+    def append_lines(self, lines):
+        """追加多行"""
+        if not lines:
+            return
+        if len(lines) > self.max_lines:
+            lines = lines[-self.max_lines:]
+        overflow = self._count + len(lines) - self.max_lines
+        if overflow > 0:
+            # 先移除最早的行，再在尾部插入
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self._drop_oldest(overflow)
+            self.endRemoveRows()
+        count = self._count
+        self.beginInsertRows(QModelIndex(), count, count + len(lines) - 1)
+        if len(self._lines) + len(lines) <= self.max_lines:
+            # 缓冲区未满时 _head 为 0 且 _count 等于列表长度
+            self._lines.extend(lines)
+        else:
+            size = len(self._lines)
+            for i, line in enumerate(lines):
+                self._lines[(self._head + count + i) % size] = line
+        self._count += len(lines)
+        self.endInsertRows()
+
+    def _drop_oldest(self, n):
+        """丢弃最早的 n 行：缓冲区未满时从列表中删除，已满时只前移 _head，空出的位置由随后的追加覆盖"""
+        if len(self._lines) < self.max_lines:
+            del self._lines[:n]
+        else:
+            self._head = (self._head + n) % len(self._lines)
+        self._count -= n
+
+    def set_max_lines(self, max_lines):
+        """调整行数上限，只保留最新的行"""
+        max_lines = max(1, max_lines)
+        lines = self.lines()[-max_lines:]
+        self.beginResetModel()
+        self.max_lines = max_lines
+        self._lines = lines
+        self._head = 0
+        self._count = len(lines)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._lines = []
+        self._head = 0
+        self._count = 0
+        self.endResetModel()
+
+
+class LogView(QListView):
+    """只渲染可见行的日志视图，支持查找（Ctrl+F / F3）和复制（Ctrl+C）"""
+
+    def __init__(self, max_lines=1000000, parent=None):
+        super().__init__(parent)
+        self.log_model = LogModel(max_lines, self)
+        self.setModel(self.log_model)
+        # 行高一致时只需计算可见区域
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setWordWrap(False)
+        self._search_text = ""
+
+    def append(self, text: str):
+        """追加文本，多行文本按行拆分"""
+        self.append_lines(text.split("\n"))
+
+    def append_lines(self, lines):
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        self.log_model.append_lines(lines)
+        if at_bottom:
+            self.scrollToBottom()
+
+    def clear(self):
+        self.log_model.clear()
+
+    def set_max_lines(self, max_lines):
+        self.log_model.set_max_lines(max_lines)
+
+    def copy_selection(self):
+        """复制选中的行"""
+        rows = sorted(index.row() for index in self.selectionModel().selectedIndexes())
+        if rows:
+            QApplication.clipboard().setText("\n".join(self.log_model.line(row) for row in rows))
+
+    def find(self, text, backward=False):
+        """从当前行开始查找包含 text 的行并选中，找到返回 True"""
+        if not text:
+            return False
+        model = self.log_model
+        count = model.rowCount()
+        if not count:
+            return False
+        current = self.currentIndex().row() if self.currentIndex().isValid() else (count if backward else -1)
+        step = -1 if backward else 1
+        row = current
+        for _ in range(count):
+            row = (row + step) % count
+            if text in model.line(row):
+                index = model.index(row)
+                self.setCurrentIndex(index)
+                self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+                return True
+        return False
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy_selection()
+        elif event.matches(QKeySequence.Find):
+            text, ok = QInputDialog.getText(self, "查找", "查找内容：", text=self._search_text)
+            if ok and text:
+                self._search_text = text
+                self.find(text)
+        elif event.matches(QKeySequence.FindNext):
+            self.find(self._search_text)
+        elif event.matches(QKeySequence.FindPrevious):
+            self.find(self._search_text, backward=True)
+        else:
+            super().keyPressEvent(event)
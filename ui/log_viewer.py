@@ -0,0 +1,251 @@
+import os
+import re
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt5.QtGui import QFontDatabase
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit, QCheckBox, QTableView,
+                             QHeaderView, QListWidget, QListWidgetItem, QSplitter, QProgressBar, QAbstractItemView,
+                             QMessageBox)
+
+from manager.log_reader import LinePattern, LogFileIndex
+from thread.log_search_thread import LogGrepThread, LogIndexThread
+
+# 按块读取并缓存行，滚动时不必逐行访问文件
+BLOCK_LINES = 256
+MAX_CACHED_BLOCKS = 64
+
+
+class LogFileModel(QAbstractListModel):
+    """按需从 LogFileIndex 读取可见行的只读模型"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log_index = None
+        self._rows = 0
+        self._blocks = OrderedDict()
+
+    def set_index(self, index):
+        """切换索引（None 表示正在建立索引，暂时不显示）"""
+        self.beginResetModel()
+        self.log_index = index
+        self._rows = index.line_count if index else 0
+        self._blocks.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.line(index.row())
+        return None
+
+    def line(self, row):
+        block_no = row // BLOCK_LINES
+        block = self._blocks.get(block_no)
+        if block is None:
+            block = self.log_index.read_lines(block_no * BLOCK_LINES, BLOCK_LINES)
+            self._blocks[block_no] = block
+            if len(self._blocks) > MAX_CACHED_BLOCKS:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_no)
+        offset = row - block_no * BLOCK_LINES
+        return block[offset] if offset < len(block) else ""
+
+
+class LogViewerDialog(QDialog):
+    """大日志文件查看器：稀疏行索引 + mmap 只读取可见行，可按时间跳转，后台查找"""
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"查看日志 - {os.path.basename(path)}")
+        self.resize(1000, 700)
+        self.path = path
+        self.index = LogFileIndex(path)
+        self.index_thread = None
+        self.grep_thread = None
+        # 刷新索引后恢复到的行
+        self._restore_row = None
+
+        layout = QVBoxLayout(self)
+        info_layout = QHBoxLayout()
+        self.info_label = QLabel(path)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.setToolTip("读取日志新增的内容")
+        refresh_btn.clicked.connect(self.build_index)
+        info_layout.addWidget(self.info_label, 1)
+        info_layout.addWidget(self.progress_bar)
+        info_layout.addWidget(refresh_btn)
+        layout.addLayout(info_layout)
+
+        search_layout = QHBoxLayout()
+        self.time_edit = QLineEdit()
+        self.time_edit.setPlaceholderText("跳转到时间 YYYY-MM-DD HH:MM:SS")
+        self.time_edit.returnPressed.connect(self.jump_to_time)
+        jump_btn = QPushButton("跳转")
+        jump_btn.clicked.connect(self.jump_to_time)
+        self.grep_edit = QLineEdit()
+        self.grep_edit.setPlaceholderText("查找内容")
+        self.grep_edit.returnPressed.connect(self.toggle_grep)
+        self.regex_check = QCheckBox("正则")
+        self.case_check = QCheckBox("区分大小写")
+        self.grep_btn = QPushButton("查找")
+        self.grep_btn.clicked.connect(self.toggle_grep)
+        search_layout.addWidget(self.time_edit)
+        search_layout.addWidget(jump_btn)
+        search_layout.addSpacing(20)
+        search_layout.addWidget(self.grep_edit, 1)
+        search_layout.addWidget(self.regex_check)
+        search_layout.addWidget(self.case_check)
+        search_layout.addWidget(self.grep_btn)
+        layout.addLayout(search_layout)
+
+        font = QFontDatabase.systemFont(QFontDatabase.FixedFont)
+        splitter = QSplitter(Qt.Vertical)
+        self.model = LogFileModel(self)
+        # QTableView 的固定行高布局与行数无关（QListView 对数百万行逐行布局，打开要十几秒）
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.setFont(font)
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.horizontalHeader().hide()
+        self.view.verticalHeader().hide()
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().setDefaultSectionSize(self.view.fontMetrics().height() + 4)
+        splitter.addWidget(self.view)
+        self.result_list = QListWidget()
+        self.result_list.setUniformItemSizes(True)
+        self.result_list.setFont(font)
+        self.result_list.itemActivated.connect(self.on_result_activated)
+        self.result_list.itemClicked.connect(self.on_result_activated)
+        splitter.addWidget(self.result_list)
+        splitter.setSizes([500, 200])
+        layout.addWidget(splitter)
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        self.finished.connect(self.stop_threads)
+        self.build_index()
+
+    # ------------------------- 索引 -------------------------
+    def build_index(self):
+        """建立或刷新索引（已有缓存时只扫描新增部分）"""
+        if self.index_thread and self.index_thread.isRunning():
+            return
+        if self.grep_thread and self.grep_thread.isRunning():
+            self.grep_thread.stop()
+        if self.model.log_index is not None:
+            top = self.view.indexAt(self.view.viewport().rect().topLeft())
+            self._restore_row = top.row() if top.isValid() else None
+        # 扫描期间索引会重新映射文件，先断开模型
+        self.model.set_index(None)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.status_label.setText("正在建立索引...")
+        self.index_thread = LogIndexThread(self.index)
+        self.index_thread.progress.connect(self.progress_bar.setValue)
+        self.index_thread.finished_signal.connect(self.on_index_ready)
+        self.index_thread.start()
+
+    def on_index_ready(self, ok, error):
+        self.progress_bar.hide()
+        if not ok:
+            self.status_label.setText(f"❌ 建立索引失败: {error}")
+            return
+        self.model.set_index(self.index)
+        self.fit_column()
+        size_mb = self.index.indexed_size / 1024 / 1024
+        self.info_label.setText(f"{self.path}  {self.index.line_count} 行，{size_mb:.1f} MB")
+        self.status_label.setText("")
+        if self._restore_row is not None:
+            self.scroll_to_line(min(self._restore_row, self.index.line_count - 1), select=False)
+            self._restore_row = None
+
+    def fit_column(self):
+        """按开头若干行的宽度设置列宽，较长的行可以横向滚动（不按全部行计算）"""
+        metrics = self.view.fontMetrics()
+        width = max((metrics.horizontalAdvance(line) for line in self.index.read_lines(0, BLOCK_LINES)), default=0)
+        self.view.setColumnWidth(0, max(width + 20, self.view.viewport().width()))
+
+    def scroll_to_line(self, line_no, select=True):
+        if line_no < 0 or line_no >= self.model.rowCount():
+            return
+        index = self.model.index(line_no)
+        if select:
+            self.view.scrollTo(index, QAbstractItemView.PositionAtCenter)
+            self.view.setCurrentIndex(index)
+        else:
+            self.view.scrollTo(index, QAbstractItemView.PositionAtTop)
+
+    def jump_to_time(self):
+        text = self.time_edit.text().strip()
+        if not re.fullmatch(r"\d{4}-\d{2}-\d{2}( \d{2}(:\d{2}(:\d{2})?)?)?", text):
+            QMessageBox.warning(self, "错误", "时间格式应为 YYYY-MM-DD HH:MM:SS（可省略时分秒）")
+            return
+        if self.model.log_index is None:
+            return
+        # 补全省略的部分，按字符串比较
+        stamp = text + " 00:00:00"[len(text) - 10:]
+        line_no = self.index.find_time(stamp)
+        if line_no is None:
+            self.status_label.setText(f"没有不早于 {stamp} 的日志")
+            return
+        self.scroll_to_line(line_no)
+        self.status_label.setText(f"跳转到第 {line_no + 1} 行")
+
+    # ------------------------- 查找 -------------------------
+    def toggle_grep(self):
+        if self.grep_thread and self.grep_thread.isRunning():
+            self.grep_thread.stop()
+            return
+        text = self.grep_edit.text()
+        if not text or self.model.log_index is None:
+            return
+        try:
+            pattern = LinePattern(text, self.regex_check.isChecked(), self.case_check.isChecked())
+        except re.error as e:
+            QMessageBox.warning(self, "错误", f"正则表达式无效: {e}")
+            return
+        self.result_list.clear()
+        self.grep_btn.setText("停止")
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.grep_thread = LogGrepThread(self.path, pattern, self.index.indexed_size)
+        self.grep_thread.matches.connect(self.on_grep_matches)
+        self.grep_thread.progress.connect(self.progress_bar.setValue)
+        self.grep_thread.finished_signal.connect(self.on_grep_finished)
+        self.grep_thread.start()
+
+    def on_grep_matches(self, matches):
+        for line_no, text in matches:
+            item = QListWidgetItem(f"{line_no + 1}: {text}")
+            item.setData(Qt.UserRole, line_no)
+            self.result_list.addItem(item)
+        self.status_label.setText(f"已找到 {self.result_list.count()} 处...")
+
+    def on_grep_finished(self, total, truncated):
+        self.grep_btn.setText("查找")
+        self.progress_bar.hide()
+        suffix = "（结果过多，只显示前面部分）" if truncated else ""
+        self.status_label.setText(f"共找到 {total} 行{suffix}")
+
+    def on_result_activated(self, item):
+        self.scroll_to_line(item.data(Qt.UserRole))
+
+    def stop_threads(self):
+        for thread in (self.index_thread, self.grep_thread):
+            if thread and thread.isRunning():
+                thread.stop()
+        self.index.close()
@@ -89,6 +89,52 @@ class SettingsDialog(QDialog):
         self.auto_connect_check = QCheckBox("启动时自动连接串口(会影响启动速度，不建议启用)")
         self.auto_connect_check.stateChanged.connect(self.on_settings_changed)
         serial_layout.addWidget(self.auto_connect_check)
+        # 原始数据抓包
+        self.raw_capture_check = QCheckBox("记录原始数据（二进制抓包，带时间戳）")
+        self.raw_capture_check.stateChanged.connect(self.on_settings_changed)
+        serial_layout.addWidget(self.raw_capture_check)
+        capture_mode_layout = QHBoxLayout()
+        capture_mode_layout.addWidget(QLabel("抓包方式:"))
+        self.capture_mode_combo = QComboBox()
+        self.capture_mode_combo.addItem("按块追加（.bin）", "records")
+        self.capture_mode_combo.addItem("内存映射环形文件（.ring，高波特率）", "ring")
+        self.capture_mode_combo.currentIndexChanged.connect(self.on_settings_changed)
+        capture_mode_layout.addWidget(self.capture_mode_combo)
+        capture_mode_layout.addWidget(QLabel("环大小:"))
+        self.ring_size_spin = QSpinBox()
+        self.ring_size_spin.setRange(1, 65536)
+        self.ring_size_spin.setSuffix(" MB")
+        self.ring_size_spin.valueChanged.connect(self.on_settings_changed)
+        capture_mode_layout.addWidget(self.ring_size_spin)
+        serial_layout.addLayout(capture_mode_layout)
+        self.decode_text_check = QCheckBox("接收时解码并显示文本（关闭后仅抓包）")
+        self.decode_text_check.stateChanged.connect(self.on_settings_changed)
+        serial_layout.addWidget(self.decode_text_check)
+        # 接收方式
+        backend_layout = QHBoxLayout()
+        backend_layout.addWidget(QLabel("接收方式(重启生效):"))
+        self.backend_combo = QComboBox()
+        self.backend_combo.addItem("每个串口一个线程", "thread")
+        self.backend_combo.addItem("asyncio 共享 I/O 线程（多串口）", "asyncio")
+        self.backend_combo.currentIndexChanged.connect(self.on_settings_changed)
+        backend_layout.addWidget(self.backend_combo)
+        serial_layout.addLayout(backend_layout)
+        # 发送队列
+        tx_layout = QHBoxLayout()
+        tx_layout.addWidget(QLabel("发送合并: 单次最多"))
+        self.tx_batch_spin = QSpinBox()
+        self.tx_batch_spin.setRange(1, 1024)
+        self.tx_batch_spin.setSuffix(" KB")
+        self.tx_batch_spin.valueChanged.connect(self.on_settings_changed)
+        tx_layout.addWidget(self.tx_batch_spin)
+        tx_layout.addWidget(QLabel("最多等待"))
+        self.tx_delay_spin = QSpinBox()
+        self.tx_delay_spin.setRange(0, 1000)
+        self.tx_delay_spin.setSuffix(" ms")
+        self.tx_delay_spin.setToolTip("等待更多数据合并成一次写入的时间，0 表示有数据就立即写入（打开串口时生效）")
+        self.tx_delay_spin.valueChanged.connect(self.on_settings_changed)
+        tx_layout.addWidget(self.tx_delay_spin)
+        serial_layout.addLayout(tx_layout)
         serial_group.setLayout(serial_layout)
         layout.addWidget(serial_group)
 
@@ -99,6 +145,51 @@ class SettingsDialog(QDialog):
         self.logging_status_check = QCheckBox("记录日志文件")
         self.logging_status_check.stateChanged.connect(self.on_settings_changed)
         other_layout.addWidget(self.logging_status_check)
+        # 日志显示行数上限
+        max_lines_layout = QHBoxLayout()
+        max_lines_layout.addWidget(QLabel("日志显示行数上限:"))
+        self.max_log_lines_spin = QSpinBox()
+        self.max_log_lines_spin.setRange(1000, 10000000)
+        self.max_log_lines_spin.setSingleStep(100000)
+        self.max_log_lines_spin.valueChanged.connect(self.on_settings_changed)
+        max_lines_layout.addWidget(self.max_log_lines_spin)
+        other_layout.addLayout(max_lines_layout)
+        # 日志文件切换
+        rotate_layout = QHBoxLayout()
+        rotate_layout.addWidget(QLabel("单个日志文件上限:"))
+        self.log_max_size_spin = QSpinBox()
+        self.log_max_size_spin.setRange(0, 10240)
+        self.log_max_size_spin.setSuffix(" MB")
+        self.log_max_size_spin.setSpecialValueText("不限制")
+        self.log_max_size_spin.valueChanged.connect(self.on_settings_changed)
+        rotate_layout.addWidget(self.log_max_size_spin)
+        rotate_layout.addWidget(QLabel("按时间切换:"))
+        self.log_rotate_hours_spin = QSpinBox()
+        self.log_rotate_hours_spin.setRange(0, 168)
+        self.log_rotate_hours_spin.setSuffix(" 小时")
+        self.log_rotate_hours_spin.setSpecialValueText("不切换")
+        self.log_rotate_hours_spin.valueChanged.connect(self.on_settings_changed)
+        rotate_layout.addWidget(self.log_rotate_hours_spin)
+        other_layout.addLayout(rotate_layout)
+        # 历史记录条数上限
+        max_history_layout = QHBoxLayout()
+        max_history_layout.addWidget(QLabel("历史记录条数上限(重启生效):"))
+        self.max_history_spin = QSpinBox()
+        self.max_history_spin.setRange(100, 1000000)
+        self.max_history_spin.setSingleStep(1000)
+        self.max_history_spin.valueChanged.connect(self.on_settings_changed)
+        max_history_layout.addWidget(self.max_history_spin)
+        other_layout.addLayout(max_history_layout)
+        # 自动化每步等待回复的超时时间
+        reply_timeout_layout = QHBoxLayout()
+        reply_timeout_layout.addWidget(QLabel("自动化回复超时:"))
+        self.reply_timeout_spin = QSpinBox()
+        self.reply_timeout_spin.setRange(10, 600000)
+        self.reply_timeout_spin.setSingleStep(100)
+        self.reply_timeout_spin.setSuffix(" ms")
+        self.reply_timeout_spin.valueChanged.connect(self.on_settings_changed)
+        reply_timeout_layout.addWidget(self.reply_timeout_spin)
+        other_layout.addLayout(reply_timeout_layout)
         other_group.setLayout(other_layout)
         layout.addWidget(other_group)
 
@@ -161,7 +252,20 @@ class SettingsDialog(QDialog):
         self.theme_combo.setCurrentText(settings.value("ui/theme", "系统默认"))
         self.baud_combo.setCurrentText(settings.value("serial/default_baud", "115200"))
         self.auto_connect_check.setChecked(settings.value("serial/auto_connect", False, type=bool))
+        self.raw_capture_check.setChecked(settings.value("capture/raw_enabled", False, type=bool))
+        self.decode_text_check.setChecked(settings.value("capture/decode_text", True, type=bool))
+        self.capture_mode_combo.setCurrentIndex(
+            max(0, self.capture_mode_combo.findData(settings.value("capture/mode", "records"))))
+        self.ring_size_spin.setValue(settings.value("capture/ring_size_mb", 1024, type=int))
+        self.backend_combo.setCurrentIndex(max(0, self.backend_combo.findData(settings.value("serial/backend", "thread"))))
+        self.tx_batch_spin.setValue(settings.value("serial/tx_batch_kb", 16, type=int))
+        self.tx_delay_spin.setValue(settings.value("serial/tx_delay_ms", 0, type=int))
         self.logging_status_check.setChecked(self.parent.settings.value("logging/status", True, type=bool))
+        self.max_log_lines_spin.setValue(settings.value("ui/max_log_lines", 1000000, type=int))
+        self.log_max_size_spin.setValue(settings.value("logging/max_size_mb", 100, type=int))
+        self.log_rotate_hours_spin.setValue(settings.value("logging/rotate_hours", 0, type=int))
+        self.max_history_spin.setValue(settings.value("history/max_history", 1000, type=int))
+        self.reply_timeout_spin.setValue(settings.value("automation/reply_timeout_ms", 1000, type=int))
 
         # 重置更改标志
         self.settings_changed = False
@@ -180,8 +284,20 @@ class SettingsDialog(QDialog):
         settings.setValue("ui/theme", self.theme_combo.currentText())
         settings.setValue("serial/default_baud", self.baud_combo.currentText())
         settings.setValue("serial/auto_connect", self.auto_connect_check.isChecked())
+        settings.setValue("capture/raw_enabled", self.raw_capture_check.isChecked())
+        settings.setValue("capture/decode_text", self.decode_text_check.isChecked())
+        settings.setValue("capture/mode", self.capture_mode_combo.currentData())
+        settings.setValue("capture/ring_size_mb", self.ring_size_spin.value())
+        settings.setValue("serial/backend", self.backend_combo.currentData())
+        settings.setValue("serial/tx_batch_kb", self.tx_batch_spin.value())
+        settings.setValue("serial/tx_delay_ms", self.tx_delay_spin.value())
         print("记录日志: ", self.logging_status_check.isChecked())
         settings.setValue("logging/status", self.logging_status_check.isChecked())
+        settings.setValue("ui/max_log_lines", self.max_log_lines_spin.value())
+        settings.setValue("logging/max_size_mb", self.log_max_size_spin.value())
+        settings.setValue("logging/rotate_hours", self.log_rotate_hours_spin.value())
+        settings.setValue("history/max_history", self.max_history_spin.value())
+        settings.setValue("automation/reply_timeout_ms", self.reply_timeout_spin.value())
 
         settings.sync()  # 确保设置立即保存
         return True
@@ -0,0 +1,148 @@
+import datetime
+import time
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton,
+                             QHeaderView, QFileDialog, QMessageBox)
+
+# 指标的显示名称，未列出的直接显示指标名
+METRIC_NAMES = {
+    "rx_bytes": "接收字节",
+    "rx_read_size": "单次读取字节",
+    "rx_frames": "接收帧",
+    "rx_signal_queue": "待显示批次",
+    "rx_display_latency_ms": "接收到显示时延",
+    "tx_bytes": "发送字节",
+    "tx_writes": "写入次数",
+    "tx_queue_bytes": "发送队列",
+    "tx_write_size": "单次写入字节",
+    "tx_blocked_ms": "等待可写（流控）",
+    "tx_dropped_bytes": "队列满未发送",
+    "send_jitter_us": "循环发送抖动",
+    "log_lag_ms": "日志写入滞后",
+    "log_backlog": "日志单次积压",
+    "log_lines": "日志行数",
+}
+COLUMNS = ("指标", "当前值", "速率/s", "平均", "p50", "p95", "p99", "最大")
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 10 else f"{value:.1f}"
+    return str(value)
+
+
+class StatsDialog(QDialog):
+    """实时统计面板：每秒刷新当前会话的收发指标，可重置或导出为 JSON"""
+
+    def __init__(self, source, parent=None, interval_ms=1000):
+        """
+        :param source: 无参函数，返回 (标题, Stats)，没有可用会话时返回 None
+        """
+        super().__init__(parent)
+        self.setWindowTitle("统计")
+        self.resize(760, 420)
+        self.source = source
+        # 上一次刷新时的计数，用于计算速率
+        self._last = {}
+        self._last_time = None
+        self._last_stats = None
+
+        layout = QVBoxLayout(self)
+        self.title_label = QLabel("")
+        layout.addWidget(self.title_label)
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.reset_btn = QPushButton("重置")
+        self.reset_btn.clicked.connect(self.reset_stats)
+        self.export_btn = QPushButton("导出 JSON")
+        self.export_btn.clicked.connect(self.export_json)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.reset_btn)
+        btn_layout.addWidget(self.export_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval_ms)
+        self.refresh()
+
+    def refresh(self):
+        current = self.source()
+        if current is None:
+            self.title_label.setText("没有打开的串口")
+            self.table.setRowCount(0)
+            self._last_stats = None
+            return
+        title, stats = current
+        if stats is not self._last_stats:
+            # 切换了会话，速率从头计算
+            self._last = {}
+            self._last_time = None
+            self._last_stats = stats
+        snapshot = stats.snapshot()
+        now = time.monotonic()
+        elapsed = now - self._last_time if self._last_time else None
+        self.title_label.setText(f"{title}  统计时长 {snapshot['uptime_s']:.0f}s")
+
+        metrics = snapshot["metrics"]
+        self.table.setRowCount(len(metrics))
+        for row, (name, m) in enumerate(metrics.items()):
+            unit = f" ({m['unit']})" if m["unit"] else ""
+            rate = None
+            if m["type"] == "counter":
+                value = m["value"]
+                count = value
+            elif m["type"] == "gauge":
+                value = m["value"]
+                count = None
+            else:
+                value = m["count"]
+                count = m["count"]
+            if count is not None and elapsed and name in self._last:
+                rate = (count - self._last[name]) / elapsed
+            if count is not None:
+                self._last[name] = count
+            cells = (METRIC_NAMES.get(name, name) + unit, value, rate, m.get("avg"), m.get("p50"), m.get("p95"),
+                     m.get("p99"), m.get("max"))
+            for col, cell in enumerate(cells):
+                self.table.setItem(row, col, QTableWidgetItem(cell if col == 0 else _fmt(cell)))
+        self._last_time = now
+
+    def reset_stats(self):
+        current = self.source()
+        if current is not None:
+            current[1].reset()
+            self._last = {}
+            self._last_time = None
+            self.refresh()
+
+    def export_json(self):
+        current = self.source()
+        if current is None:
+            QMessageBox.warning(self, "错误", "没有打开的串口")
+            return
+        title, stats = current
+        default = f"stats_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "导出统计", default, "JSON 文件 (*.json)")
+        if not path:
+            return
+        if stats.dump(path, session=title):
+            QMessageBox.information(self, "导出统计", f"已保存到 {path}")
+        else:
+            QMessageBox.warning(self, "错误", "保存统计失败")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        super().closeEvent(event)
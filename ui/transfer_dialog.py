@@ -0,0 +1,128 @@
+import os
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QLineEdit,
+                             QProgressBar, QFileDialog, QMessageBox)
+
+from manager.file_transfer import PROTOCOLS, line_rate
+from thread.file_transfer_thread import FileTransferThread
+
+
+def _fmt_size(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GB"
+
+
+def _fmt_time(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}" if seconds >= 3600 else \
+        f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class FileTransferDialog(QDialog):
+    """向当前串口发送文件（原始数据 / XMODEM-1K / YMODEM），显示进度、速率、线速利用率和剩余时间"""
+
+    def __init__(self, session, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"发送文件 - {session.port}")
+        self.resize(560, 220)
+        self.session = session
+        self.thread = None
+        # 理论线速（字节/秒），用于计算利用率
+        self.line_rate = line_rate(session.params)
+
+        layout = QVBoxLayout(self)
+        file_layout = QHBoxLayout()
+        self.path_edit = QLineEdit()
+        self.path_edit.setPlaceholderText("选择要发送的文件")
+        browse_btn = QPushButton("浏览")
+        browse_btn.clicked.connect(self.browse)
+        file_layout.addWidget(self.path_edit, 1)
+        file_layout.addWidget(browse_btn)
+        layout.addLayout(file_layout)
+
+        option_layout = QHBoxLayout()
+        option_layout.addWidget(QLabel("传输方式:"))
+        self.protocol_combo = QComboBox()
+        for key, name in PROTOCOLS.items():
+            self.protocol_combo.addItem(name, key)
+        option_layout.addWidget(self.protocol_combo)
+        option_layout.addStretch()
+        self.start_btn = QPushButton("开始")
+        self.start_btn.clicked.connect(self.toggle)
+        option_layout.addWidget(self.start_btn)
+        layout.addLayout(option_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        layout.addWidget(self.progress_bar)
+        self.progress_label = QLabel("")
+        layout.addWidget(self.progress_label)
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.finished.connect(self.stop)
+
+    def browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "选择文件", self.path_edit.text(), "所有文件 (*)")
+        if path:
+            self.path_edit.setText(path)
+
+    def toggle(self):
+        if self.thread and self.thread.isRunning():
+            self.thread.sender.stop()
+            return
+        path = self.path_edit.text().strip()
+        if not os.path.isfile(path):
+            QMessageBox.warning(self, "错误", "请选择要发送的文件")
+            return
+        session = self.session
+        if not session.is_open:
+            QMessageBox.warning(self, "错误", "串口未打开")
+            return
+        running = session.transfer_thread
+        if running and running.isRunning():
+            QMessageBox.warning(self, "错误", "该串口正在发送其他文件")
+            return
+        self.thread = FileTransferThread(session.serial, path, self.protocol_combo.currentData(),
+                                         receiver=session.receiver, log_mgr=session.log_mgr)
+        self.thread.progress.connect(self.on_progress)
+        self.thread.log_signal.connect(self.status_label.setText)
+        self.thread.finished_signal.connect(self.on_finished)
+        session.transfer_thread = self.thread
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
+        self.start_btn.setText("取消")
+        self.protocol_combo.setEnabled(False)
+        self.path_edit.setEnabled(False)
+        self.thread.start()
+
+    def on_progress(self, info):
+        total = info["total"]
+        done = info["done"]
+        self.progress_bar.setValue(int(done * 1000 / total) if total else 1000)
+        rate = info["rate"]
+        text = f"{_fmt_size(done)} / {_fmt_size(total)}    {_fmt_size(rate)}/s"
+        if self.line_rate:
+            text += f"（线速 {rate * 100 / self.line_rate:.0f}%）"
+        text += f"    已用 {_fmt_time(info['elapsed_s'])}  剩余 {_fmt_time(info['eta_s'])}"
+        self.progress_label.setText(text)
+
+    def on_finished(self, ok, error):
+        self.start_btn.setText("开始")
+        self.protocol_combo.setEnabled(True)
+        self.path_edit.setEnabled(True)
+        if ok:
+            self.progress_bar.setValue(1000)
+
+    def stop(self):
+        """关闭对话框时取消发送"""
+        if self.thread and self.thread.isRunning():
+            self.thread.stop()
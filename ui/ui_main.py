@@ -5,23 +5,41 @@ import subprocess
 import time
 
 import qtawesome as qta
-from PyQt5.QtCore import QSettings, Qt, QSize, QTimer
+from PyQt5.QtCore import QSettings, Qt, QSize, pyqtSignal
 from PyQt5.QtGui import QPixmap, QPainterPath, QRegion, QPainter, QPen, QColor
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox, QTextEdit, QListWidget, \
     QListWidgetItem, QSizePolicy, QDialog, QMainWindow, QMessageBox, QApplication, \
-    QSpacerItem, QCheckBox, QSpinBox, QInputDialog, QAbstractItemView
+    QSpacerItem, QCheckBox, QSpinBox, QDoubleSpinBox, QInputDialog, QAbstractItemView, QFileDialog, \
+    QTabWidget, QListView
 
 from manager.device_manager import DeviceManager
+from manager.framer import create_framer, describe_framer
 from manager.history_manager import HistoryManager
 from manager.log_manager import LogManager
-from manager.serial_manager import SerialManager
+from manager.script_engine import AutomationStep, Expectation, Program, ScriptError, load_script
+from manager.serial_manager import SerialManager, compile_command
+from manager.session_manager import SessionManager
 from manager.theme_manager import ThemeManager
 from thread.automation_thread import AutomationThread
-from thread.serial_receiver import SerialReceiver
+from thread.batch_automation_thread import BatchAutomationThread
+from thread.command_import_thread import CommandImportThread
+from thread.history_search_thread import HistorySearchThread
+from thread.send_scheduler import SendScheduler
+from ui.batch_dialog import BatchDialog
+from ui.capture_viewer import CaptureViewerDialog
+from ui.command_list import CommandListModel
+from ui.command_input import CommandInput
+from ui.framer_dialog import FramerDialog
+from ui.log_view import LogView
+from ui.log_viewer import LogViewerDialog
 from ui.setting_dialog import SettingsDialog
+from ui.stats_dialog import StatsDialog
+from ui.transfer_dialog import FileTransferDialog
 
 
 class SerialTool(QMainWindow):
+    # 设备配置后台写入失败（由 DeviceManager 的同步线程发出）
+    device_save_failed = pyqtSignal(str)
     def __init__(self):
         super().__init__()
 
@@ -41,19 +59,36 @@ class SerialTool(QMainWindow):
         self.setWindowTitle("硬件测试上位机 v1.0")
         self.resize(1200, 850)
 
-        # 串口管理
-        self.serial = SerialManager()
-        self.history = HistoryManager()
-        self.log_mgr = LogManager()
-        self.device_mgr = DeviceManager()
         # 设置
         self.settings = QSettings("settings.ini", QSettings.IniFormat)
+        self.history = HistoryManager(max_history=self.settings.value("history/max_history", 1000, type=int))
+        self.log_mgr = LogManager(
+            max_bytes=self.settings.value("logging/max_size_mb", 100, type=int) * 1024 * 1024,
+            rotate_interval=self.settings.value("logging/rotate_hours", 0, type=int) * 3600,
+        )
+        self.device_mgr = DeviceManager()
+        self.device_mgr.on_error = self.device_save_failed.emit
+        self.device_save_failed.connect(self.on_device_save_failed)
+        # 多串口会话：每个端口独立的接收线程、分帧器、日志和自动化任务
+        self.session_mgr = SessionManager(log_options={
+            "max_bytes": self.settings.value("logging/max_size_mb", 100, type=int) * 1024 * 1024,
+            "rotate_interval": self.settings.value("logging/rotate_hours", 0, type=int) * 3600,
+        }, backend=self.settings.value("serial/backend", "thread"))
+        # 没有会话时使用的空串口（发送时返回失败）
+        self._idle_serial = SerialManager()
         # 初始化主题管理器
         self.theme_manager = ThemeManager(QApplication.instance())
         # self.update_log_path()
-        self.auto_thread = None
-        self.receiver_thread = None
-        self._is_port_open = False
+        # 已编译的自动化脚本（None 表示按历史记录列表发送）
+        self.script_program = None
+        # 多端口并行自动化
+        self.batch_thread = None
+        # 实时统计面板（打开时创建）
+        self.stats_dialog = None
+        # 后台导入指令文件
+        self.import_thread = None
+        # 历史记录 -> 列表条目，用于增量更新历史列表
+        self._history_items = {}
         self.logging_flag = self.settings.value("logging/status", True, type=bool)
 
         # 当前硬件配置
@@ -65,6 +100,9 @@ class SerialTool(QMainWindow):
         self.statusBar().setObjectName("status_bar")
         self.serial_status_label = QLabel("🔴 串口未连接")
         self.statusBar().addPermanentWidget(self.serial_status_label)
+        # 接收合并统计
+        self.recv_stats_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.recv_stats_label)
 
         # 设置中心窗口部件
         central_widget = QWidget()
@@ -94,6 +132,7 @@ class SerialTool(QMainWindow):
         port_layout.addWidget(port_cb_label)
         self.port_cb = QComboBox()
         self.port_cb.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.port_cb.currentIndexChanged.connect(self.update_serial_status)
         port_layout.addWidget(self.port_cb)
         # 波特率
         port_layout.addWidget(QLabel("波特率:"))
@@ -126,6 +165,14 @@ class SerialTool(QMainWindow):
         self.stopbits_combo.addItems(["1", "1.5", "2"])
         self.stopbits_combo.setCurrentText("1")
         port_layout.addWidget(self.stopbits_combo)
+        # 流控
+        port_layout.addWidget(QLabel("流控:"))
+        self.flow_combo = QComboBox()
+        self.flow_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.flow_combo.addItem("无", "none")
+        self.flow_combo.addItem("RTS/CTS", "rtscts")
+        self.flow_combo.addItem("XON/XOFF", "xonxoff")
+        port_layout.addWidget(self.flow_combo)
         # 刷新串口按钮
         self.refresh_btn = QPushButton("刷新")
         self.refresh_btn.clicked.connect(self.refresh_ports)
@@ -145,6 +192,8 @@ class SerialTool(QMainWindow):
         self.save_device_btn.clicked.connect(self.save_device_commands)
         self.import_btn = QPushButton("导入指令文件")
         self.import_btn.clicked.connect(self.import_commands)
+        self.framer_btn = QPushButton()
+        self.framer_btn.clicked.connect(self.edit_framer)
         label = QLabel("硬件配置:")
         label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         device_layout.addWidget(label)
@@ -155,6 +204,7 @@ class SerialTool(QMainWindow):
         self.del_device_btn.clicked.connect(self.del_device)
         device_layout.addWidget(self.add_device_btn)
         device_layout.addWidget(self.del_device_btn)
+        device_layout.addWidget(self.framer_btn)
         device_layout.addWidget(self.save_device_btn)
         device_layout.addWidget(self.import_btn)
         layout.addLayout(device_layout)
@@ -185,13 +235,19 @@ class SerialTool(QMainWindow):
         self.bottom_cmdlist_btn.clicked.connect(self.bottom_cmdlist_item)
         cmd_layout.addWidget(self.bottom_cmdlist_btn)
 
-        self.cmd_list = QListWidget()
+        # 模型按需显示行，导入几万条指令也不会卡住界面
+        self.cmd_model = CommandListModel(self)
+        self.cmd_list = QListView()
+        self.cmd_list.setModel(self.cmd_model)
+        self.cmd_list.setUniformItemSizes(True)
         # 启用拖动
         self.cmd_list.setDragEnabled(True)
         # 允许内部拖放（即在自身列表中重新排序）
         self.cmd_list.setDragDropMode(QAbstractItemView.InternalMove)
-        self.cmd_list.itemDoubleClicked.connect(self.send_list_item_command)
+        self.cmd_list.setDefaultDropAction(Qt.MoveAction)
+        self.cmd_list.doubleClicked.connect(self.send_cmdlist_command)
         self.device_cb.currentIndexChanged.connect(self.change_device)
+        self.change_device()
         left_col.addLayout(cmd_layout)
         left_col.addWidget(self.cmd_list)
 
@@ -223,13 +279,39 @@ class SerialTool(QMainWindow):
         # 日志保存按钮
         self.save_log_btn = QPushButton("打开日志文件夹")
         self.save_log_btn.clicked.connect(self.open_log_dir)
+        self.view_log_btn = QPushButton("查看日志")
+        self.view_log_btn.clicked.connect(self.open_log_viewer)
+        self.view_capture_btn = QPushButton("查看抓包")
+        self.view_capture_btn.clicked.connect(self.open_capture_viewer)
         self.start_auto_btn = QPushButton("开始自动化")
         self.start_auto_btn.clicked.connect(self.start_automation)
+        self.batch_auto_btn = QPushButton("批量自动化")
+        self.batch_auto_btn.clicked.connect(self.start_batch_automation)
         self.stop_auto_btn = QPushButton("停止自动化")
         self.stop_auto_btn.clicked.connect(self.stop_automation)
         self.stop_auto_btn.setEnabled(False)
+        # 自动化脚本（未加载时按历史记录列表逐条发送）
+        self.load_script_btn = QPushButton("加载脚本")
+        self.load_script_btn.clicked.connect(self.load_automation_script)
+        self.script_label = QLabel("脚本: 历史记录")
+        self.auto_loops_spin = QSpinBox()
+        self.auto_loops_spin.setRange(1, 10000000)
+        self.auto_loops_spin.setPrefix("轮数: ")
+        self.auto_loops_spin.setValue(self.settings.value("automation/loops", 1, type=int))
+        self.auto_interval_spin = QSpinBox()
+        self.auto_interval_spin.setRange(0, 3600000)
+        self.auto_interval_spin.setPrefix("间隔: ")
+        self.auto_interval_spin.setSuffix(" ms")
+        self.auto_interval_spin.setValue(self.settings.value("automation/interval_ms", 500, type=int))
         auto_layout.addWidget(self.save_log_btn)
+        auto_layout.addWidget(self.view_log_btn)
+        auto_layout.addWidget(self.view_capture_btn)
+        auto_layout.addWidget(self.load_script_btn)
+        auto_layout.addWidget(self.script_label)
+        auto_layout.addWidget(self.auto_loops_spin)
+        auto_layout.addWidget(self.auto_interval_spin)
         auto_layout.addWidget(self.start_auto_btn)
+        auto_layout.addWidget(self.batch_auto_btn)
         auto_layout.addWidget(self.stop_auto_btn)
         layout.addLayout(auto_layout)
 
@@ -241,14 +323,19 @@ class SerialTool(QMainWindow):
         log_list_layout = QHBoxLayout()
         serial_log_layout = QVBoxLayout()
         operation_log_layout = QVBoxLayout()
-        # 日志输出
-        self.output = QTextEdit()
-        self.output.setReadOnly(True)
-        serial_log_layout.addWidget(self.output)
+        # 串口数据输出：每个会话一个标签页（环形缓冲，超过上限丢弃最早的行）
+        max_log_lines = self.settings.value("ui/max_log_lines", 1000000, type=int)
+        self.session_tabs = QTabWidget()
+        self.session_tabs.setTabsClosable(True)
+        self.session_tabs.tabCloseRequested.connect(self.on_session_tab_close)
+        self._placeholder_view = LogView(max_log_lines)
+        self._placeholder_view.session = None
+        self.session_tabs.addTab(self._placeholder_view, "未连接")
+        self.session_tabs.currentChanged.connect(self.on_session_changed)
+        serial_log_layout.addWidget(self.session_tabs)
 
         # 日志输出
-        self.op_output = QTextEdit()
-        self.op_output.setReadOnly(True)
+        self.op_output = LogView(max_log_lines)
         operation_log_layout.addWidget(self.op_output)
         log_list_layout.addLayout(serial_log_layout, 2)
         log_list_layout.addLayout(operation_log_layout, 1)
@@ -257,7 +344,7 @@ class SerialTool(QMainWindow):
         # ----------------------- 命令发送 ------------------------
         # 命令发送区
         cmd_layout = QHBoxLayout()
-        self.cmd_input = QTextEdit()
+        self.cmd_input = CommandInput()
         # 获取每行高度
         line_height = self.cmd_input.fontMetrics().lineSpacing()
         print("每行高度:", line_height)
@@ -265,6 +352,12 @@ class SerialTool(QMainWindow):
         self.cmd_input.setMaximumHeight(line_height * 10 + 4)
         self.cmd_input.setPlaceholderText("输入命令...")
         # self.cmd_input.textChanged.connect(lambda: self.adjust_textedit_height(self.cmd_input))
+        # 输入时在后台检索历史记录并弹出补全
+        self.history_search = HistorySearchThread(self.history.db_file)
+        self.history_search.results.connect(self.cmd_input.show_suggestions)
+        self.cmd_input.line_edited.connect(self.search_history)
+        self.cmd_input.completion_selected.connect(self.apply_completion)
+        self.history_search.start()
         cmd_layout.addWidget(self.cmd_input)
 
         # 发送按钮
@@ -281,8 +374,9 @@ class SerialTool(QMainWindow):
         self.repeat_send_check_box = QCheckBox("循环发送")
         self.repeat_send_check_box.stateChanged.connect(self.repeat_send_check_box_changed)
         self.repeat_send_check_box.setChecked(False)
-        self.interval_spin = QSpinBox()
-        self.interval_spin.setRange(10, 10000)  # 10ms ~ 10秒
+        self.interval_spin = QDoubleSpinBox()
+        self.interval_spin.setDecimals(2)
+        self.interval_spin.setRange(0.01, 10000)  # 0.01ms ~ 10秒（小于 1ms 用于压力测试）
         self.interval_spin.setValue(100)  # 默认 100ms
         self.interval_spin.setSuffix(" ms")  # 显示单位
 
@@ -298,6 +392,10 @@ class SerialTool(QMainWindow):
 
         btn_list.addLayout(repeat_layout)
         btn_list.addWidget(self.send_btn)
+        self.send_file_btn = QPushButton("发送文件")
+        self.send_file_btn.setToolTip("以原始数据或 XMODEM-1K/YMODEM 发送文件（如固件）")
+        self.send_file_btn.clicked.connect(self.open_file_transfer)
+        btn_list.addWidget(self.send_file_btn)
         cmd_layout.addLayout(btn_list)
         layout.addLayout(cmd_layout)
 
@@ -343,6 +441,14 @@ class SerialTool(QMainWindow):
         self.clear_btn.clicked.connect(self.clear_all_history)
         titlebar_layout.addWidget(self.clear_btn)
 
+        self.stats_btn = QPushButton("统计")
+        self.stats_btn.setObjectName("StatsBtn")
+        self.stats_btn.setIcon(qta.icon("fa5s.chart-bar", color=self.theme_manager.get_icon_color()))
+        self.stats_btn.setIconSize(QSize(14, 14))
+        self.stats_btn.setFixedHeight(30)
+        self.stats_btn.clicked.connect(self.open_stats)
+        titlebar_layout.addWidget(self.stats_btn)
+
         self.about_btn = QPushButton("关于")
         self.about_btn.setObjectName("AboutBtn")
         self.about_btn.setIcon(qta.icon("fa5s.info-circle", color=self.theme_manager.get_icon_color()))
@@ -449,6 +555,25 @@ class SerialTool(QMainWindow):
             else:
                 self.statusBar().showMessage("设置已应用", 3000)
 
+    def open_stats(self):
+        """打开实时统计面板（非模态，显示当前标签页的会话）"""
+        if self.stats_dialog is None:
+            self.stats_dialog = StatsDialog(self.current_stats, self)
+            self.stats_dialog.finished.connect(self._stats_dialog_closed)
+        self.stats_dialog.show()
+        self.stats_dialog.raise_()
+
+    def _stats_dialog_closed(self):
+        self.stats_dialog.timer.stop()
+        self.stats_dialog.deleteLater()
+        self.stats_dialog = None
+
+    def current_stats(self):
+        session = self.session
+        if session is None or not session.is_open:
+            return None
+        return session.describe(), session.serial.stats
+
     def restart_application(self):
         """重启应用"""
         QMessageBox.information(self, "重启提示",
@@ -468,16 +593,28 @@ class SerialTool(QMainWindow):
         self.theme_manager.apply_theme(theme)
         self.update_toolbar_icons()
 
+        # 日志视图行数上限
+        max_log_lines = self.settings.value("ui/max_log_lines", 1000000, type=int)
+        for i in range(self.session_tabs.count()):
+            self.session_tabs.widget(i).set_max_lines(max_log_lines)
+        self.op_output.set_max_lines(max_log_lines)
+
         # 显示设置已应用的消息
         self.statusBar().showMessage("设置已应用", 3000)
 
         self.logging_flag = self.settings.value("logging/status", True, type=bool)
         print(f"日志已{'' if self.logging_flag else '不'}启用")
-        if self.auto_thread:
-            self.auto_thread.set_logging_flag(self.logging_flag)
-            print("更新自动化线程的日志设置")
+        for session in self.session_mgr:
+            if session.auto_thread:
+                session.auto_thread.set_logging_flag(self.logging_flag)
+        max_bytes = self.settings.value("logging/max_size_mb", 100, type=int) * 1024 * 1024
+        rotate_interval = self.settings.value("logging/rotate_hours", 0, type=int) * 3600
+        self.session_mgr.set_log_options(logging_flag=self.logging_flag, max_bytes=max_bytes,
+                                         rotate_interval=rotate_interval)
         if self.log_mgr:
             self.log_mgr.set_logging_flag(self.logging_flag)
+            self.log_mgr.max_bytes = max_bytes
+            self.log_mgr.rotate_interval = rotate_interval
             print("更新日志管理器的日志设置")
 
     def load_initial_settings(self):
@@ -504,8 +641,7 @@ class SerialTool(QMainWindow):
                 self.toggle_serial()
             self.logging_flag = self.settings.value("logging/status", True, type=bool)
             print(f"日志已{'' if self.logging_flag else '不'}启用")
-            if self.auto_thread:
-                self.auto_thread.set_logging_flag(self.logging_flag)
+            self.session_mgr.set_log_options(logging_flag=self.logging_flag)
             if self.log_mgr:
                 self.log_mgr.set_logging_flag(self.logging_flag)
 
@@ -525,75 +661,175 @@ class SerialTool(QMainWindow):
         self.op_output.append("🔄 串口列表已刷新")
 
     def toggle_serial(self):
-        """打开/关闭串口"""
-        if self.serial.ser and self.serial.ser.is_open:
-            self.stop_receiver()
-            # 已经打开 → 关闭
-            self.serial.close()
-            self.op_output.append("❌ 串口已关闭")
-            self.setSerialStatus(False)
-        else:
-            # 关闭状态 → 打开
-            port = self.port_cb.currentData()
-            baud_rate = int(self.baudrate_combo.currentText())
-            bytesize = int(self.bytesize_combo.currentText())
-            parity = self.parity_combo.currentText()
-            stop_bits = float(self.stopbits_combo.currentText())
-
-            if not port:
-                self.op_output.append("⚠️ 没有选择串口")
-                self.statusBar().showMessage("请选择串口", 2000)
-                return
-            try:
-                status = self.serial.open(port, baud_rate, bytesize, parity, stop_bits)
-                if not status:
-                    self.setSerialStatus(False)
-                    self.op_output.append(f"❌ 串口打开失败: 连接超时")
-                    return
-                else:
-                    self.setSerialStatus(True)
-                self.update_log_path()
-                self.start_receiver()
-            except Exception as e:
-                self.op_output.append(f"❌ 打开失败: {e}")
-                self.setSerialStatus(False)
-
-    def setSerialStatus(self, status: bool):
-        """设置串口状态"""
+        """打开/关闭所选端口（每个打开的端口是一个独立会话，对应一个标签页）"""
         port = self.port_cb.currentData()
-        baud_rate = int(self.baudrate_combo.currentText())
-        bytesize = int(self.bytesize_combo.currentText())
-        parity = self.parity_combo.currentText()
-        stop_bits = float(self.stopbits_combo.currentText())
-        if status:
-            self.open_btn.setText("关闭串口")
-            self.connect_btn.setText("断开")
-            self.op_output.append(f"串口已打开: {port} @ {baud_rate}, {bytesize}{parity}{stop_bits}")
-            self.log_mgr.write(f"串口已打开: {port} @ {baud_rate}, {bytesize}{parity}{stop_bits}", "debug")
-            self.statusBar().showMessage(f"串口已打开: {port} @ {baud_rate}, {bytesize}{parity}{stop_bits}")
-            self.serial_status_label.setText(f"🟢 串口已连接: {port} @ {baud_rate}, {bytesize}{parity}{stop_bits}")
+        if not port:
+            self.op_output.append("⚠️ 没有选择串口")
+            self.statusBar().showMessage("请选择串口", 2000)
+            return
+        if port in self.session_mgr:
+            self.close_session(port)
         else:
-            self.open_btn.setText("打开串口")
-            self.connect_btn.setText("连接")
-            self.serial_status_label.setText("🔴 串口未连接")
+            self.open_session(port)
 
-        self._is_port_open = status
-        self.refresh_btn.setEnabled(not status)
-        self.port_cb.setEnabled(not status)
-        self.baudrate_combo.setEnabled(not status)
-        self.bytesize_combo.setEnabled(not status)
-        self.parity_combo.setEnabled(not status)
-        self.stopbits_combo.setEnabled(not status)
+    def open_session(self, port):
+        """打开端口并为其创建标签页"""
+        try:
+            session = self.session_mgr.open_session(
+                port,
+                baud_rate=int(self.baudrate_combo.currentText()),
+                bytesize=int(self.bytesize_combo.currentText()),
+                parity=self.parity_combo.currentText(),
+                stop_bits=float(self.stopbits_combo.currentText()),
+                flow_control=self.flow_combo.currentData(),
+                tx_options={"max_batch": self.settings.value("serial/tx_batch_kb", 16, type=int) * 1024,
+                            "max_delay_ms": self.settings.value("serial/tx_delay_ms", 0, type=int)},
+                framer_config=self.device_mgr.get_framer_config(),
+                capture=self.settings.value("capture/raw_enabled", False, type=bool),
+                decode_text=self.settings.value("capture/decode_text", True, type=bool),
+                capture_ring_mb=(self.settings.value("capture/ring_size_mb", 1024, type=int)
+                                 if self.settings.value("capture/mode", "records") == "ring" else 0),
+            )
+        except Exception as e:
+            self.op_output.append(f"❌ 打开失败: {e}")
+            return
+        if session is None:
+            self.op_output.append(f"❌ 串口打开失败: {port}")
+            return
+
+        view = LogView(self.settings.value("ui/max_log_lines", 1000000, type=int))
+        view.session = session
+        if self.session_tabs.indexOf(self._placeholder_view) >= 0:
+            self.session_tabs.removeTab(self.session_tabs.indexOf(self._placeholder_view))
+        index = self.session_tabs.addTab(view, session.port)
+        session.receiver.track_display = True
+        session.receiver.received_batch.connect(lambda msgs, v=view: self.on_received_batch(v, msgs))
+        session.receiver.failed.connect(lambda error, s=session: self.on_session_failed(s, error))
+        if session.receiver.capture:
+            self.op_output.append(f"📦 原始数据抓包: {session.receiver.capture.capture_file}")
+        session.start()
+        self.session_tabs.setCurrentIndex(index)
+
+        self.op_output.append(f"串口已打开: {session.describe()}")
+        self.log_mgr.write(f"串口已打开: {session.describe()}", "debug")
+        self.statusBar().showMessage(f"串口已打开: {session.describe()}")
+        self.update_serial_status()
+
+    def close_session(self, port):
+        """关闭端口并移除其标签页"""
+        session = self.session_mgr.close_session(port)
+        if session is None:
+            return
+        for i in range(self.session_tabs.count()):
+            view = self.session_tabs.widget(i)
+            if view.session is session:
+                self.session_tabs.removeTab(i)
+                view.deleteLater()
+                break
+        if self.session_tabs.count() == 0:
+            self.session_tabs.addTab(self._placeholder_view, "未连接")
+        self.op_output.append(f"❌ 串口已关闭: {port}")
+        self.log_mgr.write(f"串口已关闭: {port}", "debug")
+        self.update_serial_status()
+
+    def on_session_failed(self, session, error):
+        """接收线程读取失败（设备拔出等）：关闭该会话，端口恢复后可重新打开"""
+        if self.session_mgr.get(session.port) is not session:
+            return
+        self.op_output.append(f"❌ 串口读取失败: {session.port}: {error}")
+        self.log_mgr.write(f"串口读取失败: {session.port}: {error}", "error")
+        self.close_session(session.port)
+
+    def on_session_tab_close(self, index):
+        session = self.session_tabs.widget(index).session
+        if session is not None:
+            self.close_session(session.port)
+
+    def on_session_changed(self, index=None):
+        """切换标签页：端口参数、发送/自动化按钮和统计显示跟随当前会话"""
+        session = self.session
+        if session is not None and session.params:
+            port_index = self.port_cb.findData(session.port)
+            if port_index >= 0:
+                self.port_cb.setCurrentIndex(port_index)
+            self.baudrate_combo.setCurrentText(str(session.params["baud_rate"]))
+            self.bytesize_combo.setCurrentText(str(session.params["bytesize"]))
+            self.parity_combo.setCurrentText(session.params["parity"])
+            self.stopbits_combo.setCurrentText(f"{session.params['stop_bits']:g}")
+            self.flow_combo.setCurrentIndex(max(0, self.flow_combo.findData(session.params.get("flow_control"))))
+        sending = bool(self.send_scheduler and self.send_scheduler.isRunning())
+        self.send_btn.setText("停止发送" if sending else "发送")
+        automating = bool(self.auto_thread and self.auto_thread.isRunning())
+        self.start_auto_btn.setEnabled(not automating)
+        self.stop_auto_btn.setEnabled(automating or bool(self.batch_thread and self.batch_thread.isRunning()))
+        self.recv_stats_label.setText("")
+        self.update_log_path()
+        self.update_serial_status()
+
+    @property
+    def session(self):
+        """当前标签页对应的会话（没有打开的串口时为 None）"""
+        view = self.session_tabs.currentWidget()
+        return view.session if view is not None else None
+
+    @property
+    def output(self):
+        """当前会话的串口数据视图"""
+        return self.session_tabs.currentWidget()
+
+    @property
+    def serial(self):
+        session = self.session
+        return session.serial if session else self._idle_serial
+
+    @property
+    def _is_port_open(self):
+        session = self.session
+        return bool(session and session.is_open)
+
+    @property
+    def receiver_thread(self):
+        session = self.session
+        return session.receiver if session else None
+
+    @property
+    def send_scheduler(self):
+        session = self.session
+        return session.send_scheduler if session else None
+
+    @property
+    def auto_thread(self):
+        session = self.session
+        return session.auto_thread if session else None
+
+    def update_serial_status(self):
+        """按所选端口是否已打开更新按钮和参数控件，状态栏显示已打开的端口数"""
+        if not hasattr(self, "open_btn"):
+            return
+        opened = self.port_cb.currentData() in self.session_mgr
+        self.open_btn.setText("关闭串口" if opened else "打开串口")
+        self.connect_btn.setText("断开" if opened else "连接")
+        self.baudrate_combo.setEnabled(not opened)
+        self.bytesize_combo.setEnabled(not opened)
+        self.parity_combo.setEnabled(not opened)
+        self.stopbits_combo.setEnabled(not opened)
+        self.flow_combo.setEnabled(not opened)
+        count = len(self.session_mgr)
+        session = self.session
+        if count == 0:
+            self.serial_status_label.setText("🔴 串口未连接")
+        elif session is not None:
+            self.serial_status_label.setText(f"🟢 已连接 {count} 个串口 | 当前: {session.describe()}")
+        else:
+            self.serial_status_label.setText(f"🟢 已连接 {count} 个串口")
 
     # ----------------------- 命令发送 ------------------------
     def send_command(self):
         """发送命令（支持循环发送）"""
         # 如果已经在发送，就停止
         print("发送数据")
-        if hasattr(self, "send_timer") and self.send_timer.isActive():
-            self.send_timer.stop()
-            self.sending_flag = False
-            self.send_btn.setText("发送")
+        if self.send_scheduler and self.send_scheduler.isRunning():
+            self.send_scheduler.stop()
             self.op_output.append("⏹️ 停止发送")
             return
         # 获取命令
@@ -601,59 +837,89 @@ class SerialTool(QMainWindow):
         if not self.lines:
             self.op_output.append("⚠️ 没有要发送的命令")
             return
+        # 预先编译为要发送的字节，循环发送时不再重复解析
+        self.hex_flag = self.hex_check_box.isChecked()
+        self.append_enter_flag = self.append_enter_check_box.isChecked()
+        end = b"\n\r" if self.append_enter_flag else b""
+        try:
+            self.compiled = [compile_command(cmd, self.hex_flag, end) for cmd in self.lines]
+        except ValueError:
+            self.op_output.append("⚠️ HEX 指令格式错误")
+            return
 
-        self.index = 0
-        self.sending_flag = True
-        self.send_btn.setText("停止发送")  # 按钮切换
-
-        # 获取用户设置
-        interval = self.interval_spin.value()
+        session = self.session
+        if session is None or not session.is_open:
+            self.op_output.append("❌ 发送失败，串口未打开")
+            return
         self.repeat_send = self.repeat_send_check_box.isChecked()
+        if not self.repeat_send:
+            # 单次发送：依次发送每一行
+            for cmd, compiled in zip(self.lines, self.compiled):
+                if not session.serial.send_bytes(compiled.payload):
+                    self.op_output.append("❌ 发送失败，串口未打开" if not session.serial.is_open
+                                          else "❌ 发送失败，发送队列已满")
+                    return
+                self.op_output.append(f"➡️ 已发送: {cmd}")
+                session.log_mgr.write(f"➡️ 已发送: {cmd}", "debug")
+                self.record_history(cmd, self.hex_flag, self.append_enter_flag)
+            return
 
-        # 定时器
-        self.send_timer = QTimer(self)
-        self.send_timer.timeout.connect(self.send_next_command)
-        if self.repeat_send:
-            self.send_timer.start(interval)
-        else:
-            self.send_timer.start(0)
+        # 循环发送：交给独立的调度线程，历史记录只在开始时记录一次
+        for cmd in dict.fromkeys(self.lines):
+            self.record_history(cmd, self.hex_flag, self.append_enter_flag)
+        interval = self.interval_spin.value()
+        scheduler = SendScheduler(session.serial, [c.payload for c in self.compiled], interval,
+                                  cmds=self.lines, log_mgr=session.log_mgr)
+        scheduler.stats_signal.connect(lambda stats: self.on_send_stats(session, stats))
+        scheduler.failed.connect(self.op_output.append)
+        scheduler.finished_signal.connect(lambda count: self.on_send_finished(session, count))
+        session.send_scheduler = scheduler
+        self.sending_flag = True
+        self.send_btn.setText("停止发送")  # 按钮切换
+        self.op_output.append(f"🔁 [{session.port}] 开始循环发送 {len(self.lines)} 条指令，间隔 {interval} ms")
+        scheduler.start()
 
-    def send_next_command(self):
-        """按顺序发送下一条命令"""
-        if not self.sending_flag or not self.lines:
-            self.send_timer.stop()
+    def on_send_stats(self, session, stats: dict):
+        """显示当前会话循环发送的实际间隔统计"""
+        if session is not self.session:
             return
+        self.statusBar().showMessage(
+            f"已发送 {stats['count'] + 1} 条 | 目标 {stats['target_ms']:.3f} ms | 实际平均 {stats['mean_ms']:.3f} ms"
+            f" | 最小 {stats['min_ms']:.3f} / 最大 {stats['max_ms']:.3f} ms | 抖动 {stats['jitter_ms']:.3f} ms"
+            f" | 超时 {stats['late']} 次")
 
-        cmd = self.lines[self.index]
-        if self.serial.send(cmd, self.hex_check_box.isChecked(),
-                            end=b"\n\r" if self.append_enter_check_box.isChecked() else b""):
-            self.op_output.append(f"➡️ 已发送: {cmd}")
-            self.log_mgr.write(f"➡️ 已发送: {cmd}", "debug")
-            self.history.save_history(cmd, self.hex_check_box.isChecked(), self.append_enter_check_box.isChecked())
-            self.load_history_ui()
-        else:
-            self.op_output.append("❌ 发送失败，串口未打开")
-            self.send_timer.stop()
+    def on_send_finished(self, session, count: int):
+        if session is self.session:
             self.sending_flag = False
             self.send_btn.setText("发送")
-            return
-
-        # 处理索引
-        self.index += 1
-        if self.index >= len(self.lines):
-            if self.repeat_send:
-                self.index = 0  # 循环
-            else:
-                self.send_timer.stop()
-                self.sending_flag = False
-                self.send_btn.setText("发送")
+        self.op_output.append(f"⏹️ [{session.port}] 循环发送结束，共发送 {count} 条")
 
     def send_list_item_command(self, item: QListWidgetItem):
-        self.cmd_input.setText(item.text())
-        self.hex_check_box.setChecked(bool(item.data(Qt.UserRole + 1)))
-        self.append_enter_check_box.setChecked(bool(item.data(Qt.UserRole + 2)))
+        cmd = item.data(Qt.UserRole)
+        self.send_saved_command(cmd if cmd is not None else item.text(), item.data(Qt.UserRole + 1),
+                                item.data(Qt.UserRole + 2))
+
+    def send_cmdlist_command(self, index):
+        self.send_saved_command(*self.cmd_model.command(index.row()))
+
+    def send_saved_command(self, cmd, hex_flag, append_enter_flag):
+        self.cmd_input.setText(cmd)
+        self.hex_check_box.setChecked(bool(hex_flag))
+        self.append_enter_check_box.setChecked(bool(append_enter_flag))
         self.send_command()
 
+    def search_history(self, text):
+        """提交历史检索（结果由 HistorySearchThread 异步返回）"""
+        if text:
+            self.history_search.search(text)
+        else:
+            self.cmd_input.completer.popup().hide()
+
+    def apply_completion(self, cmd, hex_flag, append_enter_flag):
+        """选中补全项时同步 HEX/回车选项"""
+        self.hex_check_box.setChecked(bool(hex_flag))
+        self.append_enter_check_box.setChecked(bool(append_enter_flag))
+
     def hex_check_box_changed(self):
         if self.hex_check_box.isChecked():
             self.cmd_input.textChanged.connect(self.format_hex_input)
@@ -709,11 +975,73 @@ class SerialTool(QMainWindow):
 
     def save_device_commands(self):
         """保存设备配置信息"""
-        self.device_mgr.save_device_commands(self.cmd_list)
+        self.device_mgr.save_device_commands(self.cmd_model.commands())
 
     def import_commands(self):
-        """导入命令"""
-        pass
+        """从 txt/CSV/JSON 文件导入指令（后台解析，按批加入指令列表，导入时校验 HEX 并去重）"""
+        if self.import_thread and self.import_thread.isRunning():
+            self.import_thread.stop()
+            return
+        if self.device_mgr.current_device is None:
+            QMessageBox.warning(self, "错误", "请先选择或增加硬件配置")
+            return
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入指令文件", "", "指令文件 (*.txt *.csv *.json *.jsonl);;所有文件 (*)")
+        if not path:
+            return
+        # 槽函数带上线程对象：切换设备后已排队的批次和结果属于旧的导入，直接丢弃
+        thread = CommandImportThread(path, self.cmd_model.commands())
+        thread.batch.connect(lambda commands: self.on_import_batch(thread, commands))
+        thread.progress.connect(lambda p: self.on_import_progress(thread, p))
+        thread.finished_signal.connect(lambda *result: self.on_import_finished(thread, *result))
+        self.import_thread = thread
+        self.import_btn.setText("停止导入")
+        self.op_output.append(f"开始导入指令: {path}")
+        thread.start()
+
+    def on_import_batch(self, thread, commands):
+        if thread is self.import_thread:
+            self.cmd_model.append(commands)
+
+    def on_import_progress(self, thread, percent):
+        if thread is self.import_thread:
+            self.statusBar().showMessage(f"正在导入指令... {percent}%")
+
+    def on_import_finished(self, thread, added, duplicates, errors, failure):
+        if thread is not self.import_thread:
+            return
+        self.import_thread = None
+        self.import_btn.setText("导入指令文件")
+        if failure:
+            self.op_output.append(f"❌ 导入失败: {failure}")
+        msg = f"导入 {added} 条指令，跳过重复 {duplicates} 条，错误 {len(errors)} 条"
+        self.op_output.append(("✅ " if not errors and not failure else "⚠️ ") + msg)
+        for line_no, cmd, error in errors[:20]:
+            self.op_output.append(f"  第 {line_no} 条 {error}: {cmd}")
+        if len(errors) > 20:
+            self.op_output.append(f"  ……共 {len(errors)} 条错误")
+        self.statusBar().showMessage(msg, 5000)
+        if added:
+            self.save_device_commands()
+
+    def on_device_save_failed(self, msg):
+        """写入失败的改动已回滚：提示并按当前列表重新保存"""
+        self.op_output.append(f"❌ {msg}")
+        self.statusBar().showMessage(msg, 5000)
+        self.save_device_commands()
+
+    def abandon_import(self):
+        """切换设备前停止导入：之后送达的批次和结果都丢弃，已加入列表的部分保存到原设备"""
+        thread = self.import_thread
+        if thread is None:
+            return
+        self.import_thread = None
+        for signal in (thread.batch, thread.progress, thread.finished_signal):
+            signal.disconnect()
+        thread.stop()
+        self.import_btn.setText("导入指令文件")
+        self.op_output.append("⚠️ 已切换设备，停止导入指令")
+        self.save_device_commands()
 
     def add_device(self):
         """增加硬件配置"""
@@ -722,8 +1050,11 @@ class SerialTool(QMainWindow):
             if text in self.device_mgr.devices:
                 QMessageBox.warning(self, "错误", f"设备{text}已存在")
                 return
-            self.device_mgr.add_device(text, "COM1", 115200, "N", "1", "8", "0")
+            self.abandon_import()
+            self.device_mgr.add_device(text, "COM1", 115200, "N", 1, 8)
             self.save_device_commands()
+            self.device_cb.addItem(text)
+            self.device_cb.setCurrentText(text)
 
         pass
 
@@ -733,50 +1064,65 @@ class SerialTool(QMainWindow):
 
     def delete_cmdlist_item(self):
         """删除命令"""
-        if self.cmd_list.currentItem() is None:
+        index = self.cmd_list.currentIndex()
+        if not index.isValid():
             return
-        self.cmd_list.takeItem(self.cmd_list.row(self.cmd_list.currentItem()))
+        self.cmd_model.take(index.row())
         self.save_device_commands()
 
+    def move_cmdlist_item(self, target):
+        """把当前条目移动到 target(当前行) 返回的位置"""
+        index = self.cmd_list.currentIndex()
+        if not index.isValid():
+            return
+        row = index.row()
+        new_row = self.cmd_model.move(row, target(row))
+        self.cmd_list.setCurrentIndex(self.cmd_model.index(new_row))
+
     def up_cmdlist_item(self):
         """上移条目"""
-        current_row = self.cmd_list.currentRow()
-        if current_row <= 0:
-            return  # 已经在顶部
-        item = self.cmd_list.takeItem(current_row)
-        self.cmd_list.insertItem(current_row - 1, item)
-        self.cmd_list.setCurrentRow(current_row - 1)
+        self.move_cmdlist_item(lambda row: row - 1)
 
     def top_cmdlist_item(self):
         """置顶条目"""
-        current_row = self.cmd_list.currentRow()
-        if current_row <= 0:
-            return  # 已经在顶部
-        item = self.cmd_list.takeItem(current_row)
-        self.cmd_list.insertItem(0, item)
-        self.cmd_list.setCurrentRow(0)
+        self.move_cmdlist_item(lambda row: 0)
 
     def down_cmdlist_item(self):
         """下移条目"""
-        current_row = self.cmd_list.currentRow()
-        if current_row >= self.cmd_list.count() - 1:
-            return  # 已经在底部
-        item = self.cmd_list.takeItem(current_row)
-        self.cmd_list.insertItem(current_row + 1, item)
-        self.cmd_list.setCurrentRow(current_row + 1)
+        self.move_cmdlist_item(lambda row: row + 1)
 
     def bottom_cmdlist_item(self):
         """置底条目"""
-        current_row = self.cmd_list.currentRow()
-        if current_row >= self.cmd_list.count() - 1:
-            return  # 已经在底部
-        item = self.cmd_list.takeItem(current_row)
-        self.cmd_list.insertItem(self.cmd_list.count() - 1, item)
-        self.cmd_list.setCurrentRow(self.cmd_list.count() - 1)
+        self.move_cmdlist_item(lambda row: len(self.cmd_model) - 1)
 
     def change_device(self):
         """切换硬件配置"""
-        pass
+        name = self.device_cb.currentText()
+        self.abandon_import()
+        if name:
+            self.device_mgr.set_current_device(name)
+        self.cmd_model.set_commands(self.device_mgr.get_commands())
+        self.update_framer_btn()
+        # 接收中切换设备时当前会话立即使用新设备的分帧方式（初始化时还没有会话）
+        if len(self.session_mgr) and self.session:
+            self.session.set_framer_config(self.device_mgr.get_framer_config())
+
+    def edit_framer(self):
+        """编辑当前设备的分帧方式"""
+        if self.device_mgr.current_device is None:
+            QMessageBox.warning(self, "错误", "请先选择或增加硬件配置")
+            return
+        dialog = FramerDialog(self.device_mgr.get_framer_config(), self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        self.device_mgr.set_framer_config(dialog.config)
+        self.update_framer_btn()
+        if self.session:
+            self.session.set_framer_config(dialog.config)
+        self.op_output.append(f"帧格式已设置为: {describe_framer(dialog.config)}")
+
+    def update_framer_btn(self):
+        self.framer_btn.setText(f"帧格式: {describe_framer(self.device_mgr.get_framer_config())}")
 
     # ----------------------- 历史记录 ------------------------
     def add_history_to_cmdlist(self):
@@ -785,48 +1131,68 @@ class SerialTool(QMainWindow):
         if self.history_list.currentItem() is None:
             return
         print(self.history_list.currentItem().text())
-        cmd_list_item = QListWidgetItem(self.history_list.currentItem().text())
-        cmd_list_item.setData(Qt.UserRole + 1, self.history_list.currentItem().data(Qt.UserRole + 1))
-        cmd_list_item.setData(Qt.UserRole + 2, self.history_list.currentItem().data(Qt.UserRole + 2))
-        self.cmd_list.insertItem(0, cmd_list_item)
+        item = self.history_list.currentItem()
+        self.cmd_model.insert(0, (item.data(Qt.UserRole), bool(item.data(Qt.UserRole + 1)),
+                                  bool(item.data(Qt.UserRole + 2))))
 
     def delete_selected_history(self):
         """删除选中的历史记录"""
-        if self.history_list.currentItem() is None:
+        item = self.history_list.currentItem()
+        if item is None:
             return
-        self.history.delete_history(self.history_list.currentItem().text(),
-                                    self.history_list.currentItem().data(Qt.UserRole + 1),
-                                    self.history_list.currentItem().data(Qt.UserRole + 2))
-        self.load_history_ui()
+        key = (item.data(Qt.UserRole), item.data(Qt.UserRole + 1), item.data(Qt.UserRole + 2))
+        self.history.delete_history(*key)
+        self._history_items.pop(key, None)
+        self.history_list.takeItem(self.history_list.row(item))
 
     def clear_history(self):
         """清空历史记录"""
         self.history.clear_history()
-        self.load_history_ui()
+        self._history_items.clear()
+        self.history_list.clear()
 
     def clear_all_history(self):
         """清空所有历史记录"""
-        self.output.setText("")
-        self.op_output.setText("")
+        self.output.clear()
+        self.op_output.clear()
         self.statusBar().showMessage("数据已清除", 2000)
 
     def load_history_ui(self):
         """加载历史记录"""
         print("加载历史记录")
         self.history_list.clear()
+        self._history_items.clear()
         for cmd, hex_flag, append_enter_flag in self.history.load_history():
             self.add_history_item(cmd, hex_flag, append_enter_flag)
 
     def add_history_item(self, cmd, hex_flag, append_enter_flag):
         """添加历史记录条目"""
         item = QListWidgetItem(cmd + " | " + ("hex" if hex_flag else "str") + " | " + ("append enter" if append_enter_flag else ""))
+        item.setData(Qt.UserRole, cmd)
         item.setData(Qt.UserRole + 1, hex_flag)
         item.setData(Qt.UserRole + 2, append_enter_flag)
         self.history_list.insertItem(0, item)
+        self._history_items[(cmd, hex_flag, append_enter_flag)] = item
+
+    def record_history(self, cmd, hex_flag, append_enter_flag):
+        """记录一条历史，只移动或插入对应的一个列表条目"""
+        key, existed, trimmed = self.history.upsert_history(cmd, hex_flag, append_enter_flag)
+        for old_key in trimmed:
+            old_item = self._history_items.pop(old_key, None)
+            if old_item is not None:
+                self.history_list.takeItem(self.history_list.row(old_item))
+        item = self._history_items.get(key) if existed else None
+        if item is None:
+            self.add_history_item(*key)
+            return
+        row = self.history_list.row(item)
+        if row > 0:
+            self.history_list.takeItem(row)
+            self.history_list.insertItem(0, item)
 
     def open_log_dir(self):
-        """打开日志文件夹"""
-        log_dir = self.log_mgr.log_dir
+        """打开日志文件夹（有打开的串口时为当前会话的日志目录）"""
+        log_dir = self.session.log_dir if self.session else self.log_mgr.log_dir
         if platform.system() == "Windows":
             os.startfile(log_dir)
         elif platform.system() == "Darwin":  # macOS
@@ -834,9 +1200,42 @@ class SerialTool(QMainWindow):
         else:  # Linux
             subprocess.call(["xdg-open", log_dir])
 
+    def open_log_viewer(self):
+        """选择日志文件并在程序内查看（默认选中当前日志文件）"""
+        session = self.session
+        log_mgr = session.log_mgr if session and session.log_mgr else self.log_mgr
+        path, _ = QFileDialog.getOpenFileName(self, "查看日志", log_mgr.log_file, "日志文件 (*.log);;所有文件 (*)")
+        if not path:
+            return
+        try:
+            LogViewerDialog(path, self).show()
+        except OSError as e:
+            QMessageBox.warning(self, "错误", f"无法打开日志文件: {e}")
+
+    def open_capture_viewer(self):
+        """选择环形抓包文件并分页查看（抓包进行中也可以打开）"""
+        log_dir = self.session.log_dir if self.session else self.log_mgr.log_dir
+        path, _ = QFileDialog.getOpenFileName(self, "查看抓包", log_dir, "环形抓包 (*.ring);;所有文件 (*)")
+        if not path:
+            return
+        try:
+            CaptureViewerDialog(path, self).show()
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "错误", f"无法打开抓包文件: {e}")
+
+    def open_file_transfer(self):
+        """向当前标签页的串口发送文件（非模态，可同时查看接收）"""
+        session = self.session
+        if session is None or not session.is_open:
+            self.op_output.append("请先打开串口！")
+            return
+        FileTransferDialog(session, self).show()
+
     def update_log_path(self):
         """更新UI上显示的日志文件路径"""
-        self.log_path_label.setText(f"ℹ 当前日志文件: {self.log_mgr.log_file}")
+        session = self.session
+        log_mgr = session.log_mgr if session and session.log_mgr else self.log_mgr
+        self.log_path_label.setText(f"ℹ 当前日志文件: {log_mgr.log_file}")
 
     # ----------------------- 自动化控制 ------------------------
     def start_automation(self):
@@ -846,103 +1245,197 @@ class SerialTool(QMainWindow):
         if self.auto_thread and self.auto_thread.isRunning():
             self.op_output.append("自动化已在运行")
             return
-        cmds = [self.history_list.item(i).text() for i in range(self.history_list.count())]
-        if not cmds:
-            self.op_output.append("没有可自动发送的命令")
+        steps = self.automation_program()
+        if steps is None:
             return
 
-        # 每次启动自动化都新建日志文件
-        from manager.log_manager import LogManager
-        self.log_mgr = LogManager()
+        # 每次启动自动化都切换到新的日志文件
+        session = self.session
+        session.log_mgr.rotate()
         self.update_log_path()  # 更新 UI 标签
 
-        # 启动自动化线程
-        self.auto_thread = AutomationThread(
-            cmds,
-            serial_mgr=self.serial,
-            log_mgr=self.log_mgr,
-            interval_ms=500,
-            loops=1,
+        # 启动自动化线程（日志输出到该会话的标签页）
+        auto_thread = AutomationThread(
+            steps,
+            serial_mgr=session.serial,
+            log_mgr=session.log_mgr,
+            interval_ms=self.auto_interval_spin.value(),
+            loops=self.auto_loops_spin.value(),
             logging_flag=self.logging_flag,
+            framer=create_framer(session.framer_config),
+            receiver=session.receiver,
         )
-        self.auto_thread.log_signal.connect(lambda msg: self.output.append(msg))
-        self.auto_thread.finished_signal.connect(self.auto_finished)
-        self.auto_thread.start()
+        view = self.output
+        auto_thread.log_signal.connect(view.append)
+        auto_thread.finished_signal.connect(lambda: self.auto_finished(session))
+        session.auto_thread = auto_thread
+        auto_thread.start()
 
         self.start_auto_btn.setEnabled(False)
         self.stop_auto_btn.setEnabled(True)
-        self.op_output.append("自动化开始")
-        self.log_mgr.write("自动化开始", "debug")
+        self.op_output.append(f"[{session.port}] 自动化开始")
+        self.log_mgr.write(f"[{session.port}] 自动化开始", "debug")
+
+    def automation_program(self):
+        """当前自动化要运行的程序：已加载的脚本，或由历史记录列表生成；没有可发送的命令时返回 None"""
+        if self.script_program is not None:
+            program = self.script_program
+        else:
+            # 每步发送后等待一帧回复（收到即进入下一步），超时记为失败
+            expect = Expectation(frames=1,
+                                 timeout_ms=self.settings.value("automation/reply_timeout_ms", 1000, type=int))
+            steps = []
+            for i in range(self.history_list.count()):
+                item = self.history_list.item(i)
+                end = b"\n\r" if item.data(Qt.UserRole + 2) else b""
+                try:
+                    steps.append(AutomationStep(item.data(Qt.UserRole), bool(item.data(Qt.UserRole + 1)), end, expect))
+                except ValueError:
+                    self.op_output.append(f"⚠️ HEX 指令格式错误，已跳过: {item.data(Qt.UserRole)}")
+            program = Program.from_steps(steps)
+        if not len(program):
+            self.op_output.append("没有可自动发送的命令")
+            return None
+        self.settings.setValue("automation/loops", self.auto_loops_spin.value())
+        self.settings.setValue("automation/interval_ms", self.auto_interval_spin.value())
+        return program
+
+    def start_batch_automation(self):
+        """同一脚本在多个端口上并行运行（端口由对话框选择，串口参数和帧格式来自当前硬件配置）"""
+        if self.batch_thread and self.batch_thread.isRunning():
+            self.op_output.append("批量自动化已在运行")
+            return
+        ports = [(p.device, p.description) for p in self.serial.list_ports()]
+        if not ports:
+            self.op_output.append("⚠️ 没有可用的串口")
+            return
+        dialog = BatchDialog(ports, busy_ports=[s.port for s in self.session_mgr],
+                             max_workers=self.settings.value("automation/batch_workers", 8, type=int), parent=self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        program = self.automation_program()
+        if program is None:
+            return
+        self.settings.setValue("automation/batch_workers", dialog.max_workers)
+
+        self.batch_thread = BatchAutomationThread(
+            program,
+            dialog.selected_ports,
+            serial_params=self.device_mgr.get_serial_params(),
+            framer_config=self.device_mgr.get_framer_config(),
+            max_workers=dialog.max_workers,
+            loops=self.auto_loops_spin.value(),
+            interval_ms=self.auto_interval_spin.value(),
+            log_root=self.log_mgr.log_dir,
+            logging_flag=self.logging_flag,
+        )
+        self.batch_thread.log_signal.connect(self.op_output.append)
+        self.batch_thread.finished_signal.connect(self.batch_finished)
+        self.batch_thread.start()
+        self.batch_auto_btn.setEnabled(False)
+        self.stop_auto_btn.setEnabled(True)
+        self.log_mgr.write(f"批量自动化开始: {', '.join(dialog.selected_ports)}", "debug")
+
+    def batch_finished(self, summary: dict):
+        self.batch_auto_btn.setEnabled(True)
+        self.stop_auto_btn.setEnabled(bool(self.auto_thread and self.auto_thread.isRunning()))
+        self.log_mgr.write(f"批量自动化结束: 通过 {summary['passed_devices']}，失败 {summary['failed_devices']}", "debug")
+        if summary.get("latency_p50_ms") is not None:
+            self.op_output.append(f"往返时延 P50 {summary['latency_p50_ms']:.1f} ms，P95 {summary['latency_p95_ms']:.1f} ms，"
+                                  f"最大 {summary['latency_max_ms']:.1f} ms")
+
+    def load_automation_script(self):
+        """加载自动化脚本；取消选择时恢复为按历史记录发送"""
+        path, _ = QFileDialog.getOpenFileName(self, "加载自动化脚本", "", "脚本文件 (*.txt *.script);;所有文件 (*)")
+        if not path:
+            self.script_program = None
+            self.script_label.setText("脚本: 历史记录")
+            return
+        try:
+            self.script_program = load_script(path)
+        except (OSError, UnicodeDecodeError, ScriptError) as e:
+            QMessageBox.warning(self, "脚本错误", str(e))
+            return
+        self.script_label.setText(f"脚本: {os.path.basename(path)}")
+        self.op_output.append(f"已加载脚本 {path}，共 {len(self.script_program)} 条指令")
 
     def stop_automation(self):
         if self.auto_thread:
             self.auto_thread.stop()
             self.op_output.append("请求停止自动化...")
+        if self.batch_thread and self.batch_thread.isRunning():
+            self.batch_thread.stop()
+            self.op_output.append("请求停止批量自动化...")
 
-    def auto_finished(self):
-        self.op_output.append("自动化结束")
-        self.start_auto_btn.setEnabled(True)
-        self.stop_auto_btn.setEnabled(False)
+    def auto_finished(self, session):
+        self.op_output.append(f"[{session.port}] 自动化结束")
+        if session is self.session:
+            self.start_auto_btn.setEnabled(True)
+            self.stop_auto_btn.setEnabled(bool(self.batch_thread and self.batch_thread.isRunning()))
 
     # -------------------- 串口接收 --------------------
-    def start_receiver(self):
-        """启动接收线程"""
-        self.receiver_thread = SerialReceiver(self.serial, self.log_mgr)
-        self.receiver_thread.received.connect(self.on_received)
-        self.receiver_thread.start()
-
-    def stop_receiver(self):
-        """停止接收线程"""
-        if self.receiver_thread:
-            self.receiver_thread.stop()
-            self.receiver_thread.wait()
-            self.receiver_thread = None
-
-    def on_received(self, msg: str):
-        """接收到串口数据"""
-        self.output.append(f"⬅️ {msg}")
+    def on_received_batch(self, view, msgs: list):
+        """接收到串口数据（一次刷新合并的多帧），写入对应会话的标签页"""
+        view.append("\n".join(f"⬅️ {msg}" for msg in msgs))
+        receiver = view.session.receiver
+        if receiver:
+            receiver.batch_displayed()
+        if view is not self.output:
+            return
+        if receiver:
+            self.recv_stats_label.setText(
+                f"接收: {receiver.frame_count} 帧 | 本次合并 {receiver.last_batch_size} 帧 | 最大 {receiver.max_batch_size} 帧")
 
     # -------------------- 关闭 --------------------
     def closeEvent(self, event):
         print("====== 开始关闭程序 ======")
 
         try:
-            if self.auto_thread is not None:
-                print("[1] 正在停止 auto_thread...")
-                start = time.perf_counter()
-                self.auto_thread.stop()
-                elapsed = time.perf_counter() - start
-                print(f"[1] auto_thread 停止耗时：{elapsed:.3f}s")
+            if self.batch_thread is not None:
+                self.batch_thread.stop()
+                self.batch_thread.wait()
         except Exception as e:
-            print(f"[1] 停止 auto_thread 出错：{e}")
+            print(f"停止批量自动化出错：{e}")
+
+        if self.import_thread is not None:
+            self.import_thread.stop()
 
         try:
-            if hasattr(self, 'receiver_thread') and self.receiver_thread is not None:
-                print("[2] 正在停止 receiver_thread...")
-                start = time.perf_counter()
-                self.receiver_thread.stop()
-                elapsed = time.perf_counter() - start
-                print(f"[2] receiver_thread 停止耗时：{elapsed:.3f}s")
+            print(f"[1] 正在关闭 {len(self.session_mgr)} 个串口会话...")
+            start = time.perf_counter()
+            self.session_mgr.close()
+            elapsed = time.perf_counter() - start
+            print(f"[1] 串口会话关闭耗时：{elapsed:.3f}s")
         except Exception as e:
-            print(f"[2] 停止 receiver_thread 出错：{e}")
+            print(f"[1] 关闭串口会话出错：{e}")
 
         try:
-            print("[3] 正在关闭串口...")
+            print("[2] 正在关闭 history...")
             start = time.perf_counter()
-            self.serial.close()
+            self.history_search.stop()
+            self.history.close()
             elapsed = time.perf_counter() - start
-            print(f"[3] 串口关闭耗时：{elapsed:.3f}s")
+            print(f"[2] history 关闭耗时：{elapsed:.3f}s")
         except Exception as e:
-            print(f"[3] 关闭串口出错：{e}")
+            print(f"[2] 关闭 history 出错：{e}")
 
         try:
-            print("[4] 正在关闭 history...")
+            print("[3] 正在保存设备配置...")
             start = time.perf_counter()
-            self.history.close()
+            self.device_mgr.close()
+            elapsed = time.perf_counter() - start
+            print(f"[3] 设备配置保存耗时：{elapsed:.3f}s")
+        except Exception as e:
+            print(f"[3] 保存设备配置出错：{e}")
+
+        try:
+            print("[4] 正在关闭日志...")
+            start = time.perf_counter()
+            self.log_mgr.close()
             elapsed = time.perf_counter() - start
-            print(f"[4] history 关闭耗时：{elapsed:.3f}s")
+            print(f"[4] 日志关闭耗时：{elapsed:.3f}s")
         except Exception as e:
-            print(f"[4] 关闭 history 出错：{e}")
+            print(f"[4] 关闭日志出错：{e}")
 
         try:
             print("[5] 正在保存窗口大小和位置...")